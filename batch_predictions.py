@@ -0,0 +1,258 @@
+# batch_predictions.py
+# Gece çalışan toplu fiyat tahmini: tüm desteklenen hisseler için tek model.predict çağrısı
+#
+# Kullanım (seans kapanışından sonra, ör. cron ile her iş günü 18:45):
+#   python batch_predictions.py
+#   python batch_predictions.py --symbols KCHOL THYAO --model model/kchol_xgb_model.pkl
+#   (--model verilmezse her hisse model/manifest.json'daki kendi modelini kullanır)
+
+import json
+import sqlite3
+from dataclasses import dataclass
+from datetime import datetime, date, timedelta
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from explanations import contributions_to_dict, explain_rows
+from model_artifacts import load_model_artifact
+from model_registry import get_model_registry
+from price_store import last_session_close
+from universe import compute_panel, get_universe_engine, latest_snapshot, to_yahoo_symbol
+
+# Modelin eğitildiği özellikler (sıra önemli)
+FEATURES = ['close', 'high', 'low', 'open', 'volume', 'SMA200', 'RSI', 'ATR', 'BBWidth', 'Williams']
+
+# Sohbette fiyat tahmini desteklenen hisseler
+PREDICTION_SYMBOLS = [
+    'KCHOL', 'THYAO', 'GARAN', 'AKBNK', 'ASELS', 'EREGL', 'SASA', 'ISCTR', 'BIMAS', 'ALARK',
+    'TUPRS', 'PGSU', 'KRMD', 'TAVHL', 'DOAS', 'TOASO', 'FROTO', 'VESTL', 'YAPI', 'QNBFB',
+    'HALKB', 'VAKBN', 'SISE', 'KERVN'
+]
+
+DEFAULT_MODEL_PATH = 'model/kchol_xgb_model.pkl'
+
+
+@dataclass
+class StoredPrediction:
+    trade_date: str       # Özelliklerin alındığı son işlem günü
+    symbol: str           # KCHOL (".IS" olmadan)
+    current_price: float
+    predicted_price: float
+    change: float
+    change_percent: float
+    prediction_date: str  # Tahminin geçerli olduğu işlem günü
+    features: Dict[str, float]
+    model_version: str
+    created_at: str
+    contributions: Optional[Dict[str, float]] = None  # Özellik katkıları (Saabas, canlı yolla aynı) + '_bias'
+
+
+def next_trading_day(day: date) -> date:
+    """Verilen günden sonraki ilk hafta içi gün"""
+    day = day + timedelta(days=1)
+    while day.weekday() >= 5:
+        day = day + timedelta(days=1)
+    return day
+
+
+def latest_trading_day(now: Optional[datetime] = None) -> date:
+    """Verisi tamamlanmış son işlem günü"""
+    return last_session_close(now).date()
+
+
+class PredictionStore:
+    def __init__(self, db_file: str = "predictions.db"):
+        self.db_file = db_file
+        self.init_database()
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.db_file, timeout=30)
+        conn.execute('PRAGMA journal_mode=WAL')
+        return conn
+
+    def init_database(self):
+        """Veritabanını başlat ve tabloları oluştur"""
+        conn = self._connect()
+        cursor = conn.cursor()
+
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS predictions (
+                trade_date TEXT NOT NULL,
+                symbol TEXT NOT NULL,
+                current_price REAL NOT NULL,
+                predicted_price REAL NOT NULL,
+                change REAL NOT NULL,
+                change_percent REAL NOT NULL,
+                prediction_date TEXT NOT NULL,
+                features TEXT NOT NULL,
+                model_version TEXT NOT NULL,
+                created_at TEXT NOT NULL,
+                contributions TEXT,
+                PRIMARY KEY (trade_date, symbol)
+            )
+        ''')
+        # Eski veritabanlarına katkı sütununu ekle
+        columns = [row[1] for row in cursor.execute('PRAGMA table_info(predictions)')]
+        if 'contributions' not in columns:
+            cursor.execute('ALTER TABLE predictions ADD COLUMN contributions TEXT')
+        # Sembolün en güncel tahmini tek index araması
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_predictions_symbol ON predictions (symbol, trade_date)')
+
+        conn.commit()
+        conn.close()
+
+    def save_many(self, predictions: List[StoredPrediction]):
+        """Tahminleri tek işlemde kaydet (aynı gün/sembol varsa güncellenir)"""
+        conn = self._connect()
+        with conn:
+            conn.executemany(
+                '''INSERT OR REPLACE INTO predictions
+                   (trade_date, symbol, current_price, predicted_price, change, change_percent,
+                    prediction_date, features, model_version, created_at, contributions)
+                   VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)''',
+                [(p.trade_date, p.symbol, p.current_price, p.predicted_price, p.change, p.change_percent,
+                  p.prediction_date, json.dumps(p.features), p.model_version, p.created_at,
+                  json.dumps(p.contributions) if p.contributions is not None else None)
+                 for p in predictions]
+            )
+        conn.close()
+
+    def get_latest(self, symbol: str) -> Optional[StoredPrediction]:
+        """Sembolün en güncel kayıtlı tahmini"""
+        conn = self._connect()
+        row = conn.execute(
+            '''SELECT trade_date, symbol, current_price, predicted_price, change, change_percent,
+                      prediction_date, features, model_version, created_at, contributions
+               FROM predictions WHERE symbol = ? ORDER BY trade_date DESC LIMIT 1''',
+            (symbol.upper().replace('.IS', ''),)
+        ).fetchone()
+        conn.close()
+        return self._row_to_prediction(row) if row else None
+
+    def get_for_date(self, trade_date: str) -> List[StoredPrediction]:
+        """Bir işlem gününün tüm tahminleri"""
+        conn = self._connect()
+        rows = conn.execute(
+            '''SELECT trade_date, symbol, current_price, predicted_price, change, change_percent,
+                      prediction_date, features, model_version, created_at, contributions
+               FROM predictions WHERE trade_date = ? ORDER BY symbol''',
+            (trade_date,)
+        ).fetchall()
+        conn.close()
+        return [self._row_to_prediction(row) for row in rows]
+
+    @staticmethod
+    def _row_to_prediction(row) -> StoredPrediction:
+        values = list(row)
+        values[7] = json.loads(values[7])
+        values[10] = json.loads(values[10]) if values[10] else None
+        return StoredPrediction(*values)
+
+
+def load_prediction_model(model_path: str = DEFAULT_MODEL_PATH):
+    """Tahmin modelini yükle (tercihen yerel XGBoost formatından)"""
+    return load_model_artifact(model_path)
+
+
+def build_feature_matrix(symbols: List[str], days: int = 400) -> pd.DataFrame:
+    """Tüm semboller için son barın özellik satırları (index: KCHOL gibi kısa kod)"""
+    engine = get_universe_engine()
+    matrices = engine.load_matrices([to_yahoo_symbol(s) for s in symbols], days=days)
+    snapshot = latest_snapshot(matrices, compute_panel(matrices))
+    snapshot.index = [s.replace('.IS', '') for s in snapshot.index]
+    return snapshot
+
+
+def predict_rows(model, snapshot: pd.DataFrame, model_version: str = DEFAULT_MODEL_PATH) -> List[StoredPrediction]:
+    """Anlık görüntüdeki tüm satırlar için tek predict çağrısıyla tahmin üret"""
+    features = snapshot[FEATURES].astype(float)
+    features = features[np.isfinite(features.to_numpy()).all(axis=1)]
+    if features.empty:
+        return []
+
+    predicted = np.asarray(model.predict(features.to_numpy()), dtype=float)
+    # Tüm satırların açıklaması tek pred_contribs çağrısıyla
+    try:
+        contributions = explain_rows(model, features.to_numpy())
+    except Exception as e:
+        print(f"Tahmin katkıları hesaplanamadı: {e}")
+        contributions = [None] * len(features)
+
+    created_at = datetime.now().isoformat()
+    predictions = []
+    for (symbol, row), prediction, contribution in zip(features.iterrows(), predicted, contributions):
+        trade_day = pd.Timestamp(snapshot.at[symbol, 'date']).date()
+        current_price = float(row['close'])
+        change = float(prediction) - current_price
+        predictions.append(StoredPrediction(
+            trade_date=trade_day.isoformat(),
+            symbol=symbol,
+            current_price=round(current_price, 2),
+            predicted_price=round(float(prediction), 2),
+            change=round(change, 2),
+            change_percent=round(change / current_price * 100, 2),
+            prediction_date=next_trading_day(trade_day).isoformat(),
+            features={name: float(row[name]) for name in FEATURES},
+            model_version=model_version,
+            created_at=created_at,
+            contributions=contributions_to_dict(contribution, FEATURES) if contribution is not None else None
+        ))
+    return predictions
+
+
+def run_batch(model=None, symbols: Optional[List[str]] = None, store: Optional[PredictionStore] = None,
+              model_path: Optional[str] = None) -> List[StoredPrediction]:
+    """Tüm desteklenen hisseler için özellik matrisini kur, tek seferde tahmin et ve kaydet.
+
+    Model verilmezse her sembol kayıt defterindeki modelini (yoksa genel modeli)
+    kullanır; aynı modeli paylaşan semboller tek predict çağrısında tahmin edilir.
+    """
+    store = store or PredictionStore()
+    snapshot = build_feature_matrix(symbols or PREDICTION_SYMBOLS)
+
+    if model is not None or model_path:
+        model = model if model is not None else load_prediction_model(model_path)
+        predictions = predict_rows(model, snapshot, model_version=model_path or DEFAULT_MODEL_PATH)
+    else:
+        registry = get_model_registry()
+        groups: Dict[str, List[str]] = {}
+        for symbol in snapshot.index:
+            groups.setdefault(registry.entry(symbol).version, []).append(symbol)
+
+        predictions = []
+        for version, group in groups.items():
+            predictor, _ = registry.get(group[0])
+            predictions += predict_rows(predictor, snapshot.loc[group], model_version=version)
+
+    if predictions:
+        store.save_many(predictions)
+    return predictions
+
+
+def is_current(prediction: Optional[StoredPrediction], now: Optional[datetime] = None) -> bool:
+    """Kayıtlı tahmin son tamamlanmış işlem gününe ait mi"""
+    return prediction is not None and prediction.trade_date >= latest_trading_day(now).isoformat()
+
+
+if __name__ == "__main__":
+    import argparse
+    import time
+
+    parser = argparse.ArgumentParser(description="Tüm hisseler için toplu fiyat tahmini")
+    parser.add_argument('--symbols', nargs='*', default=None, help="Hisse kodları (varsayılan: tüm desteklenenler)")
+    parser.add_argument('--model', default=None, help="Tek model yolu (varsayılan: sembol başına model kayıt defteri)")
+    parser.add_argument('--db', default="predictions.db")
+    args = parser.parse_args()
+
+    t0 = time.perf_counter()
+    results = run_batch(symbols=args.symbols, store=PredictionStore(args.db), model_path=args.model)
+    print(f"✅ {len(results)} hisse için tahmin kaydedildi ({time.perf_counter() - t0:.2f}s)")
+    for p in results:
+        print(f"  {p.symbol:6s} {p.trade_date} {p.current_price:>9.2f} -> {p.predicted_price:>9.2f} ({p.change_percent:+.2f}%)")
+
+    # Gerçekleşen kapanışlarla skor kartlarını güncelle (Tahmin Başarısı sayfası)
+    from prediction_backtest import run_backtest
+    scorecards = run_backtest(args.db)
+    print(f"📊 {max(len(scorecards) - 1, 0)} hisse için tahmin skor kartı güncellendi")
@@ -19,6 +19,9 @@ except ImportError:
     pass
 from typing import List, Dict, Optional, Tuple
 import yfinance as yf
+from price_store import load_ohlcv
+from single_flight import market_data_flight
+from indicators import add_indicators, get_indicators
 import pandas as pd
 import numpy as np
 from pathlib import Path
@@ -276,18 +279,18 @@ class DocumentRAGAgent:
     def get_stock_data(self, symbol: str = "KCHOL.IS") -> Dict:
         """Get current stock data and technical indicators from Yahoo Finance"""
         try:
-            stock = yf.Ticker(symbol)
-            info = stock.info
+            # Concurrent callers for the same symbol share one upstream request
+            info = market_data_flight.do(('ticker_info', symbol), lambda: yf.Ticker(symbol).info)
             
-            # Get historical data for technical analysis (last 100 days)
-            hist = stock.history(period="100d")
-            if hist.empty:
+            # Get historical data for technical analysis (last 100 days) from the local price store
+            hist = self._load_history(symbol, days=100)
+            if hist is None or hist.empty:
                 return {}
             
             current_price = hist['Close'].iloc[-1]
             
             # Calculate technical indicators
-            technical_data = self._calculate_technical_indicators(hist)
+            technical_data = self._calculate_technical_indicators(hist, symbol)
             
             return {
                 "current_price": current_price,
@@ -303,51 +306,48 @@ class DocumentRAGAgent:
             print(f"Stock data error: {e}")
             return {}
     
-    def _calculate_technical_indicators(self, hist: pd.DataFrame) -> Dict:
+    def _load_history(self, symbol: str, days: int = 100) -> Optional[pd.DataFrame]:
+        """Load daily bars from the local price store with yfinance-style column names"""
+        hist = load_ohlcv(symbol, days=days)
+        if hist is None:
+            return None
+        return hist.rename(columns=str.capitalize)
+    
+    def _calculate_technical_indicators(self, hist: pd.DataFrame, symbol: Optional[str] = None) -> Dict:
         """Calculate technical indicators from historical data"""
         try:
             # Basic price data
             close_prices = hist['Close']
-            high_prices = hist['High']
-            low_prices = hist['Low']
             volumes = hist['Volume']
             
+            # Shared vectorized indicator engine (cached per symbol and last bar)
+            ohlcv = hist.rename(columns=str.lower)
+            if symbol:
+                indicators = get_indicators(symbol, days=100, df=ohlcv)
+            else:
+                indicators = add_indicators(ohlcv)
+            last = indicators.iloc[-1]
+            
             # Moving Averages
-            sma_20 = close_prices.rolling(window=20).mean().iloc[-1]
-            sma_50 = close_prices.rolling(window=50).mean().iloc[-1]
-            sma_200 = close_prices.rolling(window=200).mean().iloc[-1]
+            sma_20 = last['SMA20']
+            sma_50 = last['SMA50']
+            sma_200 = last['SMA200']
             
             # RSI (Relative Strength Index)
-            delta = close_prices.diff()
-            gain = (delta.where(delta > 0, 0)).rolling(window=14).mean()
-            loss = (-delta.where(delta < 0, 0)).rolling(window=14).mean()
-            rs = gain / loss
-            rsi = 100 - (100 / (1 + rs))
-            current_rsi = rsi.iloc[-1]
+            current_rsi = last['RSI']
             
             # MACD (Moving Average Convergence Divergence)
-            ema_12 = close_prices.ewm(span=12).mean()
-            ema_26 = close_prices.ewm(span=26).mean()
-            macd_line = ema_12 - ema_26
-            signal_line = macd_line.ewm(span=9).mean()
-            macd_histogram = macd_line - signal_line
-            
-            current_macd = macd_line.iloc[-1]
-            current_signal = signal_line.iloc[-1]
-            current_histogram = macd_histogram.iloc[-1]
+            current_macd = last['MACD']
+            current_signal = last['MACD_SIGNAL']
+            current_histogram = last['MACD_HIST']
             
             # Bollinger Bands
-            bb_middle = close_prices.rolling(window=20).mean()
-            bb_std = close_prices.rolling(window=20).std()
-            bb_upper = bb_middle + (bb_std * 2)
-            bb_lower = bb_middle - (bb_std * 2)
-            
-            current_bb_upper = bb_upper.iloc[-1]
-            current_bb_lower = bb_lower.iloc[-1]
-            current_bb_middle = bb_middle.iloc[-1]
+            current_bb_upper = last['BB_UPPER']
+            current_bb_lower = last['BB_LOWER']
+            current_bb_middle = last['BB_MIDDLE']
             
             # Volume indicators
-            avg_volume = volumes.rolling(window=20).mean().iloc[-1]
+            avg_volume = last['AVGVOL20']
             current_volume = volumes.iloc[-1]
             volume_ratio = current_volume / avg_volume if avg_volume > 0 else 1
             
@@ -501,8 +501,7 @@ SADECE KOD YAZ, FONKSİYON TANIMLAMA YOK:
         """Execute the generated chart code and return base64 image"""
         try:
             # Get historical data for chart
-            stock = yf.Ticker("KCHOL.IS")
-            hist = stock.history(period="100d")
+            hist = self._load_history("KCHOL.IS", days=100)
             
             # Create a safe execution environment
             local_vars = {
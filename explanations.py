@@ -0,0 +1,137 @@
+# explanations.py
+# Fiyat tahminlerinin modele dayalı açıklaması: XGBoost'un pred_contribs çıktısıyla
+# her özelliğin tahmine katkısı (TL). Tüm semboller tek vektörel çağrıyla açıklanır;
+# canlı tek satırlık tahminlerde katkılar derlenmiş ormandan (tree_inference) gelir.
+# İki yol da aynı yöntemi (Saabas, approx_contribs) kullanır: aynı satır gece işinde
+# ve canlı sohbette aynı etkenlerle açıklanır.
+#
+# Kullanım:
+#   python explanations.py   -> katkıların toplamı = tahmin kontrolü, canlı/toplu yol farkı ve süre karşılaştırması
+
+from typing import Dict, List, Optional
+
+import numpy as np
+import xgboost as xgb
+
+BIAS_KEY = '_bias'
+
+# Sohbette gösterilecek özellik adları
+FEATURE_LABELS = {
+    'close': 'Kapanış fiyatı',
+    'high': 'Günün en yükseği',
+    'low': 'Günün en düşüğü',
+    'open': 'Açılış fiyatı',
+    'volume': 'İşlem hacmi',
+    'SMA200': '200 günlük ortalama',
+    'RSI': 'RSI',
+    'ATR': 'ATR (volatilite)',
+    'BBWidth': 'Bollinger bant genişliği',
+    'Williams': 'Williams %R',
+}
+
+
+def _booster(model) -> xgb.Booster:
+    """XGBRegressor, Booster, FastPredictor ya da PredictorPool'dan Booster"""
+    if isinstance(model, xgb.Booster):
+        return model
+    if hasattr(model, 'get_booster'):
+        return model.get_booster()
+    if hasattr(model, 'fallback'):
+        return _booster(model.fallback)
+    with model.acquire() as pooled:
+        return pooled.get_booster()
+
+
+def explain_rows(model, X) -> np.ndarray:
+    """Tüm satırlar için tek çağrıda özellik katkıları: (satır, özellik + 1), son sütun sabit terim.
+
+    Her satırın katkılarının toplamı modelin tahminine eşittir.
+    """
+    X = np.atleast_2d(np.asarray(X, dtype=float))
+    # Küçük girdilerde derlenmiş orman (DMatrix ve thread açılışı yok)
+    forest = getattr(model, 'forest', None)
+    if forest is not None and len(X) <= model.max_rows:
+        return forest.contributions(X)
+    # Derlenmiş ormanla aynı Saabas katkıları (kesin TreeSHAP canlı yoldan farklı etkenler seçebilir)
+    return _booster(model).predict(xgb.DMatrix(X), pred_contribs=True, approx_contribs=True)
+
+
+def contributions_to_dict(row: np.ndarray, features: List[str]) -> Dict[str, float]:
+    """Bir satırın katkıları {özellik: katkı, '_bias': sabit} olarak (tahminle birlikte saklanır)"""
+    result = {name: float(value) for name, value in zip(features, row[:len(features)])}
+    result[BIAS_KEY] = float(row[len(features)])
+    return result
+
+
+def top_drivers(contributions: Dict[str, float], feature_values: Dict[str, float], k: int = 3) -> List[Dict]:
+    """Mutlak katkıya göre en etkili k özellik"""
+    ranked = sorted((name for name in contributions if name != BIAS_KEY),
+                    key=lambda name: abs(contributions[name]), reverse=True)
+    return [{
+        'feature': name,
+        'label': FEATURE_LABELS.get(name, name),
+        'value': feature_values.get(name),
+        'contribution': contributions[name],
+    } for name in ranked[:k]]
+
+
+def build_explanation(contributions: Dict[str, float], feature_values: Dict[str, float],
+                      predicted_price: float, current_price: float, k: int = 3) -> Dict:
+    """Sohbet yanıtında kullanılan açıklama sözlüğü"""
+    drivers = top_drivers(contributions, feature_values, k)
+    explanations = []
+    for driver in drivers:
+        direction = "yukarı" if driver['contribution'] > 0 else "aşağı"
+        value = driver['value']
+        value_text = f" ({value:,.2f})" if value is not None else ""
+        explanations.append(f"{driver['label']}{value_text} tahmini {abs(driver['contribution']):.2f} TL {direction} çekiyor")
+
+    trend_direction = "YÜKSELİŞ" if predicted_price > current_price else "DÜŞÜŞ"
+    return {
+        'trend_direction': trend_direction,
+        'confidence': "Yüksek" if abs(predicted_price - current_price) > 5 else "Orta",
+        'explanations': explanations,
+        'drivers': drivers,
+        'baseline': contributions.get(BIAS_KEY),
+        'key_factors': {d['feature']: round(d['contribution'], 2) for d in drivers},
+    }
+
+
+def format_drivers(explanation: Optional[Dict]) -> str:
+    """Açıklamanın sohbet için markdown listesi (açıklama yoksa boş)"""
+    if not explanation or not explanation.get('drivers'):
+        return ""
+    lines = "\n".join(f"- {text}" for text in explanation['explanations'])
+    return f"**Tahmini En Çok Etkileyen Faktörler:**\n{lines}"
+
+
+if __name__ == "__main__":
+    import time
+    import warnings
+    warnings.filterwarnings('ignore')
+
+    from model_artifacts import load_model_artifact
+
+    model = load_model_artifact()
+    rng = np.random.default_rng(0)
+    X = rng.uniform(1, 300, (500, model.n_features_in_))
+
+    contribs = explain_rows(model, X)
+    diff = np.abs(contribs.sum(axis=1) - model.predict(X)).max()
+    print(f"Katkılar toplamı - tahmin maks. fark: {diff:.2e}")
+
+    # Canlı (derlenmiş orman) ve toplu (XGBoost) yollar aynı satıra aynı katkıları vermeli
+    from tree_inference import CompiledForest, FastPredictor
+    live = FastPredictor(CompiledForest.from_model(model), model)
+    path_diff = np.abs(explain_rows(live, X[:live.max_rows]) - contribs[:live.max_rows]).max()
+    print(f"Canlı/toplu katkı maks. fark: {path_diff:.2e}")
+
+    t0 = time.perf_counter()
+    explain_rows(model, X)
+    batch_ms = (time.perf_counter() - t0) * 1000
+    t0 = time.perf_counter()
+    for row in X[:50]:
+        explain_rows(model, row)
+    single_ms = (time.perf_counter() - t0) * 1000 / 50
+    print(f"500 satır tek çağrı: {batch_ms:.1f} ms | satır başına ayrı çağrı: {single_ms:.2f} ms/satır "
+          f"(500 satır ~{single_ms * 500:.0f} ms)")
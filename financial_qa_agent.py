@@ -5,7 +5,6 @@ Handles natural language financial questions with comprehensive analysis
 """
 
 import os
-import yfinance as yf
 import pandas as pd
 import numpy as np
 from datetime import datetime, timedelta
@@ -18,7 +17,9 @@ except ImportError:
     # Streamlit Cloud'da dotenv yoksa environment variables kullan
     pass
 import logging
-from finta import TA
+from indicators import get_indicators
+from screener import ScreenerError, expression_from_text, screen
+from price_store import get_price_store
 import requests
 import json
 
@@ -38,6 +39,9 @@ class FinancialQAAgent:
             print("⚠️ Financial Q&A Agent - Gemini API anahtarı bulunamadı")
             self.gemini_model = None
         
+        # Yerel fiyat deposu (paylaşımlı, artımlı güncellenir)
+        self.price_store = get_price_store()
+        
         # Logging
         logging.basicConfig(level=logging.INFO)
         self.logger = logging.getLogger(__name__)
@@ -65,6 +69,11 @@ class FinancialQAAgent:
         if any(word in question_lower for word in ['nedir', 'ne demek', 'açıkla', 'anlat', 'eğitim', 'öğren', 'rehber']):
             return 'financial_education'
         
+        # Hisse tarama (ör. "RSI'si 70 üstü hisseler", "tara: RSI > 70 ve close > SMA200")
+        if any(word in question_lower for word in ['hisseler', 'hangi hisse', 'tara', 'listele']) \
+                and expression_from_text(question):
+            return 'stock_screening'
+        
         # Hacim analizi
         if any(word in question_lower for word in ['hacim', 'volume', 'ortalama hacim', 'hacmi nedir']):
             return 'volume_analysis'
@@ -105,8 +114,8 @@ class FinancialQAAgent:
             for variant in symbol_variants:
                 try:
                     self.logger.info(f"Deneniyor: {variant}")
-                    df = yf.download(variant, start_date, end_date, progress=False, timeout=30)
-                    if not df.empty:
+                    df = self.price_store.get_history(variant, start_date, end_date)
+                    if df is not None and not df.empty:
                         self.logger.info(f"Başarılı: {variant} - Veri boyutu: {df.shape}")
                         break
                 except Exception as e:
@@ -117,15 +126,6 @@ class FinancialQAAgent:
                 self.logger.error(f"Hiçbir sembol formatı çalışmadı: {symbol}")
                 return None
             
-            # Sütun isimlerini düzenleme
-            try:
-                df.columns = ['_'.join(col).lower() for col in df.columns]
-                df.columns = [col.split('_')[0] for col in df.columns]
-                self.logger.info(f"Düzenlenmiş sütunlar: {df.columns.tolist()}")
-            except Exception as e:
-                self.logger.error(f"Sütun düzenleme hatası: {e}")
-                return None
-            
             # Gerekli sütunların varlığını kontrol et
             required_columns = ['open', 'high', 'low', 'close', 'volume']
             missing_columns = [col for col in required_columns if col not in df.columns]
@@ -135,51 +135,8 @@ class FinancialQAAgent:
             
             # Teknik indikatörler ekle
             try:
-                # Temel teknik indikatörler
-                df['SMA20'] = TA.SMA(df, 20)
-                df['SMA50'] = TA.SMA(df, 50)
-                df['RSI'] = TA.RSI(df)
-                
-                # Sadece RSI için hacim analizi yapılacaksa diğer indikatörleri atla
-                if 'rsi' in question.lower() if 'question' in locals() else False:
-                    self.logger.info("Sadece RSI hesaplanıyor")
-                    return df
-                
-                # Diğer teknik indikatörler (opsiyonel)
-                try:
-                    df['SMA200'] = TA.SMA(df, 200)
-                except:
-                    df['SMA200'] = np.nan
-                
-                # MACD hesapla
-                try:
-                    macd_data = TA.MACD(df)
-                    df['MACD'] = macd_data['MACD']
-                    df['MACD_SIGNAL'] = macd_data['MACD_SIGNAL']
-                except Exception as e:
-                    self.logger.warning(f"MACD hesaplama hatası: {e}")
-                    df['MACD'] = np.nan
-                    df['MACD_SIGNAL'] = np.nan
-                
-                # Bollinger Bands hesapla
-                try:
-                    bb_data = TA.BBANDS(df)
-                    df['BB_UPPER'] = bb_data['BB_UPPER']
-                    df['BB_LOWER'] = bb_data['BB_LOWER']
-                except Exception as e:
-                    self.logger.warning(f"Bollinger Bands hesaplama hatası: {e}")
-                    df['BB_UPPER'] = np.nan
-                    df['BB_LOWER'] = np.nan
-                
-                try:
-                    df['WILLIAMS_R'] = TA.WILLIAMS(df)
-                except:
-                    df['WILLIAMS_R'] = np.nan
-                
-                try:
-                    df['ATR'] = TA.ATR(df)
-                except:
-                    df['ATR'] = np.nan
+                # Tüm indikatörler tek geçişte (paylaşılan vektörel motor, yeni bar yoksa önbellekten)
+                df = get_indicators(variant, days=days, df=df).rename(columns={'Williams': 'WILLIAMS_R'})
                 
                 self.logger.info(f"Teknik indikatörler eklendi. Final veri boyutu: {df.shape}")
                 
@@ -229,8 +186,8 @@ class FinancialQAAgent:
             for variant in symbol_variants:
                 try:
                     self.logger.info(f"Deneniyor: {variant}")
-                    df = yf.download(variant, start_date, end_date, progress=False, timeout=30)
-                    if not df.empty:
+                    df = self.price_store.get_history(variant, start_date, end_date)
+                    if df is not None and not df.empty:
                         self.logger.info(f"Başarılı: {variant} - Veri boyutu: {df.shape}")
                         break
                 except Exception as e:
@@ -241,15 +198,6 @@ class FinancialQAAgent:
                 self.logger.error(f"Hiçbir sembol formatı çalışmadı: {symbol}")
                 return None
             
-            # Sütun isimlerini düzenleme
-            try:
-                df.columns = ['_'.join(col).lower() for col in df.columns]
-                df.columns = [col.split('_')[0] for col in df.columns]
-                self.logger.info(f"Düzenlenmiş sütunlar: {df.columns.tolist()}")
-            except Exception as e:
-                self.logger.error(f"Sütun düzenleme hatası: {e}")
-                return None
-            
             # Gerekli sütunların varlığını kontrol et
             required_columns = ['open', 'high', 'low', 'close', 'volume']
             missing_columns = [col for col in required_columns if col not in df.columns]
@@ -1008,20 +956,16 @@ Her terim için gerçek örneklerle açıklama alabilirsiniz."""
         try:
             high_rsi_stocks = []
             
-            for symbol in ['KCHOL', 'THYAO', 'GARAN', 'AKBNK', 'ISCTR', 'ASELS', 'EREGL', 'SASA']:
-                df = self.get_stock_data(symbol, days=30)
-                
-                if df is not None and not df.empty:
-                    current_rsi = df['RSI'].iloc[-1]
-                    current_price = df['close'].iloc[-1]
-                    
-                    if current_rsi > threshold:
-                        high_rsi_stocks.append({
-                            'symbol': symbol,
-                            'rsi': round(current_rsi, 2),
-                            'price': round(current_price, 2),
-                            'status': 'Aşırı alım'
-                        })
+            # Tüm BIST evreni için indikatörler tek vektörel geçişte hesaplanır
+            matches = screen(f"RSI > {threshold}", sort_by='RSI', top_k=None)
+            
+            for yf_symbol, row in matches.iterrows():
+                high_rsi_stocks.append({
+                    'symbol': yf_symbol.replace('.IS', ''),
+                    'rsi': round(row['RSI'], 2),
+                    'price': round(row['close'], 2),
+                    'status': 'Aşırı alım'
+                })
             
             return {
                 'threshold': threshold,
@@ -1033,6 +977,36 @@ Her terim için gerçek örneklerle açıklama alabilirsiniz."""
             self.logger.error(f"Çoklu RSI analizi hatası: {e}")
             return None
     
+    def screen_stocks(self, expression, top_k=20):
+        """Tarama ifadesini BIST evreni üzerinde çalıştır (ör. "RSI > 70 and close > SMA200")"""
+        try:
+            matches = screen(expression, top_k=top_k)
+            
+            stocks = []
+            for yf_symbol, row in matches.iterrows():
+                stocks.append({
+                    'symbol': yf_symbol.replace('.IS', ''),
+                    'price': round(row['close'], 2),
+                    'change_pct': round(row['change_pct'], 2) if not pd.isna(row['change_pct']) else None,
+                    'rsi': round(row['RSI'], 2) if not pd.isna(row['RSI']) else None,
+                    'sma200': round(row['SMA200'], 2) if not pd.isna(row['SMA200']) else None,
+                    'volume': int(row['volume']),
+                    'date': str(pd.Timestamp(row['date']).date())
+                })
+            
+            return {
+                'expression': expression,
+                'match_count': len(stocks),
+                'stocks': stocks
+            }
+            
+        except ScreenerError as e:
+            self.logger.warning(f"Geçersiz tarama ifadesi: {e}")
+            return None
+        except Exception as e:
+            self.logger.error(f"Hisse tarama hatası: {e}")
+            return None
+    
     def generate_gemini_response(self, question, analysis_data, question_type):
         """Gemini ile yanıt oluştur"""
         if not self.gemini_model:
@@ -1085,6 +1059,29 @@ YANIT KURALLARI:
 7. Risk uyarısı ekle
 8. Maksimum 4-5 paragraf yaz
 
+Yanıtını ver:
+"""
+            
+            elif question_type == 'stock_screening':
+                prompt = f"""
+Sen profesyonel bir finans analisti olarak hisse tarama sonuçlarını yorumluyorsun.
+
+KULLANICI SORUSU: {question}
+
+TARAMA SONUÇLARI:
+{json.dumps(analysis_data, indent=2, ensure_ascii=False)}
+
+Bu verileri kullanarak kullanıcının sorusunu yanıtla:
+
+YANIT KURALLARI:
+1. Sadece Türkçe yanıt ver
+2. Emoji kullanma
+3. Düzyazı şeklinde yaz
+4. Tarama koşulunu ve eşleşen hisse sayısını belirt
+5. Öne çıkan hisseleri değerleriyle say
+6. Risk uyarısı ekle
+7. Maksimum 3-4 paragraf yaz
+
 Yanıtını ver:
 """
             
@@ -1188,6 +1185,22 @@ Düşen Hisseler:
 
 Analiz: BIST 100 endeksinin günlük performansı ve düşen hisseler listelendi.
 
+Risk Uyarısı: Bu analiz sadece bilgilendirme amaçlıdır. Yatırım kararı vermeden önce profesyonel danışmanlık alın."""
+            
+            elif question_type == 'stock_screening' and analysis_data:
+                stocks = analysis_data.get('stocks', [])
+                if stocks:
+                    stock_list = chr(10).join([f"• {stock['symbol']}: {stock['price']} TL, RSI {stock['rsi']}" for stock in stocks])
+                else:
+                    stock_list = "Koşulu sağlayan hisse bulunamadı."
+                return f"""Hisse Tarama Sonuçları
+
+Koşul: {analysis_data.get('expression', '')}
+Eşleşen hisse sayısı: {analysis_data.get('match_count', 0)}
+
+Hisseler:
+{stock_list}
+
 Risk Uyarısı: Bu analiz sadece bilgilendirme amaçlıdır. Yatırım kararı vermeden önce profesyonel danışmanlık alın."""
             
             elif question_type == 'technical_analysis' and analysis_data:
@@ -1313,6 +1326,15 @@ Risk Uyarısı: Bu analiz sadece bilgilendirme amaçlıdır. Yatırım kararı v
                 else:
                     response = "BIST 100 endeksi verisi bulunamadı."
             
+            elif question_type == 'stock_screening':
+                # Evren taraması
+                expression = expression_from_text(question)
+                analysis_data = self.screen_stocks(expression)
+                if analysis_data:
+                    response = self.generate_gemini_response(question, analysis_data, question_type)
+                else:
+                    response = f"Tarama yapılamadı: {expression}"
+            
             elif question_type == 'technical_analysis':
                 # Teknik indikatör analizi
                 if 'rsi' in question.lower() and '70' in question:
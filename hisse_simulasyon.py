@@ -1,8 +1,9 @@
 # hisse_simulasyon.py
 
-import yfinance as yf
+import math
 from datetime import datetime
-import dateparser
+from investment_simulator import load_price_arrays, simulate_arrays
+from turkish_dates import parse_turkish_date
 
 def hisse_simulasyon(hisse_kodu: str, baslangic_input: str, yatirim_tutari: float):
     try:
@@ -10,36 +11,30 @@ def hisse_simulasyon(hisse_kodu: str, baslangic_input: str, yatirim_tutari: floa
         if not hisse_kodu.endswith('.IS') and len(hisse_kodu) <= 6:
             hisse_kodu = f"{hisse_kodu}.IS"
         
-        # 2. Doğal dil tarihini datetime objesine çevir
-        baslangic_tarihi = dateparser.parse(baslangic_input)
+        # 2. Doğal dil tarihini datetime objesine çevir (yaygın Türkçe ifadeler dateparser'sız)
+        baslangic_tarihi = parse_turkish_date(baslangic_input)
         if not baslangic_tarihi:
             return {"hata": f"Başlangıç tarihi anlaşılamadı: {baslangic_input}"}
 
         baslangic_str = baslangic_tarihi.strftime("%Y-%m-%d")
-        bugun = datetime.now().strftime("%Y-%m-%d")
 
-        # 3. Veri çek - farklı formatları dene
-        df = None
-        symbol_variants = [hisse_kodu, hisse_kodu.replace('.IS', ''), f"{hisse_kodu.replace('.IS', '')}.IS"]
-        
-        for variant in symbol_variants:
-            try:
-                df = yf.download(variant, start=baslangic_str, end=bugun, progress=False)
-                if not df.empty and len(df) >= 2:
-                    break
-            except:
-                continue
+        # 3. Önbellekteki fiyat dizileri (yerel fiyat deposu) üzerinde tek senaryo
+        yil = max(1, math.ceil((datetime.now() - baslangic_tarihi).days / 365))
+        arrays = load_price_arrays([hisse_kodu], years=yil)
+        sonuc = simulate_arrays(arrays, start_dates=[baslangic_str], amounts=[yatirim_tutari],
+                                strategies=['lump_sum_reinvested'])
 
-        if df.empty or len(df) < 2:
+        if len(sonuc.start_dates) == 0 or math.isnan(sonuc.multiple[0, 0, 0]):
             return {"hata": f"{hisse_kodu} için yeterli veri bulunamadı."}
 
-        # 3. İlk ve son fiyatı al
-        ilk_gun_fiyati = df['Close'].iloc[0].item()
-        son_fiyat = df['Close'].iloc[-1].item()
+        # 4. İlk ve son fiyat (temettü/bölünme düzeltilmiş)
+        giris = arrays['dates'].get_loc(sonuc.start_dates[0])
+        ilk_gun_fiyati = float(arrays['adj_close'][giris, 0])
+        son_fiyat = float(arrays['adj_close'][-1, 0])
 
-        # 4. Hesaplamalar
+        # 5. Hesaplamalar
         lot_sayisi = yatirim_tutari / ilk_gun_fiyati
-        simdiki_deger = lot_sayisi * son_fiyat
+        simdiki_deger = float(sonuc.values()[0, 0, 0, 0])
         kazanc = simdiki_deger - yatirim_tutari
         yuzde_getiri = (kazanc / yatirim_tutari) * 100
 
@@ -0,0 +1,404 @@
+# indicators.py
+# NumPy ile vektörleştirilmiş teknik indikatörler (finta ile aynı formüller)
+#
+# Tüm fonksiyonlar 1 boyutlu (zaman) ya da 2 boyutlu (zaman x sembol) dizilerle
+# çalışır; hesaplama her zaman 0. eksen (zaman) boyuncadır. Böylece tek sembol
+# için de, tüm evren için de aynı kod tek geçişte çalışır.
+
+import threading
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+from scipy.signal import lfilter
+
+from price_store import load_ohlcv
+from streaming_indicators import StreamingIndicatorSet
+
+# add_indicators() tarafından eklenen sütunlar
+INDICATOR_COLUMNS = [
+    'SMA20', 'SMA50', 'SMA200', 'RSI', 'MACD', 'MACD_SIGNAL', 'MACD_HIST',
+    'BB_UPPER', 'BB_MIDDLE', 'BB_LOWER', 'BBWidth', 'ATR', 'Williams', 'AVGVOL20'
+]
+
+
+def _as_float(x) -> np.ndarray:
+    return np.asarray(x, dtype=float)
+
+
+def _shift(x: np.ndarray, periods: int = 1) -> np.ndarray:
+    """pandas shift() karşılığı (baştaki değerler NaN)"""
+    out = np.full_like(x, np.nan)
+    out[periods:] = x[:-periods]
+    return out
+
+
+def _iir(x: np.ndarray, decay: float) -> np.ndarray:
+    """y_t = x_t + decay * y_{t-1} (0. eksen boyunca, bellekte bitişik eksende filtrelenir)"""
+    if x.ndim == 1:
+        return lfilter([1.0], [1.0, -decay], x)
+    return lfilter([1.0], [1.0, -decay], np.ascontiguousarray(x.T), axis=-1).T
+
+
+def ema(x, span: Optional[float] = None, alpha: Optional[float] = None) -> np.ndarray:
+    """Üstel hareketli ortalama - pandas ewm(adjust=True, ignore_na=False).mean() ile aynı.
+
+    y_t = Σ w_i x_i / Σ w_i, w_i = (1 - alpha)^(t - i). Pay ve payda birinci
+    dereceden IIR filtre ile tek geçişte hesaplanır; NaN gözlemler ağırlık almaz
+    ama zaman içinde sönümlenme devam eder (ignore_na=False davranışı).
+    """
+    x = _as_float(x)
+    if alpha is None:
+        alpha = 2.0 / (span + 1.0)
+    decay = 1.0 - alpha
+
+    valid = ~np.isnan(x)
+    num = _iir(np.where(valid, x, 0.0), decay)
+    if valid.all():
+        # NaN yoksa payda tüm sütunlarda aynı: 1 + d + d^2 + ... (tek seferlik 1B hesap)
+        den = _iir(np.ones(len(x)), decay)
+        den = den.reshape((-1,) + (1,) * (x.ndim - 1))
+    else:
+        den = _iir(valid.astype(float), decay)
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        out = num / den
+    out[np.broadcast_to(den == 0, out.shape)] = np.nan
+    return out
+
+
+def _rolling_sum(x: np.ndarray, period: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Pencere toplamı ve penceredeki geçerli gözlem sayısı (kümülatif toplam farkı)"""
+    valid = ~np.isnan(x)
+    has_nan = not valid.all()
+    zero = np.zeros((1,) + x.shape[1:])
+    csum = np.concatenate([zero, np.cumsum(np.where(valid, x, 0.0) if has_nan else x, axis=0)])
+
+    total = np.full_like(x, np.nan)
+    count = np.zeros_like(x)
+    if len(x) >= period:
+        total[period - 1:] = csum[period:] - csum[:-period]
+        if has_nan:
+            ccount = np.concatenate([zero, np.cumsum(valid, axis=0)])
+            count[period - 1:] = ccount[period:] - ccount[:-period]
+        else:
+            count[period - 1:] = period
+    return total, count
+
+
+def _first_valid(x: np.ndarray) -> np.ndarray:
+    """Her sütunun ilk geçerli değeri (kümülatif toplamlarda sayısal hatayı azaltmak için)"""
+    valid = ~np.isnan(x)
+    idx = valid.argmax(axis=0)
+    first = np.take_along_axis(x, np.expand_dims(idx, 0), axis=0)[0] if x.ndim > 1 else x[idx]
+    return np.where(np.isnan(first), 0.0, first)
+
+
+def sma(x, period: int) -> np.ndarray:
+    """Basit hareketli ortalama - rolling(window=period).mean()"""
+    x = _as_float(x)
+    shift = _first_valid(x)
+    total, count = _rolling_sum(x - shift, period)
+    out = total / period + shift
+    out[count < period] = np.nan
+    return out
+
+
+def rolling_std(x, period: int, ddof: int = 1) -> np.ndarray:
+    """Hareketli standart sapma - rolling(window=period).std()"""
+    x = _as_float(x)
+    centered = x - _first_valid(x)
+    total, count = _rolling_sum(centered, period)
+    total_sq, _ = _rolling_sum(centered * centered, period)
+
+    var = (total_sq - total * total / period) / (period - ddof)
+    out = np.sqrt(np.maximum(var, 0.0))
+    out[count < period] = np.nan
+    return out
+
+
+def rolling_max(x, period: int) -> np.ndarray:
+    """Hareketli maksimum - rolling(window=period).max()"""
+    x = _as_float(x)
+    out = np.full_like(x, np.nan)
+    if len(x) >= period:
+        out[period - 1:] = sliding_window_view(x, period, axis=0).max(axis=-1)
+    return out
+
+
+def rolling_min(x, period: int) -> np.ndarray:
+    """Hareketli minimum - rolling(window=period).min()"""
+    x = _as_float(x)
+    out = np.full_like(x, np.nan)
+    if len(x) >= period:
+        out[period - 1:] = sliding_window_view(x, period, axis=0).min(axis=-1)
+    return out
+
+
+def rsi(close, period: int = 14) -> np.ndarray:
+    """RSI - finta TA.RSI ile aynı (alpha=1/period, adjust=True)"""
+    close = _as_float(close)
+    delta = close - _shift(close)
+    gain = np.where(delta > 0, delta, np.where(np.isnan(delta), np.nan, 0.0))
+    loss = np.where(delta < 0, -delta, np.where(np.isnan(delta), np.nan, 0.0))
+
+    avg_gain = ema(gain, alpha=1.0 / period)
+    avg_loss = ema(loss, alpha=1.0 / period)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return 100 - (100 / (1 + avg_gain / avg_loss))
+
+
+def macd(close, period_fast: int = 12, period_slow: int = 26, signal: int = 9) -> Tuple[np.ndarray, np.ndarray]:
+    """MACD ve sinyal çizgisi - finta TA.MACD ile aynı"""
+    close = _as_float(close)
+    macd_line = ema(close, span=period_fast) - ema(close, span=period_slow)
+    return macd_line, ema(macd_line, span=signal)
+
+
+def bbands(close, period: int = 20, std_multiplier: float = 2) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Bollinger bantları (üst, orta, alt) - finta TA.BBANDS ile aynı"""
+    middle = sma(close, period)
+    std = rolling_std(close, period)
+    return middle + std_multiplier * std, middle, middle - std_multiplier * std
+
+
+def true_range(high, low, close) -> np.ndarray:
+    """Gerçek aralık - finta TA.TR ile aynı (ilk bar: high - low)"""
+    high, low, close = _as_float(high), _as_float(low), _as_float(close)
+    prev_close = _shift(close)
+    ranges = np.stack([np.abs(high - low), np.abs(high - prev_close), np.abs(prev_close - low)])
+    with np.errstate(invalid='ignore'):
+        return np.fmax(np.fmax(ranges[0], ranges[1]), ranges[2])
+
+
+def atr(high, low, close, period: int = 14) -> np.ndarray:
+    """Ortalama gerçek aralık - finta TA.ATR ile aynı (TR'nin basit ortalaması)"""
+    return sma(true_range(high, low, close), period)
+
+
+def williams(high, low, close, period: int = 14) -> np.ndarray:
+    """Williams %R - finta TA.WILLIAMS ile aynı"""
+    highest_high = rolling_max(high, period)
+    lowest_low = rolling_min(low, period)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return (highest_high - _as_float(close)) / (highest_high - lowest_low) * -100
+
+
+def compute_indicators(close, high=None, low=None, volume=None) -> Dict[str, np.ndarray]:
+    """Tüm indikatör setini tek seferde hesapla (1B ya da zaman x sembol dizileri)"""
+    close = _as_float(close)
+    result = {
+        'SMA20': sma(close, 20),
+        'SMA50': sma(close, 50),
+        'SMA200': sma(close, 200),
+        'RSI': rsi(close)
+    }
+
+    macd_line, macd_signal = macd(close)
+    result['MACD'] = macd_line
+    result['MACD_SIGNAL'] = macd_signal
+    result['MACD_HIST'] = macd_line - macd_signal
+
+    upper, middle, lower = bbands(close)
+    result['BB_UPPER'] = upper
+    result['BB_MIDDLE'] = middle
+    result['BB_LOWER'] = lower
+    with np.errstate(invalid='ignore', divide='ignore'):
+        result['BBWidth'] = (upper - lower) / middle
+
+    if high is not None and low is not None:
+        result['ATR'] = atr(high, low, close)
+        result['Williams'] = williams(high, low, close)
+    if volume is not None:
+        result['AVGVOL20'] = sma(volume, 20)
+    return result
+
+
+def add_indicators(df: pd.DataFrame) -> pd.DataFrame:
+    """OHLCV DataFrame'ine (küçük harf sütunlar) INDICATOR_COLUMNS sütunlarını ekle"""
+    df = df.copy()
+    values = compute_indicators(
+        df['close'].to_numpy(float),
+        high=df['high'].to_numpy(float),
+        low=df['low'].to_numpy(float),
+        volume=df['volume'].to_numpy(float) if 'volume' in df.columns else None
+    )
+    for name, column in values.items():
+        df[name] = column
+    return df
+
+
+# Bu sayıdan fazla yeni bar gelirse tablo artımlı değil baştan hesaplanır
+INCREMENTAL_MAX_BARS = 5
+
+
+class IndicatorCache:
+    """(sembol, pencere, son bar) bazında hesaplanmış indikatör tabloları.
+
+    Yeni bar gelmedikçe aynı sembol için indikatörler yeniden hesaplanmaz;
+    tüm ajanlar aynı tabloyu paylaşır. Yeni bar eklendiğinde ya da son bar
+    (gün içi) düzeltildiğinde, önceki barlar değişmediyse tablo akış
+    indikatörleriyle (streaming_indicators) bar başına sabit sürede uzatılır.
+    """
+
+    def __init__(self, max_entries: int = 256):
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._frames: "OrderedDict[Tuple, pd.DataFrame]" = OrderedDict()
+        self._streams: Dict[Tuple, StreamingIndicatorSet] = {}
+        self.hits = 0
+        self.misses = 0
+        self.incremental = 0
+
+    @staticmethod
+    def _bar_key(symbol: str, days: int, df: pd.DataFrame) -> Tuple:
+        last = df.iloc[-1]
+        return (symbol.upper(), days, len(df), df.index[-1], float(last['close']), float(last['volume']))
+
+    @staticmethod
+    def _extend(symbol: str, frame: pd.DataFrame, stream: Optional[StreamingIndicatorSet],
+                df: pd.DataFrame) -> Tuple[Optional[pd.DataFrame], Optional[StreamingIndicatorSet]]:
+        """Önceki tabloyu yeni/düzeltilmiş son barlarla uzat; mümkün değilse (None, None)"""
+        n_base = len(df.columns)
+        last_old = frame.index[-1]
+        # df'te önceki son bardan eski satırlar aynen korunur, kalanlar akıtılır
+        n_kept = int(df.index.searchsorted(last_old))
+        n_new = len(df) - n_kept
+        if not 0 < n_new <= INCREMENTAL_MAX_BARS or n_kept >= len(frame) or \
+                list(frame.columns[:n_base]) != list(df.columns):
+            return None, None
+
+        # Eski barlar değiştiyse (düzeltilmiş fiyat, temettü/bölünme) baştan hesaplanmalı
+        kept = slice(len(frame) - 1 - n_kept, len(frame) - 1)
+        frame_values = frame.to_numpy(float)
+        df_values = df.to_numpy(float)
+        if not frame.index[kept].equals(df.index[:n_kept]) or \
+                not np.allclose(frame_values[kept, :n_base], df_values[:n_kept], equal_nan=True):
+            return None, None
+
+        # Akış durumu ilk artımlı güncellemede önceki tablonun barlarından ısıtılır
+        if stream is None:
+            stream = StreamingIndicatorSet.from_history(symbol, frame)
+        if stream.last_date != str(pd.Timestamp(last_old)):
+            return None, None
+
+        names = list(frame.columns[n_base:])
+        added = np.empty((n_new, len(frame.columns)))
+        added[:, :n_base] = df_values[n_kept:]
+        for i, day in enumerate(df.index[n_kept:]):
+            values = stream.update(dict(zip(df.columns, df_values[n_kept + i])), day)
+            added[i, n_base:] = [values[name] for name in names]
+
+        extended = pd.DataFrame(np.vstack([frame_values[kept], added]), index=df.index, columns=frame.columns)
+        return extended, stream
+
+    def get(self, symbol: str, days: int, df: pd.DataFrame) -> pd.DataFrame:
+        """df için indikatör tablosunu önbellekten al, yoksa (artımlı ya da baştan) hesapla"""
+        key = self._bar_key(symbol, days, df)
+        with self._lock:
+            frame = self._frames.get(key)
+            if frame is not None:
+                self._frames.move_to_end(key)
+                self.hits += 1
+                return frame.copy()
+            previous = next((f for k, f in self._frames.items() if k[:2] == key[:2]), None)
+            # Akış durumu bu çağrıya devredilir (eşzamanlı çağrılar aynı durumu güncellemez)
+            stream = self._streams.pop(key[:2], None)
+
+        frame = None
+        if previous is not None:
+            try:
+                frame, stream = self._extend(symbol, previous, stream, df)
+            except Exception as e:
+                print(f"Artımlı indikatör güncellemesi başarısız ({symbol}): {e}")
+                frame, stream = None, None
+        incremental = frame is not None
+        if frame is None:
+            frame = add_indicators(df)
+
+        with self._lock:
+            if incremental:
+                self.incremental += 1
+            else:
+                self.misses += 1
+            # Aynı sembol/pencerenin eski son bar kayıtlarını at
+            for old_key in [k for k in self._frames if k[:2] == key[:2]]:
+                del self._frames[old_key]
+            self._frames[key] = frame
+            if stream is not None:
+                self._streams[key[:2]] = stream
+            while len(self._frames) > self.max_entries:
+                old_key, _ = self._frames.popitem(last=False)
+                self._streams.pop(old_key[:2], None)
+        return frame.copy()
+
+    def clear(self):
+        with self._lock:
+            self._frames.clear()
+            self._streams.clear()
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {'hits': self.hits, 'misses': self.misses, 'incremental': self.incremental,
+                    'entries': len(self._frames)}
+
+
+# Süreç genelinde paylaşılan indikatör önbelleği
+indicator_cache = IndicatorCache()
+
+
+def get_indicators(symbol: str, days: int = 300, df: Optional[pd.DataFrame] = None) -> Optional[pd.DataFrame]:
+    """Sembolün son `days` günlük OHLCV verisi + tüm indikatörler (paylaşılan önbellekten)"""
+    if df is None:
+        df = load_ohlcv(symbol, days=days)
+    if df is None or df.empty:
+        return None
+    return indicator_cache.get(symbol, days, df)
+
+
+if __name__ == "__main__":
+    import time
+    from finta import TA
+
+    # 500 sembol x 5 yıllık günlük bar ile finta karşılaştırması
+    n_days, n_symbols = 1260, 500
+    rng = np.random.default_rng(42)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.02, (n_days, n_symbols)), axis=0))
+    high = close * (1 + rng.uniform(0, 0.02, close.shape))
+    low = close * (1 - rng.uniform(0, 0.02, close.shape))
+    volume = rng.uniform(1e5, 1e7, close.shape)
+    index = pd.bdate_range('2020-01-01', periods=n_days)
+
+    frames = [
+        pd.DataFrame({'open': close[:, i], 'high': high[:, i], 'low': low[:, i],
+                      'close': close[:, i], 'volume': volume[:, i]}, index=index)
+        for i in range(n_symbols)
+    ]
+
+    t0 = time.perf_counter()
+    finta_results = []
+    for df in frames:
+        macd_df = TA.MACD(df)
+        bb_df = TA.BBANDS(df)
+        finta_results.append({
+            'SMA200': TA.SMA(df, 200).values, 'RSI': TA.RSI(df).values,
+            'MACD': macd_df['MACD'].values, 'MACD_SIGNAL': macd_df['SIGNAL'].values,
+            'BB_UPPER': bb_df['BB_UPPER'].values, 'BBWidth': TA.BBWIDTH(df).values,
+            'ATR': TA.ATR(df).values, 'Williams': TA.WILLIAMS(df).values
+        })
+    finta_time = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    result = compute_indicators(close, high, low, volume)
+    numpy_time = time.perf_counter() - t0
+
+    print(f"finta (sembol başına döngü): {finta_time:.2f}s")
+    print(f"NumPy (tek geçiş, {n_symbols} sembol): {numpy_time:.3f}s  -> {finta_time / numpy_time:.0f}x")
+
+    for name in finta_results[0]:
+        expected = np.column_stack([r[name] for r in finta_results])
+        diff = np.nanmax(np.abs(result[name] - expected))
+        same_nan = np.array_equal(np.isnan(result[name]), np.isnan(expected))
+        print(f"  {name:12s} maks. fark: {diff:.2e}  NaN konumları aynı: {same_nan}")
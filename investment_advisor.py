@@ -1,7 +1,6 @@
 # investment_advisor.py
 # Kullanıcı Risk Profili ve Kişiselleştirilmiş Yatırım Önerileri
 
-import yfinance as yf
 import pandas as pd
 import numpy as np
 from datetime import datetime, timedelta
@@ -15,7 +14,8 @@ except ImportError:
     # Streamlit Cloud'da dotenv yoksa environment variables kullan
     pass
 import google.generativeai as genai
-from finta import TA
+from indicators import get_indicators
+from price_store import get_price_store, load_ohlcv
 
 
 # Configure Gemini API
@@ -81,22 +81,14 @@ class InvestmentAdvisor:
     def get_stock_data(self, symbol, days=60):
         """Hisse verisi al"""
         try:
-            end_date = datetime.now()
-            start_date = end_date - timedelta(days=days)
+            # Yerel fiyat deposundan al
+            df = load_ohlcv(symbol, days=days)
             
-            df = yf.download(symbol, start=start_date, end=end_date, progress=False)
-            
-            if df.empty:
+            if df is None or df.empty:
                 return None
             
-            # Sütun isimlerini düzenle
-            df.columns = ['_'.join(col).lower() for col in df.columns]
-            df.columns = [col.split('_')[0] for col in df.columns]
-            
-            # Teknik indikatörler
-            df['RSI'] = TA.RSI(df)
-            df['SMA20'] = TA.SMA(df, 20)
-            df['SMA50'] = TA.SMA(df, 50)
+            # Teknik indikatörler (paylaşılan vektörel motor)
+            df = get_indicators(symbol, days=days, df=df)
             
             # Volatilite hesapla
             df['returns'] = df['close'].pct_change()
@@ -180,6 +172,12 @@ class InvestmentAdvisor:
         else:  # moderate
             target_stocks = ['KCHOL.IS', 'GARAN.IS', 'THYAO.IS', 'ASELS.IS', 'SASA.IS']
         
+        # Tüm hedef hisseleri tek toplu indirmeyle depoya al
+        try:
+            get_price_store().ensure_many(target_stocks, (datetime.now() - timedelta(days=60)).date())
+        except Exception as e:
+            print(f"Toplu veri alma hatası: {e}")
+        
         for symbol in target_stocks:
             try:
                 analysis = self.analyze_stock_for_profile(symbol, risk_profile)
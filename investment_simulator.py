@@ -0,0 +1,222 @@
+# investment_simulator.py
+# Önbelleğe alınmış fiyat dizileri üzerinde çok senaryolu yatırım simülasyonu:
+# birçok başlangıç tarihi x sembol x tutar x strateji (tek seferlik, aylık düzenli
+# alım, temettüler yeniden yatırılarak) tek vektörel geçişte hesaplanır.
+#
+# Örnek: "son 5 yılda 6 ay tutulan her olası giriş" dağılımı
+#   simulate(['THYAO', 'GARAN'], horizon_months=6, years=5).summary()
+
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from price_store import PriceStore, get_price_store
+from universe import build_matrices, forward_fill, to_yahoo_symbol
+
+# lump_sum: tek seferlik alım (fiyat getirisi), dca: tutar aylık eşit taksitlerle yatırılır,
+# *_reinvested: temettüler yeniden yatırılmış (düzeltilmiş kapanış, toplam getiri)
+STRATEGIES = ['lump_sum', 'dca', 'lump_sum_reinvested', 'dca_reinvested']
+
+STRATEGY_LABELS = {
+    'lump_sum': 'Tek seferlik alım',
+    'dca': 'Aylık düzenli alım',
+    'lump_sum_reinvested': 'Tek seferlik (temettü yeniden yatırılarak)',
+    'dca_reinvested': 'Aylık düzenli (temettü yeniden yatırılarak)',
+}
+
+DEFAULT_YEARS = 5
+PERCENTILES = [5, 25, 50, 75, 95]
+
+
+_arrays_cache: Dict = {}
+_arrays_lock = threading.Lock()
+
+
+def load_price_arrays(symbols: List[str], years: int = DEFAULT_YEARS, refresh: bool = True,
+                      store: Optional[PriceStore] = None, max_age_seconds: int = 60) -> Dict:
+    """Sembollerin fiyat (close) ve toplam getiri (adj_close) matrisleri, ileri doldurulmuş.
+
+    Sonuç süreç içinde kısa süre önbelleğe alınır; depo zaten yereldir, ağa yalnızca
+    eksik günler için çıkılır.
+    """
+    yahoo_symbols = [to_yahoo_symbol(s) for s in symbols]
+    key = (tuple(yahoo_symbols), years, id(store))
+    with _arrays_lock:
+        cached = _arrays_cache.get(key)
+        if cached is not None and time.time() - cached[0] < max_age_seconds:
+            return cached[1]
+
+    store = store or get_price_store()
+    start = (datetime.now() - timedelta(days=365 * years + 31)).date()
+    if refresh:
+        try:
+            store.ensure_many(yahoo_symbols, start)
+        except Exception as e:
+            print(f"Fiyat güncelleme hatası: {e}")
+
+    matrices = build_matrices(store.read_many(yahoo_symbols, start), yahoo_symbols, fields=['close', 'adj_close'])
+    arrays = {
+        'symbols': [s.replace('.IS', '') for s in yahoo_symbols],
+        'dates': matrices['dates'],
+        'close': forward_fill(matrices['close']),
+        'adj_close': forward_fill(matrices['adj_close']),
+    }
+    with _arrays_lock:
+        _arrays_cache[key] = (time.time(), arrays)
+    return arrays
+
+
+@dataclass
+class SimulationResult:
+    symbols: List[str]
+    strategies: List[str]
+    start_dates: pd.DatetimeIndex
+    end_dates: pd.DatetimeIndex
+    amounts: np.ndarray
+    multiple: np.ndarray       # (strateji, başlangıç, sembol): son değer / yatırılan tutar
+    entry_price: np.ndarray    # (başlangıç, sembol): ilk alım fiyatı (fiyat serisi)
+    final_price: np.ndarray    # (başlangıç, sembol): son fiyat (fiyat serisi)
+
+    def values(self) -> np.ndarray:
+        """(strateji, başlangıç, sembol, tutar) son değerler (TL)"""
+        return self.multiple[..., None] * self.amounts
+
+    def returns_pct(self) -> np.ndarray:
+        return (self.multiple - 1) * 100
+
+    def summary(self) -> pd.DataFrame:
+        """Sembol x strateji bazında getiri dağılımı (%) ve zarar olasılığı"""
+        returns = self.returns_pct()
+        with np.errstate(invalid='ignore'):
+            percentiles = np.nanpercentile(returns, PERCENTILES, axis=1)   # (p, strateji, sembol)
+            mean = np.nanmean(returns, axis=1)
+            loss = np.nansum(returns < 0, axis=1) / np.maximum(np.sum(~np.isnan(returns), axis=1), 1) * 100
+        count = np.sum(~np.isnan(returns), axis=1)
+
+        index = pd.MultiIndex.from_product([self.strategies, self.symbols], names=['strategy', 'symbol'])
+        data = {'n': count.ravel(), 'mean_pct': mean.ravel(), 'loss_prob_pct': loss.ravel()}
+        for p, values in zip(PERCENTILES, percentiles):
+            data[f'p{p}_pct'] = values.ravel()
+        return pd.DataFrame(data, index=index).swaplevel().sort_index()
+
+
+def simulate_arrays(arrays: Dict, start_dates=None, horizon_months: Optional[int] = None,
+                    amounts: Sequence[float] = (10000.0,), strategies: Sequence[str] = STRATEGIES) -> SimulationResult:
+    """Fiyat dizileri üzerinde tüm senaryoları tek geçişte hesapla.
+
+    start_dates None ise dizideki her işlem günü (ufuk sığıyorsa) başlangıç kabul edilir.
+    horizon_months None ise pozisyon bugüne kadar tutulur. Aylık düzenli alımda tutar,
+    başlangıçtan itibaren her ay dönümündeki ilk işlem gününde eşit taksitlerle yatırılır.
+    """
+    dates = pd.DatetimeIndex(arrays['dates'])
+    if len(dates) == 0:
+        raise ValueError("Fiyat verisi yok")
+    unknown = set(strategies) - set(STRATEGIES)
+    if unknown:
+        raise ValueError(f"Bilinmeyen strateji: {sorted(unknown)}")
+
+    last = len(dates) - 1
+    if start_dates is None:
+        start_idx = np.arange(len(dates))
+    else:
+        start_idx = dates.searchsorted(pd.DatetimeIndex(pd.to_datetime(start_dates)))
+
+    # Bitiş: ufuk sonrasındaki ilk işlem günü ya da son gün; ufku sığmayan başlangıçlar atılır
+    if horizon_months:
+        horizon_end = dates[np.minimum(start_idx, last)] + pd.DateOffset(months=horizon_months)
+        end_idx = dates.searchsorted(horizon_end)
+        keep = (start_idx <= last) & (end_idx <= last)
+    else:
+        end_idx = np.full(len(start_idx), last)
+        keep = start_idx < last
+    start_idx, end_idx = start_idx[keep], end_idx[keep]
+
+    n_months = horizon_months or int(np.ceil((dates[-1] - dates[0]).days / 30.4)) + 1
+    # Taksit günleri: (başlangıç, ay) -> ay dönümündeki ilk işlem günü
+    month_idx = np.stack([dates.searchsorted(dates[start_idx] + pd.DateOffset(months=m))
+                          for m in range(n_months)], axis=1) if len(start_idx) else np.zeros((0, n_months), int)
+    installment = month_idx <= end_idx[:, None]
+    if horizon_months:
+        installment &= np.arange(n_months) < horizon_months
+    n_installments = installment.sum(axis=1)
+    month_idx = np.minimum(month_idx, last)
+
+    multiple = np.full((len(strategies), len(start_idx), len(arrays['symbols'])), np.nan)
+    for i, strategy in enumerate(strategies):
+        prices = arrays['adj_close' if strategy.endswith('_reinvested') else 'close']
+        final = prices[end_idx]
+        if strategy.startswith('lump_sum'):
+            multiple[i] = final / prices[start_idx]
+        else:
+            # Her taksitte alınan pay: (1 / n) / fiyat; toplam pay x son fiyat
+            with np.errstate(divide='ignore', invalid='ignore'):
+                units = np.where(installment[..., None], 1.0 / prices[month_idx], 0.0).sum(axis=1)
+            multiple[i] = units / n_installments[:, None] * final
+
+    return SimulationResult(
+        symbols=list(arrays['symbols']),
+        strategies=list(strategies),
+        start_dates=dates[start_idx],
+        end_dates=dates[end_idx],
+        amounts=np.asarray(amounts, dtype=float),
+        multiple=multiple,
+        entry_price=arrays['close'][start_idx],
+        final_price=arrays['close'][end_idx],
+    )
+
+
+def simulate(symbols: List[str], start_dates=None, horizon_months: Optional[int] = None,
+             amounts: Sequence[float] = (10000.0,), strategies: Sequence[str] = STRATEGIES,
+             years: int = DEFAULT_YEARS, store: Optional[PriceStore] = None) -> SimulationResult:
+    """Depodaki fiyatlarla simülasyon (bkz. simulate_arrays)"""
+    arrays = load_price_arrays(symbols, years=years, store=store)
+    return simulate_arrays(arrays, start_dates, horizon_months, amounts, strategies)
+
+
+def entry_distribution(symbol: str, horizon_months: int = 6, years: int = DEFAULT_YEARS,
+                       strategy: str = 'lump_sum_reinvested') -> Optional[Dict]:
+    """Son `years` yılda herhangi bir günde girilip `horizon_months` ay tutulsaydı getiri dağılımı"""
+    try:
+        result = simulate([symbol], horizon_months=horizon_months, years=years, strategies=[strategy])
+        row = result.summary().iloc[0]
+        if row['n'] == 0:
+            return None
+        return {
+            'n': int(row['n']),
+            'median_pct': float(row['p50_pct']),
+            'p5_pct': float(row['p5_pct']),
+            'p95_pct': float(row['p95_pct']),
+            'loss_prob_pct': float(row['loss_prob_pct']),
+        }
+    except Exception as e:
+        print(f"Getiri dağılımı hesaplanamadı ({symbol}): {e}")
+        return None
+
+
+if __name__ == "__main__":
+    # Sentetik 24 sembol x 5 yıl: her olası 6 aylık giriş, 3 tutar, 4 strateji
+    rng = np.random.default_rng(0)
+    dates = pd.bdate_range(end=datetime.now(), periods=5 * 252)
+    n_symbols = 24
+    close = 100 * np.exp(np.cumsum(rng.normal(0.0003, 0.02, (len(dates), n_symbols)), axis=0))
+    dividend_factor = np.exp(np.cumsum(np.where(rng.random(close.shape) < 0.004, 0.03, 0.0), axis=0))
+    arrays = {'symbols': [f"SYM{i}" for i in range(n_symbols)], 'dates': dates,
+              'close': close, 'adj_close': close * dividend_factor}
+
+    t0 = time.perf_counter()
+    result = simulate_arrays(arrays, horizon_months=6, amounts=[5000, 10000, 50000])
+    elapsed = (time.perf_counter() - t0) * 1000
+    scenarios = result.multiple.size * len(result.amounts)
+    print(f"{scenarios:,} senaryo ({len(result.start_dates)} başlangıç x {n_symbols} sembol x 3 tutar x "
+          f"{len(STRATEGIES)} strateji): {elapsed:.1f} ms")
+    print(result.summary().loc['SYM0'].round(2).to_string())
+
+    # Tek başlangıç, bugüne kadar: döngüyle hesaplanan değerle karşılaştır
+    single = simulate_arrays(arrays, start_dates=[dates[100]], strategies=['lump_sum'])
+    expected = close[-1, 0] / close[100, 0]
+    print(f"Tek seferlik SYM0 çarpanı: {single.multiple[0, 0, 0]:.6f} / beklenen {expected:.6f}")
@@ -0,0 +1,215 @@
+# model_artifacts.py
+# XGBoost modelini pickle yerine yerel (native) UBJ/JSON formatında saklama, hızlı yükleme
+# ve süreç başına sıcak, thread-safe tahminci havuzu
+#
+# Kullanım:
+#   python model_artifacts.py convert                 -> model/kchol_xgb_model.ubj ve .json üret
+#   python model_artifacts.py benchmark               -> pickle / UBJ / JSON yükleme sürelerini karşılaştır
+
+import hashlib
+import os
+import pickle
+import queue
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Optional
+
+import numpy as np
+import xgboost as xgb
+
+DEFAULT_PICKLE_PATH = 'model/kchol_xgb_model.pkl'
+NATIVE_FORMATS = ('.ubj', '.json')
+
+# Tahmin thread sayısı (Streamlit her oturum için ayrı thread açtığından küçük tutulur)
+MODEL_NTHREAD = int(os.getenv('MODEL_NTHREAD', str(min(4, os.cpu_count() or 1))))
+
+
+def native_path(pickle_path: str = DEFAULT_PICKLE_PATH, fmt: str = '.ubj') -> str:
+    """model/x.pkl -> model/x.ubj"""
+    return str(Path(pickle_path).with_suffix(fmt))
+
+
+def source_hash_path(native: str) -> str:
+    """model/x.ubj -> model/x.ubj.sha256 (dönüştürülen pickle'ın özeti)"""
+    return native + '.sha256'
+
+
+def _file_digest(path: str) -> str:
+    """Dosyanın boyutu ve SHA-256 özeti ('boyut:özet')"""
+    sha = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            sha.update(chunk)
+    return f"{os.path.getsize(path)}:{sha.hexdigest()}"
+
+
+def convert_to_native(pickle_path: str = DEFAULT_PICKLE_PATH, formats=NATIVE_FORMATS) -> Dict[str, str]:
+    """Pickle edilmiş XGBRegressor'ı XGBoost'un sürümden bağımsız formatlarına çevir"""
+    digest = _file_digest(pickle_path)
+    with open(pickle_path, 'rb') as f:
+        model = pickle.load(f)
+
+    paths = {}
+    for fmt in formats:
+        path = native_path(pickle_path, fmt)
+        model.save_model(path)
+        # Kaynak pickle'ın özeti yerel dosyanın yanında saklanır (mtime checkout/kopyada güvenilmez)
+        with open(source_hash_path(path), 'w', encoding='utf-8') as f:
+            f.write(digest + '\n')
+        paths[fmt] = path
+    return paths
+
+
+def _native_is_current(pickle_path: str, path: str) -> bool:
+    """Yerel dosya bu pickle'dan mı üretilmiş? (saklanan boyut + SHA-256 özetiyle)"""
+    try:
+        with open(source_hash_path(path), 'r', encoding='utf-8') as f:
+            stored = f.read().strip()
+    except OSError:
+        return False
+    # Boyut farklıysa özet hesaplanmaz
+    if stored.split(':', 1)[0] != str(os.path.getsize(pickle_path)):
+        return False
+    return stored == _file_digest(pickle_path)
+
+
+def ensure_native(pickle_path: str = DEFAULT_PICKLE_PATH, fmt: str = '.ubj') -> Optional[str]:
+    """Yerel format yoksa ya da pickle değiştiyse dönüştür; yerel dosya yolunu döndür"""
+    path = native_path(pickle_path, fmt)
+    try:
+        if not os.path.exists(path) or (
+                os.path.exists(pickle_path) and not _native_is_current(pickle_path, path)):
+            convert_to_native(pickle_path, formats=(fmt,))
+        return path
+    except Exception as e:
+        print(f"Model dönüştürme hatası: {e}")
+        return path if os.path.exists(path) else None
+
+
+def load_native_model(path: str, nthread: int = MODEL_NTHREAD) -> xgb.XGBRegressor:
+    """Yerel formattaki modeli sklearn arayüzüyle (predict, get_booster) yükle"""
+    model = xgb.XGBRegressor(n_jobs=nthread)
+    model.load_model(path)
+    return model
+
+
+def load_model_artifact(pickle_path: str = DEFAULT_PICKLE_PATH, nthread: int = MODEL_NTHREAD):
+    """Modeli tercihen yerel formattan, olmazsa pickle'dan yükle"""
+    path = ensure_native(pickle_path)
+    if path:
+        try:
+            return load_native_model(path, nthread)
+        except Exception as e:
+            print(f"Yerel model yüklenemedi, pickle deneniyor: {e}")
+
+    with open(pickle_path, 'rb') as f:
+        model = pickle.load(f)
+    model.set_params(n_jobs=nthread)
+    return model
+
+
+class PredictorPool:
+    """Süreç başına sıcak tahminci havuzu.
+
+    Her tahminci kendi Booster kopyasını tutar ve aynı anda tek thread tarafından
+    kullanılır; havuz boşsa çağıran bir tahminci serbest kalana kadar bekler.
+    Oluşturulurken her tahminci boş olmayan bir girdiyle ısıtılır.
+    """
+
+    def __init__(self, model_path: str = DEFAULT_PICKLE_PATH, size: int = 2, nthread: int = MODEL_NTHREAD):
+        self.model_path = model_path
+        self.size = size
+        self._pool: "queue.Queue[xgb.XGBRegressor]" = queue.Queue()
+
+        first = load_model_artifact(model_path, nthread) if model_path.endswith('.pkl') else \
+            load_native_model(model_path, nthread)
+        self.n_features = first.n_features_in_
+        raw = first.get_booster().save_raw('ubj')
+
+        for i in range(size):
+            model = first if i == 0 else self._clone(raw, nthread)
+            model.predict(np.zeros((1, self.n_features)))  # ısıtma
+            self._pool.put(model)
+
+    @staticmethod
+    def _clone(raw: bytearray, nthread: int) -> xgb.XGBRegressor:
+        model = xgb.XGBRegressor(n_jobs=nthread)
+        model.load_model(bytearray(raw))
+        return model
+
+    @contextmanager
+    def acquire(self, timeout: Optional[float] = None):
+        """Havuzdan bir model al, iş bitince geri koy"""
+        model = self._pool.get(timeout=timeout)
+        try:
+            yield model
+        finally:
+            self._pool.put(model)
+
+    def predict(self, X) -> np.ndarray:
+        with self.acquire() as model:
+            return model.predict(np.asarray(X, dtype=float))
+
+
+_pools: Dict[str, PredictorPool] = {}
+_pools_lock = threading.Lock()
+
+
+def get_predictor_pool(model_path: str = DEFAULT_PICKLE_PATH, size: int = 2) -> PredictorPool:
+    """Model yolu başına süreç genelinde tek havuz"""
+    with _pools_lock:
+        pool = _pools.get(model_path)
+        if pool is None:
+            pool = PredictorPool(model_path, size=size)
+            _pools[model_path] = pool
+        return pool
+
+
+def benchmark_load(pickle_path: str = DEFAULT_PICKLE_PATH, repeat: int = 5) -> Dict[str, Dict[str, float]]:
+    """Pickle ve yerel formatların yükleme süresi (ms) ve dosya boyutu (KB)"""
+    for fmt in NATIVE_FORMATS:
+        ensure_native(pickle_path, fmt)
+
+    def load_pickle():
+        with open(pickle_path, 'rb') as f:
+            return pickle.load(f)
+
+    loaders = {'.pkl': (pickle_path, load_pickle)}
+    for fmt in NATIVE_FORMATS:
+        path = native_path(pickle_path, fmt)
+        loaders[fmt] = (path, lambda path=path: load_native_model(path))
+
+    results = {}
+    for fmt, (path, loader) in loaders.items():
+        timings = []
+        for _ in range(repeat):
+            t0 = time.perf_counter()
+            loader()
+            timings.append((time.perf_counter() - t0) * 1000)
+        results[fmt] = {'load_ms': float(np.median(timings)), 'size_kb': os.path.getsize(path) / 1024}
+    return results
+
+
+if __name__ == "__main__":
+    import sys
+    import warnings
+    warnings.filterwarnings('ignore')
+
+    command = sys.argv[1] if len(sys.argv) > 1 else 'benchmark'
+
+    if command == 'convert':
+        for fmt, path in convert_to_native().items():
+            print(f"✅ {path} ({os.path.getsize(path) / 1024:.0f} KB)")
+    else:
+        for fmt, stats in benchmark_load().items():
+            print(f"{fmt:6s} yükleme: {stats['load_ms']:7.1f} ms  boyut: {stats['size_kb']:6.0f} KB")
+
+        # Yerel formatın pickle ile aynı tahmini verdiğini doğrula
+        with open(DEFAULT_PICKLE_PATH, 'rb') as f:
+            reference = pickle.load(f)
+        X = np.random.default_rng(0).uniform(1, 300, (1000, reference.n_features_in_))
+        pool = get_predictor_pool()
+        diff = np.abs(pool.predict(X) - reference.predict(X)).max()
+        print(f"Pickle / yerel tahmin farkı: {diff:.2e}")
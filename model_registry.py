@@ -0,0 +1,220 @@
+# model_registry.py
+# Hisseye özel modeller için kayıt defteri: model/<SEMBOL>/model.ubj + model/manifest.json
+# Modeller ilk kullanımda yüklenir, bellekte sınırlı bir LRU'da tutulur; hisseye özel
+# model yoksa genel (KCHOL ile eğitilmiş) model kullanılır
+#
+# manifest.json örneği:
+#   {"generic": {"path": "model/kchol_xgb_model.pkl"},
+#    "symbols": {"THYAO": {"path": "model/THYAO/model.ubj", "trained_at": "...",
+#                          "metrics": {"mape": 1.8}, "params": {...}, "features": [...]}}}
+
+import json
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+from dataclasses import asdict, dataclass, field, fields
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+from model_artifacts import DEFAULT_PICKLE_PATH, PredictorPool
+from single_flight import market_data_flight
+from tree_inference import CompiledForest, FastPredictor
+
+MODEL_DIR = 'model'
+MANIFEST_FILE = 'manifest.json'
+GENERIC_KEY = '_GENERIC'
+
+# Bellekte aynı anda tutulacak en fazla model sayısı (tüm evren eğitilse de bellek sabit kalır)
+MODEL_CACHE_SIZE = int(os.getenv('MODEL_CACHE_SIZE', '8'))
+# Model başına sıcak Booster kopyası (büyük toplu tahminler eşzamanlı çalışabilir)
+MODEL_POOL_SIZE = int(os.getenv('MODEL_POOL_SIZE', '2'))
+
+
+@dataclass
+class ModelEntry:
+    symbol: str                       # KCHOL ya da genel model için _GENERIC
+    path: str
+    trained_at: Optional[str] = None
+    metrics: Dict[str, float] = field(default_factory=dict)
+    params: Dict = field(default_factory=dict)
+    features: Optional[List[str]] = None
+
+    @property
+    def is_generic(self) -> bool:
+        return self.symbol == GENERIC_KEY
+
+    @property
+    def version(self) -> str:
+        """Kayıtlı tahminlerde saklanan model sürümü"""
+        return f"{self.path}@{self.trained_at}" if self.trained_at else self.path
+
+
+def _entry_from_info(symbol: str, info: Dict) -> ModelEntry:
+    """Manifest kaydından ModelEntry (bilinmeyen alanlar yok sayılır)"""
+    known = {f.name for f in fields(ModelEntry)} - {'symbol'}
+    return ModelEntry(symbol=symbol, **{k: v for k, v in info.items() if k in known})
+
+
+def _load_predictor(path: str, pool_size: int = MODEL_POOL_SIZE) -> FastPredictor:
+    """Modeli yola özel tahminci havuzuna yükle ve tek satırlık tahminler için derle"""
+    pool = PredictorPool(path, size=pool_size)
+    try:
+        with pool.acquire() as model:
+            forest = CompiledForest.from_model(model)
+    except Exception as e:
+        print(f"Model derlenemedi ({path}): {e}")
+        forest = None
+    return FastPredictor(forest, pool)
+
+
+class ModelRegistry:
+    """Manifest tabanlı, tembel yüklemeli ve LRU sınırlı model kayıt defteri"""
+
+    def __init__(self, model_dir: str = MODEL_DIR, capacity: int = MODEL_CACHE_SIZE,
+                 generic_path: str = DEFAULT_PICKLE_PATH):
+        self.model_dir = model_dir
+        self.manifest_path = os.path.join(model_dir, MANIFEST_FILE)
+        self.capacity = max(1, capacity)
+        self.generic_path = generic_path
+
+        self._lock = threading.Lock()
+        self._manifest: Dict = {}
+        self._manifest_mtime: Optional[float] = None
+        self._loaded: "OrderedDict[str, Tuple[str, FastPredictor]]" = OrderedDict()
+        self.stats = {'hits': 0, 'loads': 0, 'evictions': 0}
+
+    # -- manifest ---------------------------------------------------------
+
+    def _read_manifest(self) -> Dict:
+        """Manifest'i dosya değiştiyse yeniden oku (kilit altında çağrılır)"""
+        try:
+            mtime = os.path.getmtime(self.manifest_path)
+        except OSError:
+            self._manifest, self._manifest_mtime = {}, None
+            return self._manifest
+
+        if mtime != self._manifest_mtime:
+            try:
+                with open(self.manifest_path, 'r', encoding='utf-8') as f:
+                    self._manifest = json.load(f)
+                self._manifest_mtime = mtime
+            except Exception as e:
+                print(f"Model manifest'i okunamadı: {e}")
+        return self._manifest
+
+    def _write_manifest(self, manifest: Dict):
+        """Manifest'i geçici dosya + os.replace ile atomik yaz (kilit altında çağrılır)"""
+        os.makedirs(self.model_dir, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=self.model_dir, suffix='.tmp')
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, self.manifest_path)
+        self._manifest, self._manifest_mtime = manifest, os.path.getmtime(self.manifest_path)
+
+    def _entry_locked(self, symbol: str) -> ModelEntry:
+        manifest = self._read_manifest()
+        info = manifest.get('symbols', {}).get(symbol)
+        if info and os.path.exists(info.get('path', '')):
+            return _entry_from_info(symbol, info)
+        return _entry_from_info(GENERIC_KEY, manifest.get('generic', {'path': self.generic_path}))
+
+    def entry(self, symbol: str) -> ModelEntry:
+        """Sembol için kullanılacak model kaydı (hisseye özel yoksa genel model)"""
+        with self._lock:
+            return self._entry_locked(symbol.upper().replace('.IS', ''))
+
+    def symbols(self) -> List[str]:
+        """Hisseye özel modeli olan semboller"""
+        with self._lock:
+            return sorted(self._read_manifest().get('symbols', {}))
+
+    # -- yükleme ----------------------------------------------------------
+
+    def get(self, symbol: str) -> Tuple[FastPredictor, ModelEntry]:
+        """Sembolün tahmincisi ve model kaydı; gerekirse yüklenir, en eski model düşürülür"""
+        with self._lock:
+            entry = self._entry_locked(symbol.upper().replace('.IS', ''))
+            cached = self._loaded.get(entry.symbol)
+            if cached is not None and cached[0] == entry.version:
+                self._loaded.move_to_end(entry.symbol)
+                self.stats['hits'] += 1
+                return cached[1], entry
+
+        # Yükleme kilit dışında: diğer sembollerin istekleri beklemez; aynı model için
+        # eşzamanlı soğuk istekler tek yüklemeyi paylaşır
+        predictor = market_data_flight.do(('model', entry.path, entry.version), _load_predictor, entry.path)
+
+        with self._lock:
+            cached = self._loaded.get(entry.symbol)
+            if cached is None or cached[1] is not predictor:
+                self._loaded[entry.symbol] = (entry.version, predictor)
+                self.stats['loads'] += 1
+            self._loaded.move_to_end(entry.symbol)
+            while len(self._loaded) > self.capacity:
+                self._loaded.popitem(last=False)
+                self.stats['evictions'] += 1
+        return predictor, entry
+
+    def loaded_symbols(self) -> List[str]:
+        """Şu an bellekte olan modeller (en eskiden en yeniye)"""
+        with self._lock:
+            return list(self._loaded)
+
+    # -- kayıt ------------------------------------------------------------
+
+    def register(self, symbol: str, model, metrics: Optional[Dict[str, float]] = None,
+                 params: Optional[Dict] = None, features: Optional[List[str]] = None) -> ModelEntry:
+        """Eğitilmiş modeli model/<SEMBOL>/model.ubj olarak kaydet ve manifest'e ekle"""
+        symbol = symbol.upper().replace('.IS', '')
+        symbol_dir = os.path.join(self.model_dir, symbol)
+        os.makedirs(symbol_dir, exist_ok=True)
+
+        path = os.path.join(symbol_dir, 'model.ubj')
+        tmp_path = os.path.join(symbol_dir, 'model.tmp.ubj')
+        model.save_model(tmp_path)
+        os.replace(tmp_path, path)
+
+        entry = ModelEntry(
+            symbol=symbol,
+            path=path.replace(os.sep, '/'),
+            trained_at=datetime.now().isoformat(timespec='seconds'),
+            metrics=metrics or {},
+            params=params or {},
+            features=features
+        )
+        info = asdict(entry)
+        del info['symbol']
+
+        with self._lock:
+            manifest = dict(self._read_manifest())
+            manifest.setdefault('generic', {'path': self.generic_path})
+            manifest['symbols'] = {**manifest.get('symbols', {}), symbol: info}
+            self._write_manifest(manifest)
+            self._loaded.pop(symbol, None)
+        return entry
+
+
+_registry: Optional[ModelRegistry] = None
+_registry_lock = threading.Lock()
+
+
+def get_model_registry() -> ModelRegistry:
+    """Süreç genelinde paylaşılan model kayıt defteri"""
+    global _registry
+    with _registry_lock:
+        if _registry is None:
+            _registry = ModelRegistry()
+        return _registry
+
+
+if __name__ == "__main__":
+    import sys
+    registry = get_model_registry()
+
+    symbols = sys.argv[1:] or ['KCHOL', 'THYAO', 'GARAN']
+    for symbol in symbols:
+        entry = registry.entry(symbol)
+        kind = 'genel' if entry.is_generic else 'hisseye özel'
+        print(f"{symbol:6s} -> {entry.path} ({kind}) {entry.metrics or ''}")
+    print(f"Hisseye özel modeller: {len(registry.symbols())}")
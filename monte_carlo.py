@@ -0,0 +1,197 @@
+# monte_carlo.py
+# Portföy için Monte Carlo risk simülasyonu: yerel fiyat deposundaki günlük toplam
+# getiriler (temettü dahil) blok bootstrap ile yeniden örneklenir; on binlerce yol
+# parça parça ve tamamen vektörel hesaplanır. Sonuç: yüzdelik bantlar, VaR ve CVaR.
+#
+# Blok bootstrap, hisseler arasındaki korelasyonu (aynı geçmiş günler birlikte
+# çekilir) ve kısa vadeli oynaklık kümelenmesini (ardışık günler blok halinde) korur.
+# Yollar blok sınırlarında izlenir; her blok için hisse bazında toplam log getiri
+# önceden hesaplandığından yol başına gün gün döngü yoktur.
+#
+# Kullanım:
+#   python monte_carlo.py   -> sentetik 20 hisselik portföyde süre ölçümü
+
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from investment_simulator import load_price_arrays
+from price_store import PriceStore
+from universe import to_yahoo_symbol
+
+DEFAULT_PATHS = 20000
+DEFAULT_HORIZON_DAYS = 252      # ~1 işlem yılı
+DEFAULT_BLOCK_DAYS = 5          # 1 = klasik (gün bazında) bootstrap
+DEFAULT_HISTORY_YEARS = 5
+CHUNK_ELEMENTS = 4_000_000      # Bir parçadaki (yol x blok x hisse) eleman sayısı üst sınırı
+MIN_HISTORY_DAYS = 60
+CONFIDENCE_LEVELS = [0.95, 0.99]
+BAND_PERCENTILES = [5, 25, 50, 75, 95]
+
+
+@dataclass
+class MonteCarloResult:
+    symbols: List[str]
+    initial_value: float
+    horizon_days: int
+    block_days: int
+    history_days: int            # Örneklenen geçmiş gün sayısı
+    checkpoints: np.ndarray      # Yolların izlendiği işlem günleri (blok sonları)
+    path_values: np.ndarray      # (yol, checkpoint) portföy değeri (TL)
+
+    @property
+    def n_paths(self) -> int:
+        return len(self.path_values)
+
+    @property
+    def terminal_values(self) -> np.ndarray:
+        return self.path_values[:, -1]
+
+    def bands(self, percentiles: List[int] = BAND_PERCENTILES) -> pd.DataFrame:
+        """Gün x yüzdelik portföy değeri bantları"""
+        values = np.percentile(self.path_values, percentiles, axis=0).T
+        return pd.DataFrame(values, index=pd.Index(self.checkpoints, name='day'),
+                            columns=[f"p{p}" for p in percentiles])
+
+    def var(self, confidence: float = 0.95) -> float:
+        """Ufuk sonunda verilen güven düzeyinde Riske Maruz Değer (TL, pozitif = kayıp)"""
+        return float(self.initial_value - np.quantile(self.terminal_values, 1 - confidence))
+
+    def cvar(self, confidence: float = 0.95) -> float:
+        """Beklenen kayıp: VaR eşiğinin ötesindeki yolların ortalama kaybı (TL)"""
+        terminal = self.terminal_values
+        tail = terminal[terminal <= np.quantile(terminal, 1 - confidence)]
+        return float(self.initial_value - tail.mean())
+
+    def summary(self) -> Dict:
+        """Sohbet/sayfa için özet sözlük"""
+        terminal = self.terminal_values
+        result = {
+            'initial_value': round(self.initial_value, 2),
+            'horizon_days': self.horizon_days,
+            'n_paths': self.n_paths,
+            'history_days': self.history_days,
+            'median_value': round(float(np.median(terminal)), 2),
+            'mean_value': round(float(terminal.mean()), 2),
+            'loss_prob_pct': round(float((terminal < self.initial_value).mean() * 100), 2),
+        }
+        for p, value in zip(BAND_PERCENTILES, np.percentile(terminal, BAND_PERCENTILES)):
+            result[f'p{p}_value'] = round(float(value), 2)
+        for confidence in CONFIDENCE_LEVELS:
+            level = int(round(confidence * 100))
+            var, cvar = self.var(confidence), self.cvar(confidence)
+            result[f'var_{level}'] = round(var, 2)
+            result[f'cvar_{level}'] = round(cvar, 2)
+            result[f'var_{level}_pct'] = round(var / self.initial_value * 100, 2)
+            result[f'cvar_{level}_pct'] = round(cvar / self.initial_value * 100, 2)
+        return result
+
+
+def load_log_returns(symbols: List[str], years: int = DEFAULT_HISTORY_YEARS,
+                     store: Optional[PriceStore] = None) -> Dict:
+    """Depodaki düzeltilmiş kapanışlardan günlük log getiriler (tüm hisselerin işlem gördüğü günler)"""
+    arrays = load_price_arrays(symbols, years=years, store=store)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        returns = np.diff(np.log(arrays['adj_close']), axis=0)
+    # Ortak geçmiş: korelasyonun korunması için yalnızca tüm hisselerin verisi olan günler
+    returns = returns[np.isfinite(returns).all(axis=1)]
+    return {'symbols': arrays['symbols'], 'returns': returns}
+
+
+def simulate_returns(returns: np.ndarray, values: np.ndarray, n_paths: int = DEFAULT_PATHS,
+                     horizon_days: int = DEFAULT_HORIZON_DAYS, block_days: int = DEFAULT_BLOCK_DAYS,
+                     seed: Optional[int] = None, symbols: Optional[List[str]] = None) -> MonteCarloResult:
+    """(gün, hisse) log getirilerinden al-tut portföy yollarını simüle et.
+
+    values: hisse başına bugünkü pozisyon değeri (TL). Her yol, geçmişten rastgele
+    başlangıçlı `block_days` uzunluğunda bloklar art arda eklenerek oluşturulur.
+    Bellek, CHUNK_ELEMENTS ile sınırlanan yol parçalarıyla sabit tutulur.
+    """
+    returns = np.asarray(returns, dtype=float)
+    values = np.asarray(values, dtype=float)
+    n_days, n_symbols = returns.shape
+    if n_symbols != len(values):
+        raise ValueError("Getiri sütunları ile pozisyon sayısı uyuşmuyor")
+    if n_days < max(MIN_HISTORY_DAYS, block_days):
+        raise ValueError(f"Yetersiz geçmiş veri ({n_days} gün)")
+
+    block_days = max(1, min(block_days, horizon_days))
+    n_blocks = -(-horizon_days // block_days)
+    last_block = horizon_days - (n_blocks - 1) * block_days
+    checkpoints = np.minimum(np.arange(1, n_blocks + 1) * block_days, horizon_days)
+
+    # Başlangıç gününe göre blok toplam log getirileri: C[s + L] - C[s]
+    cumulative = np.vstack([np.zeros(n_symbols), np.cumsum(returns, axis=0)])
+    full_blocks = (cumulative[block_days:] - cumulative[:-block_days]).astype(np.float32)
+    tail_blocks = (cumulative[last_block:] - cumulative[:-last_block]).astype(np.float32)
+
+    rng = np.random.default_rng(seed)
+    path_values = np.empty((n_paths, n_blocks), dtype=np.float32)
+    weights = values.astype(np.float32)
+    chunk = max(1, CHUNK_ELEMENTS // (n_blocks * n_symbols))
+
+    for start in range(0, n_paths, chunk):
+        size = min(chunk, n_paths - start)
+        log_paths = np.empty((size, n_blocks, n_symbols), dtype=np.float32)
+        if n_blocks > 1:
+            log_paths[:, :-1] = full_blocks[rng.integers(0, len(full_blocks), (size, n_blocks - 1))]
+        log_paths[:, -1] = tail_blocks[rng.integers(0, len(tail_blocks), size)]
+        np.cumsum(log_paths, axis=1, out=log_paths)
+        np.exp(log_paths, out=log_paths)
+        path_values[start:start + size] = log_paths @ weights
+
+    return MonteCarloResult(
+        symbols=list(symbols) if symbols is not None else [str(i) for i in range(n_symbols)],
+        initial_value=float(values.sum()),
+        horizon_days=horizon_days,
+        block_days=block_days,
+        history_days=n_days,
+        checkpoints=checkpoints,
+        path_values=path_values,
+    )
+
+
+def simulate_holdings(holdings: Dict[str, float], n_paths: int = DEFAULT_PATHS,
+                      horizon_days: int = DEFAULT_HORIZON_DAYS, block_days: int = DEFAULT_BLOCK_DAYS,
+                      years: int = DEFAULT_HISTORY_YEARS, seed: Optional[int] = None,
+                      store: Optional[PriceStore] = None) -> MonteCarloResult:
+    """{sembol: pozisyon değeri (TL)} portföyü için depodaki geçmişle simülasyon"""
+    # 'THYAO' ve 'THYAO.IS' aynı pozisyon sayılır
+    merged: Dict[str, float] = {}
+    for symbol, value in holdings.items():
+        if value > 0:
+            merged[to_yahoo_symbol(symbol)] = merged.get(to_yahoo_symbol(symbol), 0.0) + value
+    if not merged:
+        raise ValueError("Simüle edilecek pozisyon yok")
+    data = load_log_returns(list(merged), years=years, store=store)
+    return simulate_returns(data['returns'], np.array(list(merged.values())), n_paths=n_paths,
+                            horizon_days=horizon_days, block_days=block_days, seed=seed, symbols=data['symbols'])
+
+
+if __name__ == "__main__":
+    import time
+
+    # Sentetik 20 hisse x 5 yıl, ortak piyasa faktörlü korelasyonlu getiriler
+    rng = np.random.default_rng(0)
+    n_days, n_symbols = 5 * 252, 20
+    market = rng.normal(0.0004, 0.012, (n_days, 1))
+    returns = market + rng.normal(0.0, 0.015, (n_days, n_symbols))
+    values = rng.uniform(5000, 50000, n_symbols)
+
+    for n_paths in [10000, 100000]:
+        t0 = time.perf_counter()
+        result = simulate_returns(returns, values, n_paths=n_paths, seed=1)
+        elapsed = (time.perf_counter() - t0) * 1000
+        summary = result.summary()
+        print(f"{n_paths:,} yol x {result.horizon_days} gün x {n_symbols} hisse: {elapsed:.0f} ms | "
+              f"medyan {summary['median_value']:,.0f} TL, VaR95 {summary['var_95']:,.0f} TL "
+              f"(%{summary['var_95_pct']:.1f}), CVaR95 {summary['cvar_95']:,.0f} TL")
+
+    # Gün bazında döngüyle doğrulama (aynı bloklar, tek yol)
+    result = simulate_returns(returns, values, n_paths=3, horizon_days=10, block_days=10, seed=7)
+    start = np.random.default_rng(7).integers(0, n_days - 10 + 1, 3)[0]
+    expected = float((values * np.exp(returns[start:start + 10].sum(axis=0))).sum())
+    print(f"Tek yol kontrolü: {result.terminal_values[0]:,.2f} / beklenen {expected:,.2f}")
+    print(result.bands().round(0).tail(3).to_string())
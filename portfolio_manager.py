@@ -1,214 +1,209 @@
-import json
-import os
 from datetime import datetime, timedelta
-import requests
 from typing import Dict, List, Optional
+from price_store import get_price_store, is_market_open
+from quote_cache import get_quote_cache
+from quote_fetcher import get_quote_fetcher
+from portfolio_store import get_portfolio_store
+from transaction_ledger import TransactionLedger
+from monte_carlo import DEFAULT_HORIZON_DAYS, DEFAULT_PATHS, simulate_holdings
+from portfolio_valuation import SnapshotStore
 
 class PortfolioManager:
-    def __init__(self, portfolio_file="user_portfolios.json"):
+    def __init__(self, portfolio_file="user_portfolios.json", db_file="portfolios.db"):
         self.portfolio_file = portfolio_file
-        self.portfolios = self.load_portfolios()
+        self.store = get_portfolio_store(db_file)
+        # Eski JSON portföyleri bir kez SQLite deposuna aktarılır
+        self.store.migrate_from_json(portfolio_file)
+        # İşlem defteri (defteri olmayan pozisyonlar açılış bakiyesi olarak aktarılır)
+        self.ledger = TransactionLedger(db_file)
+        # Toplu değerleme işinin (portfolio_valuation.py) günlük anlık görüntüleri
+        self.snapshots = SnapshotStore(db_file)
+        # Fiyat önbelleği süreç genelinde paylaşılır (fetch yolu nesne durumuna bağlı değildir)
+        self.quote_cache = get_quote_cache(self.get_live_prices, self._fallback_prices)
+    
+    @property
+    def portfolios(self) -> Dict:
+        """Tüm kullanıcıların portföyleri (salt okunur anlık görüntü; değişiklikler add_stock/remove_stock ile)"""
+        return self.load_portfolios()
     
     def load_portfolios(self) -> Dict:
-        """Portföy verilerini JSON dosyasından yükle"""
-        if os.path.exists(self.portfolio_file):
-            try:
-                with open(self.portfolio_file, 'r', encoding='utf-8') as f:
-                    return json.load(f)
-            except Exception as e:
-                print(f"Portföy yüklenirken hata: {e}")
-                return {"default_user": []}
-        return {"default_user": []}
+        """Portföy verilerini SQLite deposundan yükle"""
+        try:
+            return self.store.all_holdings() or {"default_user": []}
+        except Exception as e:
+            print(f"Portföy yüklenirken hata: {e}")
+            return {"default_user": []}
     
     def save_portfolios(self):
-        """Portföy verilerini JSON dosyasına kaydet"""
+        """Geriye dönük uyumluluk: her değişiklik depoya anında ve atomik yazılır"""
+        return True
+    
+    def add_stock(self, user_id: str, symbol: str, quantity: float, avg_price: float, fee: float = 0.0) -> Dict:
+        """Yeni hisse senedi ekle (deftere alım işlemi olarak yazılır)"""
         try:
-            with open(self.portfolio_file, 'w', encoding='utf-8') as f:
-                json.dump(self.portfolios, f, indent=2, ensure_ascii=False)
-            return True
+            existed = self.store.get_holding(user_id, symbol) is not None
+            # Yeni lot açılır; holdings satırındaki miktar ve ortalama maliyet aynı işlemde güncellenir
+            self.ledger.buy(user_id, symbol, quantity, avg_price, fee=fee)
         except Exception as e:
             print(f"Portföy kaydedilirken hata: {e}")
-            return False
-    
-    def add_stock(self, user_id: str, symbol: str, quantity: float, avg_price: float) -> Dict:
-        """Yeni hisse senedi ekle"""
-        if user_id not in self.portfolios:
-            self.portfolios[user_id] = []
+            return {"success": False, "message": f"{symbol} kaydedilemedi"}
         
-        # Mevcut hisse kontrolü
-        for stock in self.portfolios[user_id]:
-            if stock['symbol'] == symbol:
-                # Mevcut hisseyi güncelle
-                total_quantity = stock['quantity'] + quantity
-                total_cost = (stock['quantity'] * stock['avg_price']) + (quantity * avg_price)
-                new_avg_price = total_cost / total_quantity
-                
-                stock['quantity'] = total_quantity
-                stock['avg_price'] = new_avg_price
-                stock['last_updated'] = datetime.now().strftime("%Y-%m-%d")
-                
-                self.save_portfolios()
-                return {"success": True, "message": f"{symbol} güncellendi", "stock": stock}
-        
-        # Yeni hisse ekle
-        new_stock = {
-            "symbol": symbol,
-            "quantity": quantity,
-            "avg_price": avg_price,
-            "date_added": datetime.now().strftime("%Y-%m-%d"),
-            "last_updated": datetime.now().strftime("%Y-%m-%d")
-        }
-        
-        self.portfolios[user_id].append(new_stock)
-        self.save_portfolios()
-        
-        return {"success": True, "message": f"{symbol} eklendi", "stock": new_stock}
+        message = f"{symbol} güncellendi" if existed else f"{symbol} eklendi"
+        return {"success": True, "message": message, "stock": self.store.get_holding(user_id, symbol)}
     
-    def remove_stock(self, user_id: str, symbol: str, quantity: float = None) -> Dict:
-        """Hisse senedi çıkar veya miktar azalt"""
-        if user_id not in self.portfolios:
-            return {"success": False, "message": "Kullanıcı bulunamadı"}
+    def remove_stock(self, user_id: str, symbol: str, quantity: float = None, price: float = None, fee: float = 0.0) -> Dict:
+        """Hisse senedi çıkar veya miktar azalt (price verilirse satış, verilmezse maliyetten çıkarma)"""
+        stock = self.store.get_holding(user_id, symbol)
+        if stock is None:
+            return {"success": False, "message": f"{symbol} bulunamadı"}
         
-        for i, stock in enumerate(self.portfolios[user_id]):
-            if stock['symbol'] == symbol:
-                if quantity is None or quantity >= stock['quantity']:
-                    # Tüm hisseyi çıkar
-                    removed_stock = self.portfolios[user_id].pop(i)
-                    self.save_portfolios()
-                    return {"success": True, "message": f"{symbol} tamamen çıkarıldı", "stock": removed_stock}
-                else:
-                    # Miktar azalt
-                    stock['quantity'] -= quantity
-                    stock['last_updated'] = datetime.now().strftime("%Y-%m-%d")
-                    self.save_portfolios()
-                    return {"success": True, "message": f"{symbol} miktarı azaltıldı", "stock": stock}
+        try:
+            # FIFO ile en eski lotlardan düşülür
+            position = self.ledger.sell(user_id, symbol, quantity, price, fee=fee)
+        except Exception as e:
+            print(f"Portföy kaydedilirken hata: {e}")
+            return {"success": False, "message": f"{symbol} güncellenemedi"}
         
-        return {"success": False, "message": f"{symbol} bulunamadı"}
+        if position['quantity'] <= 0:
+            return {"success": True, "message": f"{symbol} tamamen çıkarıldı", "stock": stock}
+        return {"success": True, "message": f"{symbol} miktarı azaltıldı", "stock": self.store.get_holding(user_id, symbol)}
+    
+    def record_dividend(self, user_id: str, symbol: str, amount: float = None, per_share: float = None) -> Dict:
+        """Nakit temettü kaydet (toplam tutar ya da hisse başına)"""
+        try:
+            position = self.ledger.dividend(user_id, symbol, amount=amount, per_share=per_share)
+        except Exception as e:
+            print(f"Temettü kaydedilirken hata: {e}")
+            return {"success": False, "message": f"{symbol} temettüsü kaydedilemedi"}
+        return {"success": True, "message": f"{symbol} temettüsü kaydedildi", "position": position}
+    
+    def record_split(self, user_id: str, symbol: str, ratio: float) -> Dict:
+        """Bölünme/bedelsiz sermaye artırımı kaydet (ör. %100 bedelsiz için ratio=2)"""
+        try:
+            position = self.ledger.split(user_id, symbol, ratio)
+        except Exception as e:
+            print(f"Bölünme kaydedilirken hata: {e}")
+            return {"success": False, "message": f"{symbol} bölünmesi kaydedilemedi"}
+        return {"success": True, "message": f"{symbol} bölünmesi kaydedildi", "position": position}
+    
+    def get_transactions(self, user_id: str, symbol: str = None, limit: int = 100) -> List[Dict]:
+        """Kullanıcının son işlemleri"""
+        return self.ledger.transactions(user_id, symbol, limit)
+    
+    def get_value_history(self, user_id: str, start: str = None) -> List[Dict]:
+        """Günlük toplu değerleme kayıtlarından portföy değer geçmişi"""
+        history = self.snapshots.history(user_id, start)
+        return history.reset_index().to_dict('records')
     
     def get_portfolio(self, user_id: str) -> List[Dict]:
         """Kullanıcının portföyünü getir"""
-        return self.portfolios.get(user_id, [])
+        return self.store.get_holdings(user_id)
     
-    def get_current_prices(self, symbols: List[str]) -> Dict[str, float]:
-        """Hisse senettlerinin güncel fiyatlarını al"""
+    def _get_bulk_prices(self, symbols: List[str]) -> Dict[str, float]:
+        """Tüm sembollerin son kapanışını tek toplu indirmeyle al"""
         prices = {}
+        tickers = {symbol: symbol if symbol.endswith('.IS') else f"{symbol}.IS" for symbol in symbols}
         
-        for symbol in symbols:
+        try:
+            frames = get_price_store().get_many(list(tickers.values()), datetime.now() - timedelta(days=7))
+        except Exception as e:
+            print(f"⚠️ Toplu fiyat alma hatası: {e}")
+            return prices
+        
+        for symbol, ticker in tickers.items():
+            df = frames.get(ticker)
+            if df is not None and not df.empty:
+                price = float(df['close'].iloc[-1])
+                if price > 0:
+                    prices[symbol] = price
+                    print(f"✅ {symbol} toplu fiyat: {price} TL")
+        
+        return prices
+    
+    def get_current_prices(self, symbols: List[str]) -> Dict[str, float]:
+        """Hisse senettlerinin güncel fiyatlarını al (önbellekten; bayat fiyatlar arka planda yenilenir)"""
+        return self.quote_cache.get_many(symbols)
+    
+    def get_live_prices(self, symbols: List[str]) -> Dict[str, float]:
+        """Önbelleksiz gerçek fiyatlar (bulunamayan semboller dönmez).
+
+        Seans açıkken önce eşzamanlı anlık fiyat istekleri, eksikler için yerel depo;
+        seans kapalıyken önce yerel depodaki kapanış, eksikler için anlık fiyat istekleri.
+        """
+        def fetch_quotes(wanted: List[str]) -> Dict[str, float]:
+            if not wanted:
+                return {}
+            print(f"🔍 {len(wanted)} sembol için anlık fiyat aranıyor: {wanted}")
             try:
-                # Önce Yahoo Finance API'yi dene
-                if symbol.endswith('.IS'):
-                    ticker = symbol
-                else:
-                    ticker = f"{symbol}.IS"
-                
-                print(f"🔍 {symbol} için fiyat aranıyor: {ticker}")
-                
-                # Yahoo Finance API
-                url = f"https://query1.finance.yahoo.com/v8/finance/chart/{ticker}"
-                headers = {
-                    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-                }
-                
-                response = requests.get(url, headers=headers, timeout=15)
-                
-                if response.status_code == 200:
-                    data = response.json()
-                    
-                    if 'chart' in data and 'result' in data['chart'] and data['chart']['result']:
-                        result = data['chart']['result'][0]
-                        
-                        if 'meta' in result and 'regularMarketPrice' in result['meta']:
-                            price = result['meta']['regularMarketPrice']
-                            if price and price > 0:
-                                prices[symbol] = price
-                                print(f"✅ {symbol} Yahoo fiyatı: {price} TL")
-                                continue
-                        
-                        # Alternatif fiyat kaynakları
-                        if 'indicators' in result and 'quote' in result['indicators']:
-                            quote = result['indicators']['quote'][0]
-                            if 'close' in quote and quote['close']:
-                                price = quote['close'][-1]
-                                if price and price > 0:
-                                    prices[symbol] = price
-                                    print(f"✅ {symbol} Yahoo alternatif fiyatı: {price} TL")
-                                    continue
-                
-                # Yahoo Finance başarısız olursa, alternatif API'leri dene
-                print(f"🔄 {symbol} için alternatif API deneniyor...")
-                
-                # Finans API (Türk hisseleri için)
-                try:
-                    finans_url = f"https://finans.truncgil.com/today.json"
-                    finans_response = requests.get(finans_url, timeout=10)
-                    
-                    if finans_response.status_code == 200:
-                        finans_data = finans_response.json()
-                        
-                        # Symbol'ü temizle
-                        clean_symbol = symbol.replace('.IS', '').upper()
-                        
-                        if clean_symbol in finans_data:
-                            price_str = finans_data[clean_symbol].get('Alış', '0')
-                            # Fiyat string'ini temizle
-                            price = float(price_str.replace(',', '').replace('₺', '').replace('TL', '').strip())
-                            
-                            if price > 0:
-                                prices[symbol] = price
-                                print(f"✅ {symbol} Finans API fiyatı: {price} TL")
-                                continue
-                except Exception as e:
-                    print(f"⚠️ Finans API hatası ({symbol}): {e}")
-                
-                # Tüm API'ler başarısız olursa, varsayılan fiyat kullan
-                if symbol not in prices:
-                    # Test için sabit fiyatlar (gerçek uygulamada kaldırılacak)
-                    test_prices = {
-                        'THYAO.IS': 45.50,
-                        'KCHOL': 34.25,
-                        '55': 0.01
-                    }
-                    
-                    if symbol in test_prices:
-                        prices[symbol] = test_prices[symbol]
-                        print(f"🧪 {symbol} test fiyatı: {test_prices[symbol]} TL")
-                    else:
-                        prices[symbol] = 0.0
-                        print(f"❌ {symbol} için fiyat bulunamadı")
-                        
+                quotes = get_quote_fetcher().fetch_many(wanted)
             except Exception as e:
-                print(f"❌ {symbol} fiyatı alınırken hata: {e}")
+                print(f"❌ Anlık fiyat alma hatası: {e}")
+                return {}
+            for symbol, price in quotes.items():
+                print(f"✅ {symbol} anlık fiyat: {price} TL")
+            return quotes
+        
+        if is_market_open():
+            prices = fetch_quotes(symbols)
+            prices.update(self._get_bulk_prices([symbol for symbol in symbols if symbol not in prices]))
+        else:
+            prices = self._get_bulk_prices(symbols)
+            prices.update(fetch_quotes([symbol for symbol in symbols if symbol not in prices]))
+        return prices
+    
+    def _fallback_prices(self, symbols: List[str]) -> Dict[str, float]:
+        """Gerçek fiyatı bulunamayan semboller için varsayılan fiyat (önbelleğe yazılmaz)"""
+        prices = {}
+        
+        for symbol in symbols:
+            # Tüm API'ler başarısız olursa, varsayılan fiyat kullan
+            # Test için sabit fiyatlar (gerçek uygulamada kaldırılacak)
+            test_prices = {
+                'THYAO.IS': 45.50,
+                'KCHOL': 34.25,
+                '55': 0.01
+            }
+            
+            if symbol in test_prices:
+                prices[symbol] = test_prices[symbol]
+                print(f"🧪 {symbol} test fiyatı: {test_prices[symbol]} TL")
+            else:
                 prices[symbol] = 0.0
+                print(f"❌ {symbol} için fiyat bulunamadı")
         
-        print(f"📋 Toplam fiyatlar: {prices}")
         return prices
     
     def calculate_portfolio_value(self, user_id: str) -> Dict:
-        """Portföy değerini ve kar/zarar hesapla"""
-        portfolio = self.get_portfolio(user_id)
-        if not portfolio:
+        """Portföy değerini ve kar/zarar hesapla (defterdeki artımlı toplamlardan, işlem geçmişi okunmaz)"""
+        positions = self.ledger.positions(user_id, include_closed=True)
+        open_positions = [p for p in positions if p['quantity'] > 0]
+        total_realized = sum(p['realized_pnl'] for p in positions)
+        total_dividends = sum(p['dividends'] for p in positions)
+        if not open_positions:
             return {
                 "total_invested": 0,
                 "current_value": 0,
                 "total_pnl": 0,
                 "total_pnl_percent": 0,
+                "realized_pnl": round(total_realized, 2),
+                "dividends": round(total_dividends, 2),
                 "stocks": []
             }
         
-        symbols = [stock['symbol'] for stock in portfolio]
+        symbols = [position['symbol'] for position in open_positions]
         current_prices = self.get_current_prices(symbols)
         
         total_invested = 0
         current_value = 0
         stocks_detail = []
         
-        for stock in portfolio:
-            symbol = stock['symbol']
-            quantity = stock['quantity']
-            avg_price = stock['avg_price']
+        for position in open_positions:
+            symbol = position['symbol']
+            quantity = position['quantity']
+            invested = position['cost_basis']
+            avg_price = invested / quantity
             current_price = current_prices.get(symbol, 0)
             
-            invested = quantity * avg_price
             current_stock_value = quantity * current_price
             pnl = current_stock_value - invested
             pnl_percent = (pnl / invested * 100) if invested > 0 else 0
@@ -224,7 +219,9 @@ class PortfolioManager:
                 "invested": invested,
                 "current_value": current_stock_value,
                 "pnl": pnl,
-                "pnl_percent": pnl_percent
+                "pnl_percent": pnl_percent,
+                "realized_pnl": position['realized_pnl'],
+                "dividends": position['dividends']
             })
         
         total_pnl = current_value - total_invested
@@ -235,6 +232,8 @@ class PortfolioManager:
             "current_value": round(current_value, 2),
             "total_pnl": round(total_pnl, 2),
             "total_pnl_percent": round(total_pnl_percent, 2),
+            "realized_pnl": round(total_realized, 2),
+            "dividends": round(total_dividends, 2),
             "stocks": stocks_detail
         }
     
@@ -256,4 +255,25 @@ class PortfolioManager:
             "worst_performer": worst_stock,
             "total_stocks": len(stocks),
             "last_updated": datetime.now().strftime("%Y-%m-%d %H:%M")
-        } 
\ No newline at end of file
+        } 
+    
+    def simulate_portfolio_risk(self, user_id: str, horizon_days: int = DEFAULT_HORIZON_DAYS,
+                                n_paths: int = DEFAULT_PATHS) -> Optional[Dict]:
+        """Portföyün güncel değerleriyle Monte Carlo risk simülasyonu (VaR, CVaR, yüzdelik bantlar)"""
+        portfolio_value = self.calculate_portfolio_value(user_id)
+        holdings = {stock['symbol']: stock['current_value'] for stock in portfolio_value['stocks']
+                    if stock['current_value'] > 0}
+        if not holdings:
+            return None
+        
+        try:
+            result = simulate_holdings(holdings, n_paths=n_paths, horizon_days=horizon_days)
+        except Exception as e:
+            print(f"❌ Monte Carlo simülasyonu hatası: {e}")
+            return None
+        
+        return {
+            "summary": result.summary(),
+            "bands": result.bands(),
+            "symbols": result.symbols
+        }
@@ -0,0 +1,261 @@
+# portfolio_store.py
+# Kullanıcı portföyleri için SQLite (WAL) deposu: her pozisyon (kullanıcı, sembol)
+# anahtarlı tek satır. Ekleme/çıkarma tek satırlık atomik işlemdir; maliyeti kullanıcı
+# sayısından bağımsızdır ve birden fazla Streamlit işçisi aynı dosyayı güvenle paylaşır.
+#
+# Eski user_portfolios.json ilk açılışta bir kez içe aktarılır (dosya silinmez).
+# PortfolioManager pozisyonları transaction_ledger.py üzerinden yazar; defter bu
+# tablodaki satırları aynı veritabanı işleminde günceller.
+#
+# Kullanım:
+#   python portfolio_store.py --migrate user_portfolios.json
+
+import json
+import os
+import sqlite3
+import threading
+from datetime import datetime
+from typing import Dict, List, Optional
+
+HOLDING_COLUMNS = ['symbol', 'quantity', 'avg_price', 'date_added', 'last_updated']
+
+
+class PortfolioStore:
+    def __init__(self, db_file: str = "portfolios.db"):
+        self.db_file = db_file
+        self.init_database()
+
+    def _connect(self) -> sqlite3.Connection:
+        # isolation_level=None: işlemler açıkça BEGIN IMMEDIATE ile başlatılır
+        conn = sqlite3.connect(self.db_file, timeout=30, isolation_level=None)
+        conn.execute('PRAGMA journal_mode=WAL')
+        return conn
+
+    def init_database(self):
+        """Veritabanını başlat ve tabloları oluştur"""
+        conn = self._connect()
+        cursor = conn.cursor()
+
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS holdings (
+                user_id TEXT NOT NULL,
+                symbol TEXT NOT NULL,
+                quantity REAL NOT NULL,
+                avg_price REAL NOT NULL,
+                date_added TEXT NOT NULL,
+                last_updated TEXT NOT NULL,
+                PRIMARY KEY (user_id, symbol)
+            )
+        ''')
+        # Sembol bazlı toplu sorgular (tüm kullanıcıların sembolleri) için
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_holdings_symbol ON holdings (symbol)')
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS store_meta (
+                key TEXT PRIMARY KEY,
+                value TEXT NOT NULL
+            )
+        ''')
+
+        conn.close()
+
+    @staticmethod
+    def _row_to_holding(row) -> Dict:
+        return dict(zip(HOLDING_COLUMNS, row))
+
+    def get_holdings(self, user_id: str) -> List[Dict]:
+        """Kullanıcının pozisyonları (eklenme sırasına göre; güncelleme rowid'yi değiştirmez)"""
+        conn = self._connect()
+        rows = conn.execute(
+            '''SELECT symbol, quantity, avg_price, date_added, last_updated
+               FROM holdings WHERE user_id = ? ORDER BY rowid''',
+            (user_id,)
+        ).fetchall()
+        conn.close()
+        return [self._row_to_holding(row) for row in rows]
+
+    def get_holding(self, user_id: str, symbol: str) -> Optional[Dict]:
+        conn = self._connect()
+        row = conn.execute(
+            '''SELECT symbol, quantity, avg_price, date_added, last_updated
+               FROM holdings WHERE user_id = ? AND symbol = ?''',
+            (user_id, symbol)
+        ).fetchone()
+        conn.close()
+        return self._row_to_holding(row) if row else None
+
+    def add_holding(self, user_id: str, symbol: str, quantity: float, avg_price: float) -> Dict:
+        """Pozisyon ekle; varsa miktar artırılır ve ortalama maliyet ağırlıklı güncellenir (atomik)"""
+        today = datetime.now().strftime("%Y-%m-%d")
+        conn = self._connect()
+        try:
+            conn.execute('BEGIN IMMEDIATE')
+            conn.execute(
+                '''INSERT INTO holdings (user_id, symbol, quantity, avg_price, date_added, last_updated)
+                   VALUES (?, ?, ?, ?, ?, ?)
+                   ON CONFLICT (user_id, symbol) DO UPDATE SET
+                       avg_price = (quantity * avg_price + excluded.quantity * excluded.avg_price)
+                                   / (quantity + excluded.quantity),
+                       quantity = quantity + excluded.quantity,
+                       last_updated = excluded.last_updated''',
+                (user_id, symbol, quantity, avg_price, today, today)
+            )
+            row = conn.execute(
+                '''SELECT symbol, quantity, avg_price, date_added, last_updated
+                   FROM holdings WHERE user_id = ? AND symbol = ?''',
+                (user_id, symbol)
+            ).fetchone()
+            conn.execute('COMMIT')
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+        finally:
+            conn.close()
+        return self._row_to_holding(row)
+
+    def remove_holding(self, user_id: str, symbol: str, quantity: Optional[float] = None) -> Optional[Dict]:
+        """Pozisyonu tamamen (quantity None ya da mevcut miktardan büyükse) ya da kısmen çıkar (atomik).
+
+        Dönüş: güncel/çıkarılan pozisyon ve 'removed' bayrağı; pozisyon yoksa None.
+        """
+        conn = self._connect()
+        try:
+            conn.execute('BEGIN IMMEDIATE')
+            row = conn.execute(
+                '''SELECT symbol, quantity, avg_price, date_added, last_updated
+                   FROM holdings WHERE user_id = ? AND symbol = ?''',
+                (user_id, symbol)
+            ).fetchone()
+            if row is None:
+                conn.execute('ROLLBACK')
+                return None
+
+            holding = self._row_to_holding(row)
+            if quantity is None or quantity >= holding['quantity']:
+                conn.execute('DELETE FROM holdings WHERE user_id = ? AND symbol = ?', (user_id, symbol))
+                holding['removed'] = True
+            else:
+                holding['quantity'] -= quantity
+                holding['last_updated'] = datetime.now().strftime("%Y-%m-%d")
+                conn.execute(
+                    '''UPDATE holdings SET quantity = ?, last_updated = ?
+                       WHERE user_id = ? AND symbol = ?''',
+                    (holding['quantity'], holding['last_updated'], user_id, symbol)
+                )
+                holding['removed'] = False
+            conn.execute('COMMIT')
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+        finally:
+            conn.close()
+        return holding
+
+    def users(self) -> List[str]:
+        """Pozisyonu olan kullanıcılar"""
+        conn = self._connect()
+        rows = conn.execute('SELECT DISTINCT user_id FROM holdings ORDER BY user_id').fetchall()
+        conn.close()
+        return [row[0] for row in rows]
+
+    def all_holdings(self) -> Dict[str, List[Dict]]:
+        """Tüm kullanıcıların pozisyonları tek sorguda {kullanıcı: [pozisyon, ...]}"""
+        conn = self._connect()
+        rows = conn.execute(
+            '''SELECT user_id, symbol, quantity, avg_price, date_added, last_updated
+               FROM holdings ORDER BY user_id, rowid'''
+        ).fetchall()
+        conn.close()
+        portfolios: Dict[str, List[Dict]] = {}
+        for row in rows:
+            portfolios.setdefault(row[0], []).append(self._row_to_holding(row[1:]))
+        return portfolios
+
+    def migrate_from_json(self, json_file: str = "user_portfolios.json") -> int:
+        """Eski JSON portföy dosyasını bir kez içe aktar; aktarılan pozisyon sayısını döndür"""
+        if not os.path.exists(json_file):
+            return 0
+
+        conn = self._connect()
+        try:
+            conn.execute('BEGIN IMMEDIATE')
+            migrated = conn.execute("SELECT value FROM store_meta WHERE key = 'json_migrated'").fetchone()
+            if migrated:
+                conn.execute('ROLLBACK')
+                return 0
+
+            with open(json_file, 'r', encoding='utf-8') as f:
+                portfolios = json.load(f)
+
+            today = datetime.now().strftime("%Y-%m-%d")
+            rows = [
+                (user_id, stock['symbol'], float(stock['quantity']), float(stock['avg_price']),
+                 stock.get('date_added', today), stock.get('last_updated', today))
+                for user_id, stocks in portfolios.items() for stock in stocks
+            ]
+            # Depoda zaten olan pozisyonlar korunur
+            conn.executemany(
+                '''INSERT OR IGNORE INTO holdings (user_id, symbol, quantity, avg_price, date_added, last_updated)
+                   VALUES (?, ?, ?, ?, ?, ?)''',
+                rows
+            )
+            conn.execute("INSERT INTO store_meta (key, value) VALUES ('json_migrated', ?)",
+                         (f"{os.path.abspath(json_file)} @ {datetime.now().isoformat(timespec='seconds')}",))
+            conn.execute('COMMIT')
+        except Exception as e:
+            conn.execute('ROLLBACK')
+            print(f"Portföy JSON aktarım hatası: {e}")
+            return 0
+        finally:
+            conn.close()
+
+        print(f"✅ {len(rows)} pozisyon {json_file} dosyasından aktarıldı")
+        return len(rows)
+
+
+_store_instances: Dict[str, PortfolioStore] = {}
+_store_lock = threading.Lock()
+
+
+def get_portfolio_store(db_file: str = "portfolios.db") -> PortfolioStore:
+    """Dosya başına süreç genelinde tek PortfolioStore"""
+    with _store_lock:
+        if db_file not in _store_instances:
+            _store_instances[db_file] = PortfolioStore(db_file)
+        return _store_instances[db_file]
+
+
+if __name__ == "__main__":
+    import argparse
+    import tempfile
+    import time
+
+    parser = argparse.ArgumentParser(description="Portföy deposu")
+    parser.add_argument('--db', default="portfolios.db")
+    parser.add_argument('--migrate', metavar='JSON', help="Eski JSON portföy dosyasını içe aktar")
+    parser.add_argument('--benchmark', action='store_true', help="JSON yeniden yazımıyla süre karşılaştırması")
+    args = parser.parse_args()
+
+    if args.migrate:
+        get_portfolio_store(args.db).migrate_from_json(args.migrate)
+
+    if args.benchmark:
+        with tempfile.TemporaryDirectory() as tmp:
+            n_users = 5000
+            portfolios = {f"user{i}": [{"symbol": f"SYM{j}", "quantity": 10.0, "avg_price": 20.0,
+                                        "date_added": "2025-01-01", "last_updated": "2025-01-01"}
+                                       for j in range(10)] for i in range(n_users)}
+            json_file = os.path.join(tmp, "user_portfolios.json")
+            t0 = time.perf_counter()
+            for _ in range(20):
+                with open(json_file, 'w', encoding='utf-8') as f:
+                    json.dump(portfolios, f, indent=2, ensure_ascii=False)
+            json_ms = (time.perf_counter() - t0) / 20 * 1000
+
+            store = PortfolioStore(os.path.join(tmp, "portfolios.db"))
+            store.migrate_from_json(json_file)
+            t0 = time.perf_counter()
+            for i in range(200):
+                store.add_holding(f"user{i}", "THYAO", 5, 40.0)
+            sqlite_ms = (time.perf_counter() - t0) / 200 * 1000
+            print(f"{n_users} kullanıcı: JSON yeniden yazım {json_ms:.1f} ms/değişiklik | "
+                  f"SQLite tek satır {sqlite_ms:.2f} ms/değişiklik")
@@ -0,0 +1,257 @@
+# portfolio_valuation.py
+# Tüm kullanıcı portföylerinin tek fiyat anlık görüntüsüyle toplu değerlemesi:
+# tüm kullanıcıların sembollerinin birleşimi bir kez fiyatlanır, değerler
+# (kullanıcı x sembol) miktar matrisi x fiyat vektörüyle tek çarpımda hesaplanır
+# ve günlük anlık görüntüler SQLite'a yazılır (gün sonu raporu, değer geçmişi).
+#
+# Kullanım (seans kapanışından sonra, ör. cron ile her iş günü 18:45):
+#   python portfolio_valuation.py
+#   python portfolio_valuation.py --date 2025-01-10 --no-save
+
+import sqlite3
+from datetime import datetime
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from price_store import is_market_open, last_session_close
+from universe import to_yahoo_symbol
+
+SNAPSHOT_COLUMNS = ['current_value', 'total_invested', 'unrealized_pnl', 'realized_pnl', 'dividends',
+                    'n_positions', 'missing_prices']
+
+
+class SnapshotStore:
+    def __init__(self, db_file: str = "portfolios.db"):
+        self.db_file = db_file
+        self.init_database()
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.db_file, timeout=30)
+        conn.execute('PRAGMA journal_mode=WAL')
+        return conn
+
+    def init_database(self):
+        """Veritabanını başlat ve tabloları oluştur"""
+        conn = self._connect()
+        cursor = conn.cursor()
+
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS portfolio_snapshots (
+                snapshot_date TEXT NOT NULL,
+                user_id TEXT NOT NULL,
+                current_value REAL NOT NULL,
+                total_invested REAL NOT NULL,
+                unrealized_pnl REAL NOT NULL,
+                realized_pnl REAL NOT NULL,
+                dividends REAL NOT NULL,
+                n_positions INTEGER NOT NULL,
+                missing_prices INTEGER NOT NULL,
+                created_at TEXT NOT NULL,
+                PRIMARY KEY (user_id, snapshot_date)
+            )
+        ''')
+        # Değerlemede kullanılan ortak fiyat anlık görüntüsü
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS snapshot_prices (
+                snapshot_date TEXT NOT NULL,
+                symbol TEXT NOT NULL,
+                price REAL NOT NULL,
+                PRIMARY KEY (snapshot_date, symbol)
+            )
+        ''')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_snapshots_date ON portfolio_snapshots (snapshot_date)')
+
+        conn.commit()
+        conn.close()
+
+    def save(self, snapshot_date: str, valuations: pd.DataFrame, prices: Dict[str, float]):
+        """Günün anlık görüntüsünü tek işlemde yaz (aynı gün tekrar çalışırsa güncellenir)"""
+        created_at = datetime.now().isoformat(timespec='seconds')
+        conn = self._connect()
+        with conn:
+            conn.executemany(
+                f'''INSERT OR REPLACE INTO portfolio_snapshots
+                    (snapshot_date, user_id, {", ".join(SNAPSHOT_COLUMNS)}, created_at)
+                    VALUES (?, ?, {", ".join("?" * len(SNAPSHOT_COLUMNS))}, ?)''',
+                [(snapshot_date, user_id, *(float(row[c]) if c not in ('n_positions', 'missing_prices') else int(row[c])
+                                            for c in SNAPSHOT_COLUMNS), created_at)
+                 for user_id, row in valuations.iterrows()]
+            )
+            conn.executemany(
+                'INSERT OR REPLACE INTO snapshot_prices (snapshot_date, symbol, price) VALUES (?, ?, ?)',
+                [(snapshot_date, symbol, price) for symbol, price in prices.items()]
+            )
+        conn.close()
+
+    def history(self, user_id: str, start: Optional[str] = None) -> pd.DataFrame:
+        """Kullanıcının günlük değer geçmişi (index: tarih)"""
+        query = f'''SELECT snapshot_date, {", ".join(SNAPSHOT_COLUMNS)} FROM portfolio_snapshots
+                    WHERE user_id = ?'''
+        params: List = [user_id]
+        if start is not None:
+            query += ' AND snapshot_date >= ?'
+            params.append(start)
+        conn = self._connect()
+        df = pd.read_sql_query(query + ' ORDER BY snapshot_date', conn, params=params)
+        conn.close()
+        return df.set_index('snapshot_date')
+
+    def for_date(self, snapshot_date: str) -> pd.DataFrame:
+        """Bir günün tüm kullanıcı değerlemeleri (gün sonu raporu)"""
+        conn = self._connect()
+        df = pd.read_sql_query(
+            f'''SELECT user_id, {", ".join(SNAPSHOT_COLUMNS)} FROM portfolio_snapshots
+                WHERE snapshot_date = ? ORDER BY current_value DESC''',
+            conn, params=[snapshot_date]
+        )
+        conn.close()
+        return df.set_index('user_id')
+
+
+def value_positions(positions: List[Dict], prices: Dict[str, float]) -> pd.DataFrame:
+    """Kullanıcı x sembol miktar matrisi x fiyat vektörüyle tüm kullanıcıların toplamları.
+
+    positions: TransactionLedger.all_positions() satırları; prices: sembol -> fiyat
+    (KCHOL ve KCHOL.IS aynı sembol sayılır; fiyatı olmayan pozisyonlar değer, yatırım ve
+    gerçekleşmemiş kâr/zarar toplamlarına katılmaz, missing_prices'ta sayılır).
+    """
+    if not positions:
+        return pd.DataFrame(columns=SNAPSHOT_COLUMNS, index=pd.Index([], name='user_id'))
+
+    def column(name: str) -> np.ndarray:
+        return np.fromiter((p[name] for p in positions), dtype=float, count=len(positions))
+
+    user_codes, users = pd.factorize(np.array([p['user_id'] for p in positions], dtype=object))
+    # Sembol normalizasyonu yalnızca tekil semboller için
+    raw_codes, raw_symbols = pd.factorize(np.array([p['symbol'] for p in positions], dtype=object))
+    key_codes, symbols = pd.factorize(np.array([to_yahoo_symbol(s) for s in raw_symbols], dtype=object))
+    symbol_codes = key_codes[raw_codes]
+
+    cells = user_codes * len(symbols) + symbol_codes
+    shape = (len(users), len(symbols))
+    quantity = np.bincount(cells, weights=column('quantity'), minlength=shape[0] * shape[1]).reshape(shape)
+    cost = np.bincount(cells, weights=column('cost_basis'), minlength=shape[0] * shape[1]).reshape(shape)
+
+    price_by_key = {to_yahoo_symbol(symbol): price for symbol, price in prices.items() if price and price > 0}
+    price_vector = np.array([price_by_key.get(symbol, np.nan) for symbol in symbols])
+    priced = ~np.isnan(price_vector)
+
+    current_value = quantity @ np.where(priced, price_vector, 0.0)
+    open_position = quantity > 0
+    # Fiyatı olmayan pozisyonun maliyeti de dışarıda kalır; yoksa değeri 0 sayılıp zarar gibi görünür
+    invested = cost @ priced.astype(float)
+
+    result = pd.DataFrame({
+        'current_value': current_value,
+        'total_invested': invested,
+        'unrealized_pnl': current_value - invested,
+        'realized_pnl': np.bincount(user_codes, weights=column('realized_pnl'), minlength=len(users)),
+        'dividends': np.bincount(user_codes, weights=column('dividends'), minlength=len(users)),
+        'n_positions': open_position.sum(axis=1),
+        'missing_prices': (open_position & ~priced).sum(axis=1),
+    }, index=pd.Index(users, name='user_id'))
+    return result
+
+
+def run_valuation(manager=None, snapshot_date: Optional[str] = None, save: bool = True,
+                  store: Optional[SnapshotStore] = None) -> Optional[pd.DataFrame]:
+    """Tüm portföyleri tek fiyat anlık görüntüsüyle değerle ve (isteğe bağlı) günlük kaydı yaz"""
+    # Seans sürerken fiyatlar gün içi; gün sonu kaydı önceki seansın üzerine yazılmamalı
+    if save and is_market_open():
+        print("❌ Seans açıkken gün sonu değerlemesi kaydedilmez (kapanıştan sonra çalıştırın ya da --no-save)")
+        return None
+
+    if manager is None:
+        from portfolio_manager import PortfolioManager
+        manager = PortfolioManager()
+
+    positions = manager.ledger.all_positions()
+    # Tüm kullanıcıların açık pozisyonlarındaki sembollerin birleşimi tek seferde fiyatlanır.
+    # Önbellek ve varsayılan fiyatlar kullanılmaz; fiyatı bulunamayanlar missing_prices'a sayılır.
+    symbols = list(dict.fromkeys(to_yahoo_symbol(p['symbol']) for p in positions if p['quantity'] > 0))
+    prices = manager.get_live_prices(symbols) if symbols else {}
+    prices = {symbol: price for symbol, price in prices.items() if price and price > 0}
+
+    valuations = value_positions(positions, prices)
+    if save and not valuations.empty:
+        # Seans kapalıyken fiyatlar son tamamlanmış seansa aittir
+        snapshot_date = snapshot_date or last_session_close().date().isoformat()
+        (store or SnapshotStore(manager.store.db_file)).save(snapshot_date, valuations, prices)
+    return valuations
+
+
+if __name__ == "__main__":
+    import argparse
+    import time
+
+    parser = argparse.ArgumentParser(description="Tüm portföylerin toplu günlük değerlemesi")
+    parser.add_argument('--date', default=None, help="Anlık görüntü tarihi (varsayılan: son tamamlanmış seans)")
+    parser.add_argument('--no-save', action='store_true')
+    parser.add_argument('--benchmark', action='store_true', help="Sentetik 10.000 kullanıcıyla süre ölçümü")
+    parser.add_argument('--check', action='store_true', help="Fiyatı eksik pozisyon kontrolü (ağ gerektirmez)")
+    args = parser.parse_args()
+
+    if args.check:
+        # 1000 TL maliyetli fiyatlı pozisyon 1010 TL, fiyatı olmayan pozisyon toplamlara girmemeli
+        positions = [
+            {'user_id': 'u1', 'symbol': 'KCHOL', 'quantity': 10.0, 'cost_basis': 1000.0, 'realized_pnl': 0.0, 'dividends': 0.0},
+            {'user_id': 'u1', 'symbol': 'THYAO', 'quantity': 5.0, 'cost_basis': 1000.0, 'realized_pnl': 0.0, 'dividends': 0.0},
+        ]
+        row = value_positions(positions, {'KCHOL.IS': 101.0}).loc['u1']
+        assert abs(row['current_value'] - 1010.0) < 1e-9
+        assert abs(row['total_invested'] - 1000.0) < 1e-9
+        assert abs(row['unrealized_pnl'] - 10.0) < 1e-9
+        assert row['n_positions'] == 2 and row['missing_prices'] == 1
+        print("✅ value_positions kontrolleri geçti")
+    elif args.benchmark:
+        rng = np.random.default_rng(0)
+        universe = [f"SYM{i}" for i in range(100)]
+        positions = [{'user_id': f"user{u}", 'symbol': symbol, 'quantity': float(rng.integers(1, 100)),
+                      'cost_basis': float(rng.uniform(100, 5000)), 'realized_pnl': 0.0, 'dividends': 0.0}
+                     for u in range(10000) for symbol in rng.choice(universe, 20, replace=False)]
+        prices = {symbol: float(rng.uniform(5, 200)) for symbol in universe}
+
+        calls = []
+
+        def fetch(symbols):
+            # Ağ çağrısını taklit eder: çağrı başına 50 ms
+            calls.append(len(symbols))
+            time.sleep(0.05)
+            return {symbol: prices[symbol] for symbol in symbols}
+
+        # Eski yol: her kullanıcı için ayrı fiyat isteği ve toplama (önbellekli)
+        from quote_cache import QuoteCache
+        cache = QuoteCache(fetch, ttl_seconds=3600)
+        t0 = time.perf_counter()
+        by_user: Dict[str, List[Dict]] = {}
+        for p in positions:
+            by_user.setdefault(p['user_id'], []).append(p)
+        totals = {}
+        for user_id, rows in by_user.items():
+            user_prices = cache.get_many([p['symbol'] for p in rows])
+            totals[user_id] = sum(p['quantity'] * user_prices[p['symbol']] for p in rows)
+        per_user_ms = (time.perf_counter() - t0) * 1000
+        per_user_calls = len(calls)
+
+        # Yeni yol: sembol birleşimi tek istekte, değerler tek matris çarpımında
+        calls.clear()
+        cache = QuoteCache(fetch, ttl_seconds=3600)
+        t0 = time.perf_counter()
+        union = list(dict.fromkeys(p['symbol'] for p in positions))
+        valuations = value_positions(positions, cache.get_many(union))
+        batch_ms = (time.perf_counter() - t0) * 1000
+
+        diff = max(abs(totals[u] - valuations.loc[u, 'current_value']) for u in list(totals)[:100])
+        print(f"{len(valuations)} kullanıcı x 20 pozisyon: kullanıcı başına {per_user_ms:.0f} ms "
+              f"({per_user_calls} fiyat isteği, {len(by_user)} önbellek sorgusu) | toplu {batch_ms:.0f} ms "
+              f"({len(calls)} fiyat isteği, 1 önbellek sorgusu) | fark {diff:.2e}")
+    else:
+        t0 = time.perf_counter()
+        valuations = run_valuation(snapshot_date=args.date, save=not args.no_save)
+        if valuations is None:
+            raise SystemExit(1)
+        print(f"✅ {len(valuations)} portföy değerlendi ({time.perf_counter() - t0:.2f}s)")
+        if not valuations.empty:
+            print(valuations.round(2).to_string())
@@ -0,0 +1,236 @@
+# prediction_backtest.py
+# Kayıtlı günlük tahminlerin gerçekleşen ertesi gün kapanışlarıyla karşılaştırılması:
+# hisse başına MAPE, yön isabeti ve hata dağılımı. Sonuçlar (skor kartları) SQLite'a
+# yazılır; Streamlit sayfası hesaplama yapmadan okur.
+#
+# Kullanım (gece toplu tahminden sonra):
+#   python prediction_backtest.py
+#   python prediction_backtest.py --days 180
+
+import json
+import sqlite3
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from price_store import PriceStore, get_price_store
+from universe import to_yahoo_symbol
+
+ALL_SYMBOLS = 'TÜMÜ'
+
+# Hata dağılımı histogramı: işaretli yüzde hata kutuları
+ERROR_BINS = np.array([-np.inf, -5, -3, -2, -1, -0.5, 0, 0.5, 1, 2, 3, 5, np.inf])
+ERROR_PERCENTILES = [5, 25, 50, 75, 95]
+
+
+@dataclass
+class Scorecard:
+    symbol: str
+    n_predictions: int
+    mape: float              # Ortalama mutlak yüzde hata
+    naive_mape: float        # 'Yarın = bugün' tahmininin MAPE'si (kıyas)
+    hit_rate: float          # Yön isabeti (%)
+    bias: float              # Ortalama işaretli yüzde hata (+ = fazla tahmin)
+    percentiles: Dict[str, float]
+    histogram: List[int]     # ERROR_BINS kutularındaki tahmin sayıları
+    first_date: str
+    last_date: str
+    computed_at: str
+
+
+def load_stored_predictions(db_file: str = "predictions.db", start: Optional[str] = None) -> pd.DataFrame:
+    """predictions tablosunu tek sorguda oku"""
+    conn = sqlite3.connect(db_file)
+    query = '''SELECT trade_date, symbol, current_price, predicted_price, prediction_date, model_version
+               FROM predictions'''
+    params: List = []
+    if start is not None:
+        query += ' WHERE trade_date >= ?'
+        params.append(start)
+    df = pd.read_sql_query(query, conn, params=params)
+    conn.close()
+    return df
+
+
+def attach_realized(predictions: pd.DataFrame, store: Optional[PriceStore] = None) -> pd.DataFrame:
+    """Her tahmine gerçekleşen kapanışı ekle (henüz gerçekleşmemişler çıkarılır).
+
+    Tahminler düzeltilmiş fiyatlarla yapıldığından gerçekleşen fiyat, ham kapanışların
+    oranıyla (tahmin günü -> hedef gün) tahmin anındaki fiyata taşınır; böylece sonradan
+    gelen temettü/bölünme düzeltmeleri karşılaştırmayı bozmaz.
+    """
+    if predictions.empty:
+        return predictions.assign(realized_price=pd.Series(dtype=float))
+
+    store = store or get_price_store()
+    yahoo = predictions['symbol'].map(to_yahoo_symbol)
+    bars = store.read_many(yahoo.unique().tolist(), predictions['trade_date'].min(),
+                           predictions['prediction_date'].max())
+    if bars.empty:
+        return predictions.iloc[0:0].assign(realized_price=pd.Series(dtype=float))
+
+    closes = bars.pivot_table(index='Date', columns='symbol', values='close')
+    values = closes.to_numpy()
+    col = closes.columns.get_indexer(yahoo)
+    base_row = closes.index.get_indexer(pd.to_datetime(predictions['trade_date']))
+    target_row = closes.index.get_indexer(pd.to_datetime(predictions['prediction_date']))
+
+    found = (col >= 0) & (base_row >= 0) & (target_row >= 0)
+    base = np.full(len(predictions), np.nan)
+    target = np.full(len(predictions), np.nan)
+    base[found] = values[base_row[found], col[found]]
+    target[found] = values[target_row[found], col[found]]
+
+    result = predictions.assign(realized_price=predictions['current_price'].to_numpy() * target / base)
+    return result[np.isfinite(result['realized_price'])].reset_index(drop=True)
+
+
+def compute_scorecards(realized: pd.DataFrame) -> List[Scorecard]:
+    """Tüm semboller için skor kartları tek geçişte (grup indeksleriyle bincount/sıralama)"""
+    if realized.empty:
+        return []
+
+    predicted = realized['predicted_price'].to_numpy(float)
+    current = realized['current_price'].to_numpy(float)
+    actual = realized['realized_price'].to_numpy(float)
+
+    error_pct = (predicted - actual) / actual * 100
+    abs_error = np.abs(error_pct)
+    naive_error = np.abs(current - actual) / actual * 100
+    hit = (np.sign(predicted - current) == np.sign(actual - current)).astype(float)
+    bins = np.digitize(error_pct, ERROR_BINS[1:-1])
+
+    codes, symbols = pd.factorize(realized['symbol'])
+    # Son grup tüm evren
+    groups = [(symbol, codes == i) for i, symbol in enumerate(symbols)] + [(ALL_SYMBOLS, slice(None))]
+    counts = np.bincount(codes, minlength=len(symbols))
+
+    def per_group(values):
+        return np.append(np.bincount(codes, weights=values, minlength=len(symbols)) / counts, values.mean())
+
+    mape, naive, hits, bias = per_group(abs_error), per_group(naive_error), per_group(hit), per_group(error_pct)
+    histograms = np.zeros((len(symbols) + 1, len(ERROR_BINS) - 1), dtype=int)
+    np.add.at(histograms, (codes, bins), 1)
+    histograms[-1] = histograms[:-1].sum(axis=0)
+
+    dates = realized['trade_date'].to_numpy()
+    computed_at = datetime.now().isoformat(timespec='seconds')
+    scorecards = []
+    for i, (symbol, mask) in enumerate(groups):
+        group_errors = error_pct[mask]
+        percentiles = np.percentile(group_errors, ERROR_PERCENTILES)
+        scorecards.append(Scorecard(
+            symbol=symbol,
+            n_predictions=int(len(group_errors)),
+            mape=round(float(mape[i]), 4),
+            naive_mape=round(float(naive[i]), 4),
+            hit_rate=round(float(hits[i]) * 100, 2),
+            bias=round(float(bias[i]), 4),
+            percentiles={f"p{p}": round(float(v), 4) for p, v in zip(ERROR_PERCENTILES, percentiles)},
+            histogram=histograms[i].tolist(),
+            first_date=str(dates[mask].min()),
+            last_date=str(dates[mask].max()),
+            computed_at=computed_at
+        ))
+    return scorecards
+
+
+class ScorecardStore:
+    def __init__(self, db_file: str = "predictions.db"):
+        self.db_file = db_file
+        self.init_database()
+
+    def init_database(self):
+        """Veritabanını başlat ve tabloları oluştur"""
+        conn = sqlite3.connect(self.db_file, timeout=30)
+        cursor = conn.cursor()
+
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS prediction_scorecards (
+                symbol TEXT PRIMARY KEY,
+                n_predictions INTEGER NOT NULL,
+                mape REAL NOT NULL,
+                naive_mape REAL NOT NULL,
+                hit_rate REAL NOT NULL,
+                bias REAL NOT NULL,
+                percentiles TEXT NOT NULL,
+                histogram TEXT NOT NULL,
+                first_date TEXT NOT NULL,
+                last_date TEXT NOT NULL,
+                computed_at TEXT NOT NULL
+            )
+        ''')
+
+        conn.commit()
+        conn.close()
+
+    def save_all(self, scorecards: List[Scorecard]):
+        """Skor kartlarını tek işlemde yenile"""
+        conn = sqlite3.connect(self.db_file, timeout=30)
+        with conn:
+            conn.execute('DELETE FROM prediction_scorecards')
+            conn.executemany(
+                '''INSERT INTO prediction_scorecards VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)''',
+                [(s.symbol, s.n_predictions, s.mape, s.naive_mape, s.hit_rate, s.bias, json.dumps(s.percentiles),
+                  json.dumps(s.histogram), s.first_date, s.last_date, s.computed_at) for s in scorecards]
+            )
+        conn.close()
+
+    def load_all(self) -> List[Scorecard]:
+        """Kayıtlı skor kartları (evren satırı en başta)"""
+        conn = sqlite3.connect(self.db_file, timeout=30)
+        rows = conn.execute('SELECT * FROM prediction_scorecards ORDER BY symbol = ? DESC, mape',
+                            (ALL_SYMBOLS,)).fetchall()
+        conn.close()
+
+        scorecards = []
+        for row in rows:
+            values = list(row)
+            values[6] = json.loads(values[6])
+            values[7] = json.loads(values[7])
+            scorecards.append(Scorecard(*values))
+        return scorecards
+
+
+def bin_labels() -> List[str]:
+    """Histogram kutularının etiketleri"""
+    edges = ERROR_BINS
+    labels = []
+    for low, high in zip(edges[:-1], edges[1:]):
+        if np.isinf(low):
+            labels.append(f"< {high:g}%")
+        elif np.isinf(high):
+            labels.append(f"> {low:g}%")
+        else:
+            labels.append(f"{low:g}% / {high:g}%")
+    return labels
+
+
+def run_backtest(db_file: str = "predictions.db", days: Optional[int] = 365,
+                 store: Optional[PriceStore] = None) -> List[Scorecard]:
+    """Kayıtlı tahminleri gerçekleşenlerle karşılaştır ve skor kartlarını yaz"""
+    start = (datetime.now() - timedelta(days=days)).date().isoformat() if days else None
+    realized = attach_realized(load_stored_predictions(db_file, start), store)
+    scorecards = compute_scorecards(realized)
+    ScorecardStore(db_file).save_all(scorecards)
+    return scorecards
+
+
+if __name__ == "__main__":
+    import argparse
+    import time
+
+    parser = argparse.ArgumentParser(description="Kayıtlı tahminlerin başarı ölçümü")
+    parser.add_argument('--db', default="predictions.db")
+    parser.add_argument('--days', type=int, default=365)
+    args = parser.parse_args()
+
+    t0 = time.perf_counter()
+    results = run_backtest(args.db, args.days)
+    print(f"✅ {max(len(results) - 1, 0)} hisse için skor kartı yazıldı ({time.perf_counter() - t0:.2f}s)")
+    for card in results:
+        print(f"  {card.symbol:6s} n={card.n_predictions:4d} MAPE {card.mape:6.2f}% "
+              f"(naif {card.naive_mape:6.2f}%) isabet {card.hit_rate:5.1f}%")
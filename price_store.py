@@ -0,0 +1,573 @@
+# price_store.py
+# Yerel OHLCV fiyat deposu - sembol başına artımlı (incremental) güncelleme
+
+import os
+import sqlite3
+import threading
+from collections import defaultdict
+from datetime import datetime, date, timedelta, time as dtime
+from typing import Dict, List, Optional
+from zoneinfo import ZoneInfo
+
+import pandas as pd
+import yfinance as yf
+
+from single_flight import market_data_flight
+from upstream_replay import install_from_env
+
+# UPSTREAM_MODE=record/replay ise yfinance ve HTTP yanıtlarını kaydet/tekrar oynat
+# (fiyat deposunu kullanan tüm betikler için ortak giriş noktası)
+install_from_env()
+
+# Depoda tutulan sütunlar (yfinance auto_adjust=False çıktısı)
+PRICE_COLUMNS = ['open', 'high', 'low', 'close', 'adj_close', 'volume']
+
+# BIST seans bilgisi (kapanıştan sonra gün içi tekrar indirme gerekmez)
+MARKET_TZ = ZoneInfo('Europe/Istanbul')
+MARKET_OPEN = dtime(10, 0)
+MARKET_CLOSE = dtime(18, 15)
+
+
+def normalize_ohlcv(df: pd.DataFrame) -> pd.DataFrame:
+    """yfinance çıktısını depo formatına çevir (küçük harf sütunlar, tarih index)"""
+    if df is None or df.empty:
+        return pd.DataFrame(columns=PRICE_COLUMNS)
+
+    df = df.copy()
+
+    # Tek sembolde bile yeni yfinance sürümleri MultiIndex (Price, Ticker) döndürür
+    if isinstance(df.columns, pd.MultiIndex):
+        df.columns = [col[0] for col in df.columns]
+
+    df.columns = [str(col).lower().replace(' ', '_') for col in df.columns]
+
+    if 'close' not in df.columns:
+        return pd.DataFrame(columns=PRICE_COLUMNS)
+    if 'adj_close' not in df.columns:
+        df['adj_close'] = df['close']
+
+    df = df[PRICE_COLUMNS].dropna(subset=['close'])
+
+    index = pd.to_datetime(df.index)
+    if index.tz is not None:
+        index = index.tz_localize(None)
+    df.index = index.normalize()
+    df.index.name = 'Date'
+    return df[~df.index.duplicated(keep='last')].sort_index()
+
+
+def download_many(symbols: List[str], start: date, end: Optional[date] = None,
+                  chunk_size: int = 100) -> Dict[str, pd.DataFrame]:
+    """Çoklu sembolü gruplanmış yf.download çağrılarıyla indir ve sembol başına böl.
+
+    Evren chunk_size'lık parçalara bölünür; her parça tek bir çağrıdır.
+    """
+    end = end or (date.today() + timedelta(days=1))
+    symbols = list(dict.fromkeys(s.upper() for s in symbols))
+    frames = {}
+
+    for i in range(0, len(symbols), chunk_size):
+        chunk = symbols[i:i + chunk_size]
+        try:
+            # Aynı parça ve aralık için eşzamanlı indirmeler tek upstream çağrısını paylaşır
+            data = market_data_flight.do(
+                ('yf.download', tuple(chunk), start, end),
+                yf.download, chunk, start=start.isoformat(), end=end.isoformat(),
+                group_by='ticker', progress=False, auto_adjust=False,
+                actions=False, threads=True
+            )
+        except Exception as e:
+            print(f"Toplu indirme hatası ({len(chunk)} sembol): {e}")
+            continue
+
+        if data is None or data.empty:
+            continue
+
+        tickers = set(data.columns.get_level_values(0)) if isinstance(data.columns, pd.MultiIndex) else set()
+        for symbol in chunk:
+            if symbol in tickers:
+                frames[symbol] = normalize_ohlcv(data[symbol])
+            elif not tickers and len(chunk) == 1:
+                frames[symbol] = normalize_ohlcv(data)
+
+    return frames
+
+
+def is_market_open(now: Optional[datetime] = None) -> bool:
+    """BIST seansı şu an açık mı? (hafta içi MARKET_OPEN - MARKET_CLOSE)"""
+    now = now or datetime.now(MARKET_TZ)
+    now = now.astimezone(MARKET_TZ) if now.tzinfo else now.replace(tzinfo=MARKET_TZ)
+    return now.weekday() < 5 and MARKET_OPEN <= now.time() < MARKET_CLOSE
+
+
+def last_session_close(now: Optional[datetime] = None) -> datetime:
+    """Son tamamlanmış seansın kapanış zamanını döndür (hafta sonları atlanır)"""
+    now = now or datetime.now(MARKET_TZ)
+    candidate = datetime.combine(now.date(), MARKET_CLOSE, tzinfo=MARKET_TZ)
+    if candidate > now:
+        candidate -= timedelta(days=1)
+    while candidate.weekday() >= 5:
+        candidate -= timedelta(days=1)
+    return candidate
+
+
+class PriceStore:
+    def __init__(self, db_file: str = "price_store.db", max_age_minutes: int = 15, chunk_size: int = 100):
+        self.db_file = db_file
+        self.max_age = timedelta(minutes=max_age_minutes)
+        self.chunk_size = chunk_size
+        self._lock = threading.RLock()
+        self.init_database()
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.db_file, timeout=30)
+        conn.execute('PRAGMA journal_mode=WAL')
+        return conn
+
+    def init_database(self):
+        """Veritabanını başlat ve tabloları oluştur"""
+        conn = self._connect()
+        cursor = conn.cursor()
+
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS prices (
+                symbol TEXT NOT NULL,
+                date TEXT NOT NULL,
+                open REAL,
+                high REAL,
+                low REAL,
+                close REAL NOT NULL,
+                adj_close REAL,
+                volume REAL,
+                PRIMARY KEY (symbol, date)
+            ) WITHOUT ROWID
+        ''')
+
+        # Sembol başına kapsanan aralık ve son başarılı indirme zamanı
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS symbols (
+                symbol TEXT PRIMARY KEY,
+                first_date TEXT NOT NULL,
+                last_fetched_at TEXT NOT NULL
+            )
+        ''')
+        # Boş dönen indirmeler (veri yok ya da hata): her çağrıda yeniden denenmesin
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS empty_fetches (
+                symbol TEXT PRIMARY KEY,
+                start TEXT NOT NULL,
+                checked_at TEXT NOT NULL
+            )
+        ''')
+
+        conn.commit()
+        conn.close()
+
+    # ------------------------------------------------------------------
+    # Okuma
+    # ------------------------------------------------------------------
+    def get_history(self, symbol: str, start, end=None, adjusted: bool = True) -> Optional[pd.DataFrame]:
+        """Sembol için [start, end] aralığındaki günlük barları döndür.
+
+        Eksik barlar (son kayıttan sonrası veya istenen başlangıçtan öncesi)
+        indirilip depoya eklenir; sıcak istekler ağa hiç çıkmaz.
+        """
+        symbol = symbol.upper()
+        start = pd.Timestamp(start).normalize()
+        end = pd.Timestamp(end).normalize() if end is not None else pd.Timestamp(date.today())
+
+        # Aynı (sembol, aralık) için eşzamanlı istekler tek bir güncellemeyi bekler
+        df = market_data_flight.do(('history', self.db_file, symbol, start, end, adjusted),
+                                   self._get_history, symbol, start, end, adjusted)
+        return None if df is None else df.copy()
+
+    def _get_history(self, symbol: str, start: pd.Timestamp, end: pd.Timestamp, adjusted: bool) -> Optional[pd.DataFrame]:
+        try:
+            self.ensure(symbol, start.date())
+        except Exception as e:
+            print(f"Fiyat deposu güncelleme hatası ({symbol}): {e}")
+
+        df = self.read(symbol, start, end)
+        if df is None:
+            return None
+        return self.apply_adjustment(df) if adjusted else df.drop(columns=['adj_close'])
+
+    def read(self, symbol: str, start=None, end=None) -> Optional[pd.DataFrame]:
+        """Depodaki barları ağa çıkmadan oku"""
+        query = f"SELECT date, {', '.join(PRICE_COLUMNS)} FROM prices WHERE symbol = ?"
+        params: List = [symbol.upper()]
+        if start is not None:
+            query += " AND date >= ?"
+            params.append(pd.Timestamp(start).strftime('%Y-%m-%d'))
+        if end is not None:
+            query += " AND date <= ?"
+            params.append(pd.Timestamp(end).strftime('%Y-%m-%d'))
+        query += " ORDER BY date"
+
+        conn = self._connect()
+        rows = conn.execute(query, params).fetchall()
+        conn.close()
+
+        if not rows:
+            return None
+
+        df = pd.DataFrame(rows, columns=['Date'] + PRICE_COLUMNS)
+        df['Date'] = pd.to_datetime(df['Date'])
+        return df.set_index('Date')
+
+    def read_many(self, symbols: List[str], start=None, end=None) -> pd.DataFrame:
+        """Birden fazla sembolün barlarını tek sorguda uzun formatta oku (symbol, Date, ...)"""
+        symbols = list(dict.fromkeys(s.upper() for s in symbols))
+        frames = []
+        conn = self._connect()
+        try:
+            # SQLite parametre sınırı için parçalara böl
+            for i in range(0, len(symbols), 500):
+                chunk = symbols[i:i + 500]
+                query = (f"SELECT symbol, date, {', '.join(PRICE_COLUMNS)} FROM prices "
+                         f"WHERE symbol IN ({', '.join('?' * len(chunk))})")
+                params: List = list(chunk)
+                if start is not None:
+                    query += " AND date >= ?"
+                    params.append(pd.Timestamp(start).strftime('%Y-%m-%d'))
+                if end is not None:
+                    query += " AND date <= ?"
+                    params.append(pd.Timestamp(end).strftime('%Y-%m-%d'))
+                rows = conn.execute(query, params).fetchall()
+                frames.append(pd.DataFrame(rows, columns=['symbol', 'Date'] + PRICE_COLUMNS))
+        finally:
+            conn.close()
+
+        df = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame(columns=['symbol', 'Date'] + PRICE_COLUMNS)
+        df['Date'] = pd.to_datetime(df['Date'], format='%Y-%m-%d')
+        return df
+
+    @staticmethod
+    def apply_adjustment(df: pd.DataFrame) -> pd.DataFrame:
+        """Temettü/bölünme düzeltmesi uygula (yfinance auto_adjust=True ile aynı)"""
+        df = df.copy()
+        ratio = (df['adj_close'] / df['close']).fillna(1.0)
+        for col in ['open', 'high', 'low', 'close']:
+            df[col] = df[col] * ratio
+        return df.drop(columns=['adj_close'])
+
+    # ------------------------------------------------------------------
+    # Güncelleme
+    # ------------------------------------------------------------------
+    def _get_meta(self, symbol: str) -> Optional[Dict]:
+        return self._get_metas([symbol])[symbol]
+
+    def _get_metas(self, symbols: List[str]) -> Dict[str, Optional[Dict]]:
+        """Sembollerin depo durumunu tek bağlantıyla oku"""
+        metas = {}
+        conn = self._connect()
+        for symbol in symbols:
+            row = conn.execute(
+                "SELECT first_date, last_fetched_at FROM symbols WHERE symbol = ?", (symbol,)
+            ).fetchone()
+            last_row = conn.execute(
+                "SELECT date, close, adj_close FROM prices WHERE symbol = ? ORDER BY date DESC LIMIT 1", (symbol,)
+            ).fetchone()
+
+            if not row or not last_row:
+                metas[symbol] = None
+                continue
+            metas[symbol] = {
+                'first_date': date.fromisoformat(row[0]),
+                'last_fetched_at': datetime.fromisoformat(row[1]),
+                'last_date': date.fromisoformat(last_row[0]),
+                'last_close': last_row[1],
+                'last_adj_close': last_row[2]
+            }
+        conn.close()
+        return metas
+
+    def _set_meta(self, symbol: str, first_date: date, fetched: bool = True):
+        """Kapsanan aralığı yaz; fetched=True ise son barlar bu an indirilmiştir"""
+        conn = self._connect()
+        with conn:
+            if fetched:
+                conn.execute(
+                    "INSERT OR REPLACE INTO symbols (symbol, first_date, last_fetched_at) VALUES (?, ?, ?)",
+                    (symbol, first_date.isoformat(), datetime.now(MARKET_TZ).isoformat())
+                )
+            else:
+                conn.execute("UPDATE symbols SET first_date = ? WHERE symbol = ?", (first_date.isoformat(), symbol))
+            # Artık kapsanan başlangıçlar için tutulan boş indirme kayıtları geçersiz
+            conn.execute("DELETE FROM empty_fetches WHERE symbol = ? AND start >= ?", (symbol, first_date.isoformat()))
+        conn.close()
+
+    def _get_empty_fetches(self, symbols: List[str]) -> Dict[str, Dict]:
+        conn = self._connect()
+        rows = conn.execute(
+            f"SELECT symbol, start, checked_at FROM empty_fetches WHERE symbol IN ({', '.join('?' * len(symbols))})",
+            symbols
+        ).fetchall()
+        conn.close()
+        return {symbol: {'start': date.fromisoformat(start), 'last_fetched_at': datetime.fromisoformat(checked_at)}
+                for symbol, start, checked_at in rows}
+
+    def _set_empty_fetch(self, symbol: str, start: date):
+        conn = self._connect()
+        with conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO empty_fetches (symbol, start, checked_at) VALUES (?, ?, ?)",
+                (symbol, start.isoformat(), datetime.now(MARKET_TZ).isoformat())
+            )
+        conn.close()
+
+    def is_fresh(self, meta: Dict, now: Optional[datetime] = None) -> bool:
+        """Son indirme yeterince yeni mi? (seans açıkken max_age içinde; kapalıyken son kapanıştan sonra)"""
+        now = now or datetime.now(MARKET_TZ)
+        fetched = meta['last_fetched_at']
+        # Seans sürerken gün içi bar değişir, kapanış kısayolu yalnızca seans dışında geçerli
+        if not is_market_open(now) and fetched >= last_session_close(now):
+            return True
+        return now - fetched < self.max_age
+
+    def ensure(self, symbol: str, start: date):
+        """Sembol için start'tan bugüne kadar olan barların depoda olmasını sağla"""
+        self.ensure_many([symbol], start)
+
+    def ensure_many(self, symbols: List[str], start: date):
+        """Birden fazla sembol için eksik barları toplu (gruplanmış) indirmelerle tamamla.
+
+        Aynı aralığa ihtiyaç duyan semboller tek bir yf.download([...]) çağrısında
+        birleştirilir; böylece evren büyüdükçe istek sayısı sabit kalır.
+        """
+        symbols = list(dict.fromkeys(s.upper() for s in symbols))
+        metas = self._get_metas(symbols)
+        empties = self._get_empty_fetches(symbols) if symbols else {}
+        first_dates = {}
+        groups: Dict[tuple, List[str]] = defaultdict(list)
+        tail = []
+
+        def recently_empty(symbol: str) -> bool:
+            # Bu başlangıçtan (ya da daha erkenden) istenen aralık bu seans içinde boş döndüyse tekrar indirme
+            empty = empties.get(symbol)
+            return empty is not None and empty['start'] <= start and self.is_fresh(empty)
+
+        for symbol, meta in metas.items():
+            # Soğuk istek: tüm aralığı indir
+            if meta is None:
+                if not recently_empty(symbol):
+                    groups[(start, None)].append(symbol)
+                first_dates[symbol] = start
+                continue
+
+            # İstenen başlangıç depodakinden önceyse sadece eksik baş kısmı indir
+            first_dates[symbol] = meta['first_date']
+            if start < meta['first_date'] and not recently_empty(symbol):
+                groups[(start, meta['first_date'])].append(symbol)
+
+            # Son kayıttan sonraki barlar (son bar da yenilenir, gün içi kısmi olabilir)
+            if not self.is_fresh(meta):
+                tail.append(symbol)
+
+        if tail:
+            groups[(min(metas[s]['last_date'] for s in tail), None)].extend(tail)
+
+        # fetched: son barları bu çağrıda gerçekten yazılanlar; extended: yalnızca baş kısmı eklenenler
+        fetched, extended, empty = set(), set(), set()
+        refetch = []
+
+        for (fetch_start, fetch_end), group in groups.items():
+            frames = self.download_many(group, fetch_start, fetch_end)
+            for symbol in group:
+                df = frames.get(symbol)
+                meta = metas[symbol]
+                if df is None or df.empty:
+                    # Kuyruk indirmesi en az son barı döndürür; boşsa hata sayılır ve bir sonraki çağrıda denenir
+                    if meta is None or fetch_end is not None:
+                        empty.add(symbol)
+                    continue
+                if meta is not None and fetch_end is None and symbol in tail \
+                        and self._corporate_action_detected(meta, df):
+                    refetch.append(symbol)
+                    continue
+                self.upsert(symbol, df)
+                if fetch_end is None:
+                    fetched.add(symbol)
+                else:
+                    extended.add(symbol)
+                    first_dates[symbol] = start
+
+        # Temettü/bölünme sonrası düzeltilmiş geçmiş değişti: tüm aralığı yeniden indir
+        refetch_groups: Dict[date, List[str]] = defaultdict(list)
+        for symbol in refetch:
+            print(f"🔄 {symbol} için düzeltilmiş fiyatlar değişti, geçmiş yeniden indiriliyor")
+            refetch_groups[min(first_dates[symbol], start)].append(symbol)
+        for fetch_start, group in refetch_groups.items():
+            frames = self.download_many(group, fetch_start)
+            for symbol in group:
+                df = frames.get(symbol)
+                if df is not None and not df.empty:
+                    self.upsert(symbol, df, replace=True)
+                    fetched.add(symbol)
+                    first_dates[symbol] = fetch_start
+
+        for symbol in fetched:
+            self._set_meta(symbol, first_dates[symbol])
+        for symbol in extended - fetched:
+            self._set_meta(symbol, first_dates[symbol], fetched=False)
+        for symbol in empty - fetched - extended:
+            self._set_empty_fetch(symbol, start)
+
+    def get_many(self, symbols: List[str], start, end=None, adjusted: bool = True) -> Dict[str, pd.DataFrame]:
+        """Birden fazla sembolün barlarını toplu güncelleyip sembol başına DataFrame olarak döndür"""
+        start = pd.Timestamp(start).normalize()
+        end = pd.Timestamp(end).normalize() if end is not None else pd.Timestamp(date.today())
+
+        frames = market_data_flight.do(('many', self.db_file, tuple(symbols), start, end, adjusted),
+                                       self._get_many, list(symbols), start, end, adjusted)
+        return {symbol: df.copy() for symbol, df in frames.items()}
+
+    def _get_many(self, symbols: List[str], start: pd.Timestamp, end: pd.Timestamp, adjusted: bool) -> Dict[str, pd.DataFrame]:
+        try:
+            self.ensure_many(symbols, start.date())
+        except Exception as e:
+            print(f"Fiyat deposu toplu güncelleme hatası: {e}")
+
+        frames = {}
+        for symbol in symbols:
+            df = self.read(symbol, start, end)
+            if df is not None:
+                frames[symbol] = self.apply_adjustment(df) if adjusted else df.drop(columns=['adj_close'])
+        return frames
+
+    @staticmethod
+    def _corporate_action_detected(meta: Dict, df: pd.DataFrame) -> bool:
+        """Örtüşen barda kapanış/düzeltilmiş kapanış değiştiyse (temettü, bölünme) True"""
+        last_day = pd.Timestamp(meta['last_date'])
+        if last_day not in df.index:
+            return False
+        row = df.loc[last_day]
+        stored_ratio = meta['last_adj_close'] / meta['last_close'] if meta['last_close'] else 1.0
+        new_ratio = row['adj_close'] / row['close'] if row['close'] else 1.0
+        return abs(stored_ratio - new_ratio) > 1e-6
+
+    def download(self, symbol: str, start: date, end: Optional[date] = None) -> pd.DataFrame:
+        """yfinance'ten [start, end) aralığını indir (end verilmezse bugün dahil)"""
+        return self.download_many([symbol], start, end).get(symbol.upper(), normalize_ohlcv(None))
+
+    def download_many(self, symbols: List[str], start: date, end: Optional[date] = None) -> Dict[str, pd.DataFrame]:
+        """Sembolleri parça parça tek yf.download çağrısıyla indirip sembol başına böl"""
+        return download_many(symbols, start, end, chunk_size=self.chunk_size)
+
+    def upsert(self, symbol: str, df: pd.DataFrame, replace: bool = False):
+        """Barları depoya yaz (aynı tarih varsa üzerine yazılır, replace=True ise önce tümü silinir)"""
+        if df is None or df.empty:
+            return
+        rows = [
+            (symbol, idx.strftime('%Y-%m-%d'), *(None if pd.isna(v) else float(v) for v in values))
+            for idx, values in zip(df.index, df[PRICE_COLUMNS].itertuples(index=False, name=None))
+        ]
+        with self._lock:
+            conn = self._connect()
+            with conn:
+                if replace:
+                    conn.execute("DELETE FROM prices WHERE symbol = ?", (symbol,))
+                conn.executemany(
+                    f"INSERT OR REPLACE INTO prices (symbol, date, {', '.join(PRICE_COLUMNS)}) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                    rows
+                )
+            conn.close()
+
+    def delete(self, symbol: str):
+        """Sembolün tüm barlarını sil"""
+        conn = self._connect()
+        conn.execute("DELETE FROM prices WHERE symbol = ?", (symbol.upper(),))
+        conn.commit()
+        conn.close()
+
+
+_default_store = None
+_default_store_lock = threading.Lock()
+
+
+def get_price_store() -> PriceStore:
+    """Süreç genelinde paylaşılan fiyat deposunu döndür"""
+    global _default_store
+    if _default_store is None:
+        with _default_store_lock:
+            if _default_store is None:
+                _default_store = PriceStore(os.getenv('PRICE_STORE_DB', 'price_store.db'))
+    return _default_store
+
+
+def load_ohlcv(symbol: str, days: int = 300, end=None) -> Optional[pd.DataFrame]:
+    """Son `days` takvim gününün OHLCV verisini depodan al (open, high, low, close, volume)"""
+    end = pd.Timestamp(end) if end is not None else pd.Timestamp(datetime.now())
+    start = end - timedelta(days=days)
+    return get_price_store().get_history(symbol, start, end)
+
+
+def _check_freshness():
+    """is_fresh için seans içi/dışı kontroller (ağ gerektirmez)"""
+    store = PriceStore.__new__(PriceStore)
+    store.max_age = timedelta(minutes=15)
+    wednesday = date(2025, 3, 5)
+
+    def at(day: date, hour: int, minute: int = 0) -> datetime:
+        return datetime.combine(day, dtime(hour, minute), tzinfo=MARKET_TZ)
+
+    # Seans içinde sabah alınan bar öğleden sonra taze sayılmamalı
+    assert not store.is_fresh({'last_fetched_at': at(wednesday, 10, 5)}, at(wednesday, 15, 0))
+    assert store.is_fresh({'last_fetched_at': at(wednesday, 14, 50)}, at(wednesday, 15, 0))
+    # Kapanıştan sonra alınan bar bir sonraki seansa kadar taze
+    assert store.is_fresh({'last_fetched_at': at(wednesday, 18, 30)}, at(wednesday, 23, 0))
+    assert store.is_fresh({'last_fetched_at': at(wednesday, 18, 30)}, at(date(2025, 3, 6), 9, 0))
+    assert not store.is_fresh({'last_fetched_at': at(wednesday, 18, 30)}, at(date(2025, 3, 6), 10, 30))
+    # Hafta sonu cuma kapanışı geçerli
+    assert store.is_fresh({'last_fetched_at': at(date(2025, 3, 7), 18, 20)}, at(date(2025, 3, 9), 12, 0))
+    print("✅ is_fresh kontrolleri geçti")
+
+
+def _check_ensure_many():
+    """ensure_many yalnızca yazılan semboller için last_fetched_at güncellemeli (ağ gerektirmez)"""
+    import tempfile
+
+    calls = []
+    with tempfile.TemporaryDirectory() as tmp:
+        store = PriceStore(os.path.join(tmp, 'check.db'))
+        bars = pd.DataFrame({c: [1.0, 1.0] for c in PRICE_COLUMNS},
+                            index=pd.to_datetime(['2025-03-04', '2025-03-05']))
+        start = date(2025, 3, 1)
+        store.upsert('AAA', bars)
+        stale = datetime(2025, 3, 5, 9, 0, tzinfo=MARKET_TZ)
+        conn = store._connect()
+        with conn:
+            conn.execute("INSERT INTO symbols VALUES ('AAA', ?, ?)", (start.isoformat(), stale.isoformat()))
+        conn.close()
+
+        # Kuyruk indirmesi başarısız, soğuk sembol boş döner
+        store.download_many = lambda symbols, s, e=None: calls.append(list(symbols)) or {}
+        store.ensure_many(['AAA', 'NEW'], start)
+        assert store._get_metas(['AAA'])['AAA']['last_fetched_at'] == stale
+        assert calls == [['NEW'], ['AAA']] or calls == [['AAA'], ['NEW']]
+
+        # Boş dönen soğuk sembol aynı seansta tekrar indirilmez, bayat sembol yeniden denenir
+        calls.clear()
+        store.ensure_many(['AAA', 'NEW'], start)
+        assert calls == [['AAA']]
+    print("✅ ensure_many kontrolleri geçti")
+
+
+if __name__ == "__main__":
+    import sys
+    import time
+
+    if '--check' in sys.argv:
+        _check_freshness()
+        _check_ensure_many()
+        sys.exit(0)
+
+    store = get_price_store()
+
+    t0 = time.perf_counter()
+    df = load_ohlcv('KCHOL.IS', days=300)
+    print(f"İlk istek: {time.perf_counter() - t0:.3f}s - {0 if df is None else len(df)} bar")
+
+    t0 = time.perf_counter()
+    df = load_ohlcv('KCHOL.IS', days=300)
+    print(f"Sıcak istek: {time.perf_counter() - t0:.3f}s - {0 if df is None else len(df)} bar")
@@ -0,0 +1,169 @@
+# quote_cache.py
+# Anlık fiyatlar için süreç içi önbellek. Seans açıkken fiyatlar QUOTE_TTL_SECONDS
+# boyunca taze sayılır; seans kapalıyken son kapanıştan sonra alınan fiyat bir
+# sonraki seansa kadar geçerlidir. Süresi geçmiş (bayat) fiyatlar hemen döndürülür
+# ve arka planda yenilenir (stale-while-revalidate); böylece Streamlit sayfası her
+# yeniden çizimde ağa çıkmaz.
+#
+# Kullanım:
+#   python quote_cache.py   -> isabet/bayat/ıska sayaçları ve yanıt süreleri
+
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Callable, Dict, List, Optional, Set
+
+from price_store import MARKET_TZ, is_market_open, last_session_close
+from universe import to_yahoo_symbol
+
+QUOTE_TTL_SECONDS = float(os.getenv('QUOTE_TTL_SECONDS', '60'))
+# Bundan eski fiyatlar bayat bile sayılmaz, eşzamanlı olarak yeniden alınır
+QUOTE_MAX_STALE_SECONDS = float(os.getenv('QUOTE_MAX_STALE_SECONDS', str(24 * 3600)))
+
+
+class QuoteCache:
+    """Sembol anahtarlı (KCHOL ve KCHOL.IS aynı) fiyat önbelleği.
+
+    fetch_fn(semboller) -> {sembol: fiyat}; fiyatı bulunamayanlar (0 ya da eksik)
+    önbelleğe yazılmaz. fallback_fn yalnızca gerçek fiyatı bulunamayanlar için
+    varsayılan fiyat döndürür; bunlar da önbelleğe yazılmaz.
+    """
+
+    def __init__(self, fetch_fn: Callable[[List[str]], Dict[str, float]], ttl_seconds: float = QUOTE_TTL_SECONDS,
+                 max_stale_seconds: float = QUOTE_MAX_STALE_SECONDS,
+                 clock: Optional[Callable[[], datetime]] = None,
+                 fallback_fn: Optional[Callable[[List[str]], Dict[str, float]]] = None):
+        self.fetch_fn = fetch_fn
+        self.fallback_fn = fallback_fn
+        self.ttl_seconds = ttl_seconds
+        self.max_stale_seconds = max_stale_seconds
+        self.clock = clock or (lambda: datetime.now(MARKET_TZ))
+        self._lock = threading.Lock()
+        self._quotes: Dict[str, tuple] = {}     # anahtar -> (fiyat, alındığı an)
+        self._refreshing: Set[str] = set()
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='quote-refresh')
+        self.hits = 0
+        self.misses = 0
+        self.stale = 0
+        self.refreshes = 0
+        self.refresh_errors = 0
+
+    def _is_fresh(self, fetched_at: datetime, now: datetime) -> bool:
+        if is_market_open(now):
+            return (now - fetched_at).total_seconds() < self.ttl_seconds
+        # Seans kapalı: son kapanıştan sonra alınan fiyat değişmez
+        return fetched_at >= last_session_close(now)
+
+    def _store(self, keys: Dict[str, str], prices: Dict[str, float], now: datetime):
+        with self._lock:
+            for symbol, price in prices.items():
+                if price and price > 0 and symbol in keys:
+                    self._quotes[keys[symbol]] = (price, now)
+
+    def _refresh(self, symbols: List[str], keys: Dict[str, str]):
+        try:
+            self._store(keys, self.fetch_fn(symbols), self.clock())
+            with self._lock:
+                self.refreshes += 1
+        except Exception as e:
+            print(f"⚠️ Arka plan fiyat yenileme hatası: {e}")
+            with self._lock:
+                self.refresh_errors += 1
+        finally:
+            with self._lock:
+                self._refreshing.difference_update(keys[s] for s in symbols)
+
+    def get_many(self, symbols: List[str]) -> Dict[str, float]:
+        """Fiyatlar: taze/bayat olanlar önbellekten, hiç olmayanlar tek toplu çağrıyla"""
+        now = self.clock()
+        keys = {symbol: to_yahoo_symbol(symbol) for symbol in symbols}
+        prices: Dict[str, float] = {}
+        missing: List[str] = []
+        to_refresh: List[str] = []
+
+        with self._lock:
+            for symbol, key in keys.items():
+                cached = self._quotes.get(key)
+                if cached is None or (now - cached[1]).total_seconds() > self.max_stale_seconds:
+                    missing.append(symbol)
+                    self.misses += 1
+                    continue
+                prices[symbol] = cached[0]
+                if self._is_fresh(cached[1], now):
+                    self.hits += 1
+                else:
+                    self.stale += 1
+                    # Aynı sembol için tek arka plan yenilemesi
+                    if key not in self._refreshing:
+                        self._refreshing.add(key)
+                        to_refresh.append(symbol)
+
+        if to_refresh:
+            self._executor.submit(self._refresh, to_refresh, {s: keys[s] for s in to_refresh})
+
+        if missing:
+            fetched = self.fetch_fn(missing)
+            self._store(keys, fetched, now)
+            unpriced = [symbol for symbol in missing if not fetched.get(symbol)]
+            # Varsayılan fiyatlar yalnızca bu yanıtta kullanılır; bir sonraki çağrı yeniden dener
+            fallback = self.fallback_fn(unpriced) if unpriced and self.fallback_fn else {}
+            for symbol in missing:
+                prices[symbol] = fetched.get(symbol) or fallback.get(symbol, 0.0)
+
+        return prices
+
+    def invalidate(self, symbols: Optional[List[str]] = None):
+        """Önbelleği (ya da verilen sembolleri) temizle"""
+        with self._lock:
+            if symbols is None:
+                self._quotes.clear()
+            else:
+                for symbol in symbols:
+                    self._quotes.pop(to_yahoo_symbol(symbol), None)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {'hits': self.hits, 'misses': self.misses, 'stale': self.stale, 'refreshes': self.refreshes,
+                    'refresh_errors': self.refresh_errors, 'entries': len(self._quotes),
+                    'refreshing': len(self._refreshing)}
+
+
+_cache: Optional[QuoteCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_quote_cache(fetch_fn: Callable[[List[str]], Dict[str, float]],
+                    fallback_fn: Optional[Callable[[List[str]], Dict[str, float]]] = None) -> QuoteCache:
+    """Süreç genelinde paylaşılan fiyat önbelleği (Streamlit her yeniden çalıştırmada
+    PortfolioManager'ı yeniden oluşturduğundan önbellek nesneye değil sürece bağlıdır).
+    fetch_fn ve fallback_fn yalnızca ilk çağrıda kullanılır."""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = QuoteCache(fetch_fn, fallback_fn=fallback_fn)
+        return _cache
+
+
+if __name__ == "__main__":
+    from datetime import timedelta
+
+    # Sahte saat: seans içi bir an; fetch_fn 300 ms süren ağ çağrısını taklit eder
+    current = [datetime(2025, 3, 5, 11, 0, tzinfo=MARKET_TZ)]
+
+    def slow_fetch(symbols):
+        time.sleep(0.3)
+        return {symbol: 10.0 for symbol in symbols}
+
+    cache = QuoteCache(slow_fetch, ttl_seconds=60, clock=lambda: current[0])
+    portfolio = [f"SYM{i}" for i in range(20)]
+
+    for label, advance in [("soğuk", 0), ("taze", 10), ("bayat (arka planda yenilenir)", 120), ("yenilenmiş", 1)]:
+        current[0] += timedelta(seconds=advance)
+        t0 = time.perf_counter()
+        cache.get_many(portfolio)
+        print(f"{label:32s}: {(time.perf_counter() - t0) * 1000:7.2f} ms")
+        if advance == 120:
+            time.sleep(0.5)  # arka plan yenilemesinin bitmesi
+    print(cache.stats())
@@ -0,0 +1,213 @@
+# quote_fetcher.py
+# Portföy değerlemesi için eşzamanlı anlık fiyat alma: tek bağlantı havuzlu
+# requests.Session, KCHOL / KCHOL.IS tekilleştirme, iş parçacığı havuzunda tüm
+# Yahoo chart isteklerinin aynı anda gönderilmesi (sunucu başına eşzamanlılık
+# sınırıyla) ve Yahoo'da bulunamayanlar için yedek akışın (truncgil) parti başına
+# en fazla bir kez indirilmesi. 20 hisselik portföy ~1 gidiş-dönüş süresinde fiyatlanır.
+#
+# Kullanım:
+#   python quote_fetcher.py THYAO GARAN KCHOL
+#   python quote_fetcher.py --benchmark   -> yerel gecikmeli sunucuyla sıralı/eşzamanlı karşılaştırma
+
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from single_flight import market_data_flight
+from universe import to_yahoo_symbol
+
+YAHOO_CHART_URL = "https://query1.finance.yahoo.com/v8/finance/chart/{ticker}"
+FALLBACK_URL = "https://finans.truncgil.com/today.json"
+
+HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
+}
+
+MAX_WORKERS = 16
+PER_HOST_LIMIT = 8
+REQUEST_TIMEOUT = 10
+
+
+def parse_chart_price(data: Dict) -> Optional[float]:
+    """Yahoo chart yanıtından fiyat: regularMarketPrice, yoksa son kapanış"""
+    result = (data.get('chart') or {}).get('result')
+    if not result:
+        return None
+    result = result[0]
+    price = (result.get('meta') or {}).get('regularMarketPrice')
+    if price and price > 0:
+        return float(price)
+    quotes = (result.get('indicators') or {}).get('quote') or [{}]
+    closes = [c for c in (quotes[0].get('close') or []) if c]
+    if closes and closes[-1] > 0:
+        return float(closes[-1])
+    return None
+
+
+def parse_fallback_price(data: Dict, symbol: str) -> Optional[float]:
+    """truncgil today.json yanıtından 'Alış' fiyatı"""
+    entry = data.get(symbol.replace('.IS', '').upper())
+    if not isinstance(entry, dict):
+        return None
+    try:
+        price = float(str(entry.get('Alış', '0')).replace(',', '').replace('₺', '').replace('TL', '').strip())
+    except ValueError:
+        return None
+    return price if price > 0 else None
+
+
+class QuoteFetcher:
+    def __init__(self, max_workers: int = MAX_WORKERS, per_host_limit: int = PER_HOST_LIMIT,
+                 timeout: float = REQUEST_TIMEOUT, chart_url: str = YAHOO_CHART_URL,
+                 fallback_url: str = FALLBACK_URL):
+        self.timeout = timeout
+        self.chart_url = chart_url
+        self.fallback_url = fallback_url
+        self.per_host_limit = per_host_limit
+
+        # Tek oturum: TCP/TLS bağlantıları istekler arasında yeniden kullanılır
+        self.session = requests.Session()
+        self.session.headers.update(HEADERS)
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=per_host_limit)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='quote')
+        self._host_limits: Dict[str, threading.BoundedSemaphore] = {}
+        self._lock = threading.Lock()
+        self.requests = 0
+
+    def _host_limit(self, url: str) -> threading.BoundedSemaphore:
+        host = urlparse(url).netloc
+        with self._lock:
+            if host not in self._host_limits:
+                self._host_limits[host] = threading.BoundedSemaphore(self.per_host_limit)
+            return self._host_limits[host]
+
+    def _get_json(self, url: str) -> Optional[Dict]:
+        with self._host_limit(url):
+            with self._lock:
+                self.requests += 1
+            response = self.session.get(url, timeout=self.timeout)
+        if response.status_code != 200:
+            return None
+        return response.json()
+
+    def _fetch_chart(self, ticker: str) -> Optional[float]:
+        url = self.chart_url.format(ticker=ticker)
+        try:
+            # Başka bir kullanıcının aynı anda istediği sembol tek HTTP çağrısını paylaşır
+            data = market_data_flight.do(('yahoo_chart', url), self._get_json, url)
+            return parse_chart_price(data) if data else None
+        except Exception as e:
+            print(f"⚠️ Yahoo fiyat hatası ({ticker}): {e}")
+            return None
+
+    def _fetch_fallback(self) -> Dict:
+        try:
+            return market_data_flight.do(('fallback_quotes', self.fallback_url), self._get_json, self.fallback_url) or {}
+        except Exception as e:
+            print(f"⚠️ Finans API hatası: {e}")
+            return {}
+
+    def fetch_many(self, symbols: List[str]) -> Dict[str, float]:
+        """Sembollerin anlık fiyatları (girdi sembolü -> fiyat; bulunamayanlar dönmez)"""
+        tickers: Dict[str, List[str]] = {}
+        for symbol in symbols:
+            tickers.setdefault(to_yahoo_symbol(symbol), []).append(symbol)
+        if not tickers:
+            return {}
+
+        futures = {ticker: self._pool.submit(self._fetch_chart, ticker) for ticker in tickers}
+        found = {ticker: future.result() for ticker, future in futures.items()}
+
+        missing = [ticker for ticker, price in found.items() if price is None]
+        if missing:
+            # Yedek akış tüm eksikler için tek sefer
+            print(f"🔄 {len(missing)} sembol için alternatif API deneniyor...")
+            fallback = self._fetch_fallback()
+            for ticker in missing:
+                found[ticker] = parse_fallback_price(fallback, ticker)
+
+        prices = {}
+        for ticker, price in found.items():
+            if price is not None:
+                for symbol in tickers[ticker]:
+                    prices[symbol] = price
+        return prices
+
+
+_fetcher: Optional[QuoteFetcher] = None
+_fetcher_lock = threading.Lock()
+
+
+def get_quote_fetcher() -> QuoteFetcher:
+    """Süreç genelinde paylaşılan fiyat alıcı (tek oturum ve iş parçacığı havuzu)"""
+    global _fetcher
+    with _fetcher_lock:
+        if _fetcher is None:
+            _fetcher = QuoteFetcher()
+        return _fetcher
+
+
+if __name__ == "__main__":
+    import argparse
+    import json
+    import time
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    parser = argparse.ArgumentParser(description="Eşzamanlı anlık fiyat alma")
+    parser.add_argument('symbols', nargs='*')
+    parser.add_argument('--benchmark', action='store_true')
+    args = parser.parse_args()
+
+    if not args.benchmark:
+        print(get_quote_fetcher().fetch_many(args.symbols or ['KCHOL', 'THYAO', 'GARAN']))
+    else:
+        latency = 0.2
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                time.sleep(latency)
+                if self.path.startswith('/chart/'):
+                    ticker = self.path.rsplit('/', 1)[-1]
+                    # SYM1x sembolleri Yahoo'da yok, yedek akıştan gelir
+                    body = {'chart': {'result': None if ticker.startswith('SYM1') else
+                                      [{'meta': {'regularMarketPrice': 10.0}}]}}
+                else:
+                    body = {f"SYM{i}": {'Alış': '9.5'} for i in range(20)}
+                payload = json.dumps(body).encode()
+                self.send_response(200)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def log_message(self, *args):
+                pass
+
+        server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        base = f"http://127.0.0.1:{server.server_address[1]}"
+        symbols = [f"SYM{i}" for i in range(20)] + ['SYM0.IS', 'SYM2.IS']
+
+        t0 = time.perf_counter()
+        for symbol in symbols:
+            # Eski yol: sembol başına yeni bağlantı, eksikler için yedek akış her seferinde
+            data = requests.get(f"{base}/chart/{to_yahoo_symbol(symbol)}", timeout=10).json()
+            if parse_chart_price(data) is None:
+                parse_fallback_price(requests.get(f"{base}/today.json", timeout=10).json(), symbol)
+        sequential = time.perf_counter() - t0
+
+        fetcher = QuoteFetcher(chart_url=base + "/chart/{ticker}", fallback_url=base + "/today.json",
+                               per_host_limit=20)
+        t0 = time.perf_counter()
+        prices = fetcher.fetch_many(symbols)
+        concurrent = time.perf_counter() - t0
+        print(f"{len(symbols)} sembol ({latency * 1000:.0f} ms gecikme): sıralı {sequential:.2f}s | "
+              f"eşzamanlı {concurrent:.2f}s ({fetcher.requests} istek, {len(prices)} fiyat)")
+        server.shutdown()
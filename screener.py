@@ -0,0 +1,259 @@
+# screener.py
+# Hisse tarama ifadeleri (ör. "RSI > 70 and close > SMA200 and volume > 1.5 * avgvol20")
+# evren anlık görüntüsü üzerinde vektörel boolean maskelere derlenir
+
+import ast
+import operator
+import re
+import time
+from functools import lru_cache
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from universe import get_universe_snapshot
+
+# İfadelerde kullanılabilecek alan adları (büyük/küçük harf duyarsız) -> anlık görüntü sütunu
+FIELD_ALIASES = {
+    'open': 'open', 'high': 'high', 'low': 'low', 'close': 'close', 'volume': 'volume',
+    'price': 'close', 'fiyat': 'close', 'kapanis': 'close', 'hacim': 'volume',
+    'change': 'change_pct', 'change_pct': 'change_pct', 'degisim': 'change_pct',
+    'sma20': 'SMA20', 'sma50': 'SMA50', 'sma200': 'SMA200', 'rsi': 'RSI',
+    'macd': 'MACD', 'macd_signal': 'MACD_SIGNAL', 'macd_hist': 'MACD_HIST',
+    'bb_upper': 'BB_UPPER', 'bb_middle': 'BB_MIDDLE', 'bb_lower': 'BB_LOWER',
+    'bbwidth': 'BBWidth', 'atr': 'ATR', 'williams': 'Williams', 'williams_r': 'Williams',
+    'avgvol20': 'AVGVOL20'
+}
+
+# Türkçe mantıksal bağlaçlar
+_KEYWORDS = {'ve': 'and', 'veya': 'or', 'ya da': 'or', 'değil': 'not', 'degil': 'not'}
+
+_COMPARE_OPS = {
+    ast.Gt: np.greater, ast.GtE: np.greater_equal, ast.Lt: np.less,
+    ast.LtE: np.less_equal, ast.Eq: np.equal, ast.NotEq: np.not_equal
+}
+_BINARY_OPS = {ast.Add: operator.add, ast.Sub: operator.sub, ast.Mult: operator.mul, ast.Div: operator.truediv}
+_FUNCTIONS = {'abs': np.abs}
+
+
+class ScreenerError(ValueError):
+    """Geçersiz ya da güvenli olmayan tarama ifadesi"""
+
+
+def _normalize_expression(expression: str) -> str:
+    expression = expression.strip()
+    for word, keyword in _KEYWORDS.items():
+        expression = re.sub(rf"(?<!\w){word}(?!\w)", keyword, expression, flags=re.IGNORECASE)
+    # "AND"/"OR"/"NOT" gibi büyük harf yazımları da kabul et
+    return re.sub(r"(?<!\w)(and|or|not)(?!\w)", lambda m: m.group(1).lower(), expression, flags=re.IGNORECASE)
+
+
+def _compile_node(node: ast.AST, fields: set) -> Callable[[Dict[str, np.ndarray]], np.ndarray]:
+    """AST düğümünü sütun dizileri üzerinde çalışan bir fonksiyona çevir (beyaz liste)"""
+    if isinstance(node, ast.Expression):
+        return _compile_node(node.body, fields)
+
+    if isinstance(node, ast.BoolOp):
+        parts = [_compile_node(value, fields) for value in node.values]
+        combine = np.logical_and if isinstance(node.op, ast.And) else np.logical_or
+        return lambda cols: combine.reduce([part(cols) for part in parts])
+
+    if isinstance(node, ast.UnaryOp):
+        operand = _compile_node(node.operand, fields)
+        if isinstance(node.op, ast.Not):
+            return lambda cols: np.logical_not(operand(cols))
+        if isinstance(node.op, ast.USub):
+            return lambda cols: -operand(cols)
+        if isinstance(node.op, ast.UAdd):
+            return operand
+        raise ScreenerError(f"Desteklenmeyen operatör: {type(node.op).__name__}")
+
+    if isinstance(node, ast.Compare):
+        left = _compile_node(node.left, fields)
+        steps = []
+        for op, comparator in zip(node.ops, node.comparators):
+            if type(op) not in _COMPARE_OPS:
+                raise ScreenerError(f"Desteklenmeyen karşılaştırma: {type(op).__name__}")
+            steps.append((_COMPARE_OPS[type(op)], _compile_node(comparator, fields)))
+
+        def compare(cols):
+            # Zincirleme karşılaştırma: 30 < RSI < 70
+            current = left(cols)
+            mask = None
+            for func, right in steps:
+                value = right(cols)
+                with np.errstate(invalid='ignore'):
+                    result = func(current, value)
+                mask = result if mask is None else mask & result
+                current = value
+            return mask
+        return compare
+
+    if isinstance(node, ast.BinOp):
+        if type(node.op) not in _BINARY_OPS:
+            raise ScreenerError(f"Desteklenmeyen aritmetik operatör: {type(node.op).__name__}")
+        func = _BINARY_OPS[type(node.op)]
+        left, right = _compile_node(node.left, fields), _compile_node(node.right, fields)
+
+        def binary(cols):
+            with np.errstate(invalid='ignore', divide='ignore'):
+                return func(left(cols), right(cols))
+        return binary
+
+    if isinstance(node, ast.Call):
+        if not isinstance(node.func, ast.Name) or node.func.id.lower() not in _FUNCTIONS or node.keywords:
+            raise ScreenerError("Sadece abs(...) fonksiyonu kullanılabilir")
+        func = _FUNCTIONS[node.func.id.lower()]
+        args = [_compile_node(arg, fields) for arg in node.args]
+        return lambda cols: func(*[arg(cols) for arg in args])
+
+    if isinstance(node, ast.Name):
+        column = FIELD_ALIASES.get(node.id.lower())
+        if column is None:
+            raise ScreenerError(f"Bilinmeyen alan: {node.id} (kullanılabilir: {', '.join(sorted(FIELD_ALIASES))})")
+        fields.add(column)
+        return lambda cols: cols[column]
+
+    if isinstance(node, ast.Constant) and isinstance(node.value, (int, float)) and not isinstance(node.value, bool):
+        value = float(node.value)
+        return lambda cols: value
+
+    raise ScreenerError(f"Desteklenmeyen ifade öğesi: {type(node).__name__}")
+
+
+class CompiledScreen:
+    """Derlenmiş tarama ifadesi: sütun dizilerinden boolean maske üretir"""
+
+    def __init__(self, expression: str):
+        self.expression = expression
+        normalized = _normalize_expression(expression)
+        try:
+            tree = ast.parse(normalized, mode='eval')
+        except SyntaxError as e:
+            raise ScreenerError(f"İfade çözümlenemedi: {expression} ({e.msg})")
+
+        self.fields: set = set()
+        self._evaluate = _compile_node(tree, self.fields)
+
+    def mask(self, columns: Dict[str, np.ndarray], n_rows: int) -> np.ndarray:
+        result = np.asarray(self._evaluate(columns))
+        if result.dtype != bool:
+            raise ScreenerError("İfade bir koşul (karşılaştırma) olmalı")
+        return np.broadcast_to(result, (n_rows,))
+
+
+@lru_cache(maxsize=256)
+def compile_screen(expression: str) -> CompiledScreen:
+    """İfadeyi derle (aynı ifade tekrar derlenmez)"""
+    return CompiledScreen(expression)
+
+
+def top_k_indices(values: np.ndarray, k: int, ascending: bool = False) -> np.ndarray:
+    """En büyük (ya da en küçük) k değerin sıralı indeksleri - argpartition ile O(n)"""
+    keys = np.where(np.isnan(values), -np.inf, values if not ascending else -values)
+    if k < len(keys):
+        candidates = np.argpartition(-keys, k - 1)[:k]
+    else:
+        candidates = np.arange(len(keys))
+    return candidates[np.argsort(-keys[candidates], kind='stable')]
+
+
+def screen(expression: str, snapshot: Optional[pd.DataFrame] = None, sort_by: Optional[str] = None,
+           ascending: bool = False, top_k: Optional[int] = 20) -> pd.DataFrame:
+    """İfadeyi anlık görüntü üzerinde çalıştır, eşleşenleri sıralayıp ilk top_k'yı döndür.
+
+    sort_by verilmezse ifadede geçen ilk indikatöre göre sıralanır.
+    """
+    compiled = compile_screen(expression)
+    if snapshot is None:
+        snapshot = get_universe_snapshot()
+
+    columns = {name: snapshot[name].to_numpy(float) for name in compiled.fields if name in snapshot.columns}
+    missing = compiled.fields - set(columns)
+    if missing:
+        raise ScreenerError(f"Anlık görüntüde olmayan alanlar: {', '.join(sorted(missing))}")
+
+    matched = np.flatnonzero(compiled.mask(columns, len(snapshot)))
+
+    sort_column = FIELD_ALIASES.get(sort_by.lower(), sort_by) if sort_by else _default_sort_column(compiled.expression)
+    if sort_column in snapshot.columns and len(matched):
+        values = snapshot[sort_column].to_numpy(float)[matched]
+        order = top_k_indices(values, top_k or len(matched), ascending)
+        matched = matched[order]
+    elif top_k:
+        matched = matched[:top_k]
+
+    return snapshot.iloc[matched]
+
+
+def _default_sort_column(expression: str) -> str:
+    """İfadede geçen ilk alan (fiyat/hacim dışı tercih edilir)"""
+    names = [FIELD_ALIASES[n.lower()] for n in re.findall(r"[A-Za-z_][A-Za-z0-9_]*", expression)
+             if n.lower() in FIELD_ALIASES]
+    for name in names:
+        if name not in ('open', 'high', 'low', 'close', 'volume'):
+            return name
+    return names[0] if names else 'close'
+
+
+# Doğal dil kalıpları: "RSI'si 70 üstü", "Williams -80 altında", "SMA200 üzerinde", "hacmi ortalamanın 2 katı"
+_NL_THRESHOLD = re.compile(
+    r"(?P<field>rsi|williams|atr|bbwidth|macd|değişim|degisim|fiyat)\w*'?\w*\s+(?P<value>-?\d+(?:[.,]\d+)?)\s*"
+    r"(?P<direction>üstü|üzeri|üzerinde|üstünde|fazla|büyük|altı|altında|az|küçük)",
+    re.IGNORECASE
+)
+_NL_ABOVE_MA = re.compile(r"(?P<field>sma\d+)\w*\s+(?P<direction>üzerinde|üstünde|altında)", re.IGNORECASE)
+_NL_VOLUME = re.compile(r"hacm\w*\s+ortalama\w*\s+(?P<value>\d+(?:[.,]\d+)?)\s*kat", re.IGNORECASE)
+_DSL_HINT = re.compile(r"[<>]=?|==")
+
+
+def expression_from_text(text: str) -> Optional[str]:
+    """Soru metninden tarama ifadesi çıkar (doğrudan ifade ya da Türkçe doğal dil kalıpları)"""
+    # "tara: RSI > 70 ve close > SMA200" gibi doğrudan ifadeler
+    if _DSL_HINT.search(text):
+        candidate = text.split(':', 1)[1] if ':' in text else text
+        try:
+            compile_screen(candidate.strip())
+            return candidate.strip()
+        except ScreenerError:
+            pass
+
+    conditions: List[str] = []
+    for match in _NL_THRESHOLD.finditer(text):
+        field = FIELD_ALIASES.get(match.group('field').lower().replace('ğ', 'g').replace('ş', 's'), 'close')
+        value = match.group('value').replace(',', '.')
+        direction = '>' if match.group('direction').lower() in ('üstü', 'üzeri', 'üzerinde', 'üstünde', 'fazla', 'büyük') else '<'
+        conditions.append(f"{field} {direction} {value}")
+    for match in _NL_ABOVE_MA.finditer(text):
+        direction = '<' if match.group('direction').lower() == 'altında' else '>'
+        conditions.append(f"close {direction} {match.group('field').upper()}")
+    for match in _NL_VOLUME.finditer(text):
+        conditions.append(f"volume > {match.group('value').replace(',', '.')} * AVGVOL20")
+
+    return ' and '.join(conditions) if conditions else None
+
+
+if __name__ == "__main__":
+    from universe import compute_panel, latest_snapshot
+
+    # Sentetik 500 sembollük evren üzerinde tarama süresi
+    n_days, n_symbols = 280, 500
+    rng = np.random.default_rng(11)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.02, (n_days, n_symbols)), axis=0))
+    matrices = {
+        'symbols': [f"SYM{i}.IS" for i in range(n_symbols)], 'dates': pd.bdate_range('2024-01-01', periods=n_days),
+        'open': close, 'high': close * 1.01, 'low': close * 0.99, 'close': close,
+        'volume': rng.uniform(1e5, 1e7, close.shape)
+    }
+    snapshot = latest_snapshot(matrices, compute_panel(matrices))
+
+    for query in ["RSI > 70 and close > SMA200 and volume > 1.5 * avgvol20",
+                  "30 < RSI < 45 ve Williams < -80",
+                  "RSI'si 60 üstü ve SMA200 üzerinde olan hisseler"]:
+        expression = expression_from_text(query)
+        t0 = time.perf_counter()
+        result = screen(expression, snapshot, top_k=5)
+        elapsed = (time.perf_counter() - t0) * 1000
+        print(f"{query!r} -> {expression!r}: {len(result)} sonuç, {elapsed:.2f} ms")
+        print(result[['close', 'RSI', 'SMA200', 'Williams']].round(2).to_string())
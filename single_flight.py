@@ -0,0 +1,91 @@
+# single_flight.py
+# Eşzamanlı aynı piyasa verisi isteklerini tek bir upstream çağrısında birleştirme
+
+import threading
+from typing import Any, Callable, Dict, Hashable
+
+
+class _Call:
+    def __init__(self):
+        self.event = threading.Event()
+        self.result = None
+        self.error = None
+        self.waiters = 0
+
+
+class SingleFlight:
+    """Aynı anahtar için uçuşta olan çağrı varsa bekleyip onun sonucunu paylaş.
+
+    İlk gelen çağıran (lider) fonksiyonu çalıştırır; aynı anahtarla gelen diğer
+    çağıranlar sonucu bekler. Hata olursa tüm bekleyenlere aynı hata iletilir.
+    Sonuç önbelleğe alınmaz: çağrı bitince anahtar serbest kalır.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls: Dict[Hashable, _Call] = {}
+        self.executed = 0
+        self.shared = 0
+
+    def do(self, key: Hashable, fn: Callable, *args, **kwargs) -> Any:
+        """fn(*args, **kwargs) çağrısını key bazında birleştirerek çalıştır"""
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = _Call()
+                self._calls[key] = call
+                self.executed += 1
+            else:
+                call.waiters += 1
+                self.shared += 1
+
+        if not leader:
+            call.event.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn(*args, **kwargs)
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+            call.event.set()
+
+    def in_flight(self) -> int:
+        """Şu anda uçuşta olan anahtar sayısı"""
+        with self._lock:
+            return len(self._calls)
+
+    def stats(self) -> Dict[str, int]:
+        """Çalıştırılan ve paylaşılan çağrı sayıları"""
+        with self._lock:
+            return {
+                'executed': self.executed,
+                'shared': self.shared,
+                'in_flight': len(self._calls)
+            }
+
+
+# Süreç genelinde tüm piyasa verisi istekleri için paylaşılan örnek
+market_data_flight = SingleFlight()
+
+
+if __name__ == "__main__":
+    import time
+    from concurrent.futures import ThreadPoolExecutor
+
+    def slow_fetch(symbol):
+        time.sleep(0.5)
+        return f"{symbol} verisi"
+
+    with ThreadPoolExecutor(max_workers=20) as pool:
+        results = list(pool.map(lambda _: market_data_flight.do(('demo', 'THYAO.IS'), slow_fetch, 'THYAO.IS'), range(20)))
+
+    print(f"Sonuçlar: {set(results)}")
+    print(f"İstatistik: {market_data_flight.stats()}")
@@ -0,0 +1,240 @@
+# strategy_backtest.py
+# TechnicalAnalysisEngine.generate_investment_strategy'deki RSI/MACD/SMA/Bollinger
+# kurallarının geçmiş performansı. Kurallar tüm geçmiş boyunca pozisyon vektörlerine
+# (kural x gün x sembol, 1 = pozisyonda, 0 = nakitte) çevrilir; getiri, işlem maliyeti,
+# yıllık bileşik getiri, maksimum düşüş ve işlem istatistikleri tek NumPy geçişinde çıkar.
+#
+# Sinyal gün sonu kapanışta oluşur, pozisyon ertesi günün getirisine uygulanır
+# (ileriye bakma yok). Fiyatlar temettü/bölünme düzeltilmiş kapanışlardır.
+#
+# Kullanım:
+#   python strategy_backtest.py --symbols KCHOL THYAO
+#   python strategy_backtest.py --benchmark   -> sentetik 100 hisse x 5 yıl süre ölçümü
+
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+import indicators
+from investment_simulator import load_price_arrays
+from price_store import PriceStore
+from universe import forward_fill
+
+RULES = ['short_term', 'rsi', 'macd', 'sma_trend', 'bollinger', 'buy_hold']
+
+RULE_LABELS = {
+    'short_term': 'Kısa vadeli kural (RSI + MACD)',
+    'rsi': 'RSI 30/70',
+    'macd': 'MACD sinyal kesişimi',
+    'sma_trend': 'Orta vadeli trend (SMA 20/50/200)',
+    'bollinger': 'Bollinger bant dönüşü',
+    'buy_hold': 'Al-tut',
+}
+
+DEFAULT_YEARS = 5
+COST_BPS = 20            # Alım ya da satım başına komisyon + kayma (baz puan)
+TRADING_DAYS = 252
+
+
+def _stateful(entry: np.ndarray, exit_: np.ndarray) -> np.ndarray:
+    """Giriş sinyalinde 1, çıkış sinyalinde 0; arada önceki durum korunur (çıkış öncelikli)"""
+    state = np.where(exit_, 0.0, np.where(entry, 1.0, np.nan))
+    return np.nan_to_num(forward_fill(state), nan=0.0)
+
+
+def rule_positions(close: np.ndarray, rules: Sequence[str] = RULES) -> np.ndarray:
+    """(kural, gün, sembol) pozisyonları: generate_investment_strategy'deki kuralların birebir karşılığı"""
+    close = np.atleast_2d(np.asarray(close, dtype=float).T).T
+    ind = indicators.compute_indicators(close)
+    rsi, macd_line, signal = ind['RSI'], ind['MACD'], ind['MACD_SIGNAL']
+    sma20, sma50, sma200 = ind['SMA20'], ind['SMA50'], ind['SMA200']
+
+    # Tüm kurallar aynı dönemde karşılaştırılır: SMA200'ün oluştuğu ilk günden itibaren
+    valid = ~np.isnan(sma200)
+    with np.errstate(invalid='ignore'):
+        overbought, oversold = rsi > 70, rsi < 30
+        momentum = macd_line > signal
+        strong_up = (close > sma20) & (sma20 > sma50) & (sma50 > sma200)
+        downtrend = (close < sma20) & (sma20 < sma50)
+        upper_touch, lower_touch = close > ind['BB_UPPER'], close < ind['BB_LOWER']
+
+    positions = {
+        # Aşırı satımda al; aşırı alımda mevcut pozisyonu koru, yeni alım yok; arada MACD momentumu
+        'short_term': _stateful(~overbought & (oversold | momentum), ~overbought & ~oversold & ~momentum),
+        'rsi': _stateful(oversold, overbought),
+        'macd': momentum.astype(float),
+        # Güçlü yükseliş trendinde pozisyon al, düşüş trendine dönünce çık
+        'sma_trend': _stateful(strong_up, downtrend),
+        # Alt banda dokununca toparlanma için al, üst banda dokununca çık
+        'bollinger': _stateful(lower_touch, upper_touch),
+        'buy_hold': np.ones_like(close),
+    }
+    return np.stack([np.where(valid, positions[rule], 0.0) for rule in rules])
+
+
+@dataclass
+class BacktestResult:
+    symbols: List[str]
+    rules: List[str]
+    dates: pd.DatetimeIndex
+    positions: np.ndarray      # (kural, gün, sembol) gün sonu pozisyonu
+    log_returns: np.ndarray    # (kural, gün, sembol) maliyet düşülmüş günlük log getiri
+    start_index: np.ndarray    # (sembol,) değerlendirmenin başladığı gün
+    trade_returns: np.ndarray  # (işlem,) işlem başına getiri (%)
+    trade_group: np.ndarray    # (işlem,) kural * n_sembol + sembol
+
+    def equity(self) -> np.ndarray:
+        """(kural, gün, sembol) 1 TL'nin seyri"""
+        return np.exp(np.cumsum(self.log_returns, axis=1))
+
+    def summary(self) -> pd.DataFrame:
+        """Sembol x kural bazında CAGR, maksimum düşüş, maruz kalma ve işlem istatistikleri"""
+        n_rules, n_days, n_symbols = self.log_returns.shape
+        equity = self.equity()
+        years = np.maximum(n_days - self.start_index, 1) / TRADING_DAYS
+        final = equity[:, -1]
+        drawdown = (equity / np.maximum.accumulate(equity, axis=1) - 1).min(axis=1)
+
+        active = np.arange(n_days)[:, None] >= self.start_index[None, :]
+        exposure = (self.positions * active).sum(axis=1) / np.maximum(active.sum(axis=0), 1)
+
+        n_groups = n_rules * n_symbols
+        trades = np.bincount(self.trade_group, minlength=n_groups)
+        wins = np.bincount(self.trade_group, weights=self.trade_returns > 0, minlength=n_groups)
+        trade_sum = np.bincount(self.trade_group, weights=self.trade_returns, minlength=n_groups)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            win_rate = np.where(trades > 0, wins / trades * 100, np.nan)
+            avg_trade = np.where(trades > 0, trade_sum / trades, np.nan)
+
+        index = pd.MultiIndex.from_product([self.rules, self.symbols], names=['rule', 'symbol'])
+        data = {
+            'total_return_pct': ((final - 1) * 100).ravel(),
+            'cagr_pct': ((final ** (1 / years) - 1) * 100).ravel(),
+            'max_drawdown_pct': (drawdown * 100).ravel(),
+            'exposure_pct': (exposure * 100).ravel(),
+            'n_trades': trades,
+            'win_rate_pct': win_rate,
+            'avg_trade_pct': avg_trade,
+            'years': np.tile(years, n_rules),
+        }
+        return pd.DataFrame(data, index=index).swaplevel().sort_index()
+
+
+def backtest_arrays(arrays: Dict, rules: Sequence[str] = RULES, cost_bps: float = COST_BPS) -> BacktestResult:
+    """Fiyat dizileri üzerinde tüm kuralları tek geçişte test et (bkz. load_price_arrays)"""
+    unknown = set(rules) - set(RULES)
+    if unknown:
+        raise ValueError(f"Bilinmeyen kural: {sorted(unknown)}")
+    prices = np.asarray(arrays['adj_close'], dtype=float)
+    if len(prices) < 2:
+        raise ValueError("Fiyat verisi yok")
+
+    positions = rule_positions(prices, rules)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        daily = np.nan_to_num(np.diff(np.log(prices), axis=0, prepend=np.nan), nan=0.0)
+
+    # Pozisyon kapanışta alınır, ertesi günün getirisini taşır; değişimde maliyet
+    previous = np.concatenate([np.zeros_like(positions[:, :1]), positions[:, :-1]], axis=1)
+    turnover = np.abs(positions - previous)
+    log_returns = previous * daily + np.log1p(-turnover * cost_bps / 10000)
+
+    # İşlemler: her girişte yeni kimlik; girişten çıkış gününe kadarki getiri o işleme yazılır
+    entries = (positions > previous)
+    trade_id = np.cumsum(entries, axis=1)
+    in_trade = (positions > 0) | (previous > 0)
+    n_rules, _, n_symbols = positions.shape
+    group = np.arange(n_rules)[:, None, None] * n_symbols + np.arange(n_symbols)[None, None, :]
+    group = np.broadcast_to(group, positions.shape)
+    max_trades = int(trade_id.max()) + 1 if trade_id.size else 1
+    key = (group * max_trades + trade_id)[in_trade]
+    unique_keys, inverse = np.unique(key, return_inverse=True)
+    trade_log = np.bincount(inverse, weights=log_returns[in_trade], minlength=len(unique_keys))
+
+    valid = ~np.isnan(indicators.sma(prices, 200))
+    start_index = np.where(valid.any(axis=0), valid.argmax(axis=0), len(prices) - 1)
+
+    return BacktestResult(
+        symbols=list(arrays['symbols']),
+        rules=list(rules),
+        dates=pd.DatetimeIndex(arrays['dates']),
+        positions=positions,
+        log_returns=log_returns,
+        start_index=start_index,
+        trade_returns=np.expm1(trade_log) * 100,
+        trade_group=unique_keys // max_trades,
+    )
+
+
+def backtest(symbols: List[str], rules: Sequence[str] = RULES, years: int = DEFAULT_YEARS,
+             cost_bps: float = COST_BPS, store: Optional[PriceStore] = None) -> BacktestResult:
+    """Depodaki fiyatlarla kural testi (bkz. backtest_arrays)"""
+    arrays = load_price_arrays(symbols, years=years, store=store)
+    return backtest_arrays(arrays, rules, cost_bps)
+
+
+def rule_stats(symbol: str, years: int = DEFAULT_YEARS) -> Optional[pd.DataFrame]:
+    """Tek sembol için kural x metrik tablosu (veri yoksa None)"""
+    try:
+        summary = backtest([symbol], years=years).summary()
+        return summary.xs(summary.index.get_level_values('symbol')[0], level='symbol')
+    except Exception as e:
+        print(f"Strateji testi yapılamadı ({symbol}): {e}")
+        return None
+
+
+def format_rule_stats(stats: Optional[pd.DataFrame], rules: Sequence[str] = ('short_term', 'sma_trend', 'bollinger')) -> str:
+    """Strateji metnine eklenecek geçmiş performans satırları (istatistik yoksa boş)"""
+    if stats is None or stats.empty:
+        return ""
+    benchmark = stats.loc['buy_hold']
+    lines = []
+    for rule in rules:
+        row = stats.loc[rule]
+        win_rate = f", isabet %{row['win_rate_pct']:.0f}" if row['n_trades'] > 0 else ""
+        lines.append(f"• {RULE_LABELS[rule]}: yıllık %{row['cagr_pct']:+.1f}, maks. düşüş %{row['max_drawdown_pct']:.1f}, "
+                     f"{int(row['n_trades'])} işlem{win_rate}")
+    lines.append(f"• {RULE_LABELS['buy_hold']}: yıllık %{benchmark['cagr_pct']:+.1f}, "
+                 f"maks. düşüş %{benchmark['max_drawdown_pct']:.1f}")
+    return (f"**Kuralların Geçmiş Performansı (son {benchmark['years']:.1f} yıl, işlem başına "
+            f"%{COST_BPS / 100:.2f} maliyetle):**\n" + "\n".join(lines))
+
+
+if __name__ == "__main__":
+    import argparse
+    import time
+
+    parser = argparse.ArgumentParser(description="Teknik analiz kurallarının geçmiş performansı")
+    parser.add_argument('--symbols', nargs='*', default=['KCHOL'])
+    parser.add_argument('--years', type=int, default=DEFAULT_YEARS)
+    parser.add_argument('--benchmark', action='store_true', help="Sentetik veriyle süre ölçümü")
+    args = parser.parse_args()
+
+    if args.benchmark:
+        rng = np.random.default_rng(0)
+        n_days, n_symbols = 5 * TRADING_DAYS, 100
+        close = 100 * np.exp(np.cumsum(rng.normal(0.0003, 0.02, (n_days, n_symbols)), axis=0))
+        arrays = {'symbols': [f"SYM{i}" for i in range(n_symbols)],
+                  'dates': pd.bdate_range(end='2025-01-01', periods=n_days), 'adj_close': close}
+
+        t0 = time.perf_counter()
+        summary = backtest_arrays(arrays).summary()
+        elapsed = (time.perf_counter() - t0) * 1000
+        print(f"{n_symbols} hisse x {n_days} gün x {len(RULES)} kural: {elapsed:.1f} ms")
+
+        # Tek kural/sembol için döngüyle kontrol
+        result = backtest_arrays({**arrays, 'symbols': ['SYM0'], 'adj_close': close[:, :1]}, rules=['macd'])
+        pos, equity, cost = result.positions[0, :, 0], 1.0, COST_BPS / 10000
+        for t in range(1, n_days):
+            if pos[t - 1]:
+                equity *= close[t, 0] / close[t - 1, 0]
+            if pos[t] != pos[t - 1]:
+                equity *= 1 - cost
+        print(f"MACD SYM0 son değer: {result.equity()[0, -1, 0]:.6f} / döngüyle {equity:.6f}")
+        print(summary.loc['SYM0'].round(2).to_string())
+    else:
+        t0 = time.perf_counter()
+        summary = backtest(args.symbols, years=args.years).summary()
+        print(f"✅ {len(args.symbols)} hisse test edildi ({(time.perf_counter() - t0) * 1000:.0f} ms)")
+        print(summary.round(2).to_string())
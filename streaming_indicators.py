@@ -0,0 +1,490 @@
+# streaming_indicators.py
+# Yeni bar geldiğinde O(1) güncellenen durumlu (stateful) teknik indikatörler
+#
+# Her indikatör yalnızca kendi durumunu tutar (toplamlar, pencere kuyrukları) ve
+# update() ile bar başına sabit sürede güncellenir. Sonuçlar indicators.py ile
+# (dolayısıyla finta ile) aynıdır; durum to_state()/from_state() ile JSON olarak
+# saklanıp geri yüklenebilir.
+
+import json
+import math
+from collections import deque
+from typing import Dict, Optional
+
+import pandas as pd
+
+NAN = float('nan')
+
+
+def _is_nan(value) -> bool:
+    return value is None or (isinstance(value, float) and math.isnan(value))
+
+
+class StreamingSMA:
+    """Basit hareketli ortalama - pencere kuyruğu + kayan toplam"""
+
+    def __init__(self, period: int):
+        self.period = period
+        self.window = deque()
+        self.total = 0.0
+
+    def update(self, x: float) -> float:
+        self.window.append(x)
+        self.total += x
+        if len(self.window) > self.period:
+            self.total -= self.window.popleft()
+        return self.value
+
+    @property
+    def value(self) -> float:
+        return self.total / self.period if len(self.window) == self.period else NAN
+
+    def to_state(self) -> Dict:
+        return {'period': self.period, 'window': list(self.window)}
+
+    @classmethod
+    def from_state(cls, state: Dict) -> 'StreamingSMA':
+        obj = cls(state['period'])
+        for x in state['window']:
+            obj.update(x)
+        return obj
+
+
+class StreamingEMA:
+    """Üstel hareketli ortalama - pandas ewm(adjust=True) ile aynı.
+
+    y_t = pay / payda; pay = x_t + (1 - alpha) * pay, payda = 1 + (1 - alpha) * payda.
+    """
+
+    def __init__(self, span: Optional[float] = None, alpha: Optional[float] = None):
+        self.alpha = alpha if alpha is not None else 2.0 / (span + 1.0)
+        self.num = 0.0
+        self.den = 0.0
+
+    def update(self, x: float) -> float:
+        decay = 1.0 - self.alpha
+        self.num = x + decay * self.num
+        self.den = 1.0 + decay * self.den
+        return self.value
+
+    @property
+    def value(self) -> float:
+        return self.num / self.den if self.den > 0 else NAN
+
+    def to_state(self) -> Dict:
+        return {'alpha': self.alpha, 'num': self.num, 'den': self.den}
+
+    @classmethod
+    def from_state(cls, state: Dict) -> 'StreamingEMA':
+        obj = cls(alpha=state['alpha'])
+        obj.num = state['num']
+        obj.den = state['den']
+        return obj
+
+
+class StreamingMACD:
+    """MACD çizgisi, sinyal ve histogram"""
+
+    def __init__(self, period_fast: int = 12, period_slow: int = 26, signal: int = 9):
+        self.fast = StreamingEMA(span=period_fast)
+        self.slow = StreamingEMA(span=period_slow)
+        self.signal = StreamingEMA(span=signal)
+
+    def update(self, close: float) -> Dict[str, float]:
+        macd_line = self.fast.update(close) - self.slow.update(close)
+        self.signal.update(macd_line)
+        return self.value
+
+    @property
+    def value(self) -> Dict[str, float]:
+        macd_line = self.fast.value - self.slow.value
+        signal = self.signal.value
+        return {'MACD': macd_line, 'MACD_SIGNAL': signal, 'MACD_HIST': macd_line - signal}
+
+    def to_state(self) -> Dict:
+        return {'fast': self.fast.to_state(), 'slow': self.slow.to_state(), 'signal': self.signal.to_state()}
+
+    @classmethod
+    def from_state(cls, state: Dict) -> 'StreamingMACD':
+        obj = cls()
+        obj.fast = StreamingEMA.from_state(state['fast'])
+        obj.slow = StreamingEMA.from_state(state['slow'])
+        obj.signal = StreamingEMA.from_state(state['signal'])
+        return obj
+
+
+class StreamingRSI:
+    """Wilder RSI (alpha = 1/period).
+
+    Model özellikleriyle tutarlı olması için finta'daki gibi adjust=True
+    ağırlıklandırma kullanılır; ilk birkaç bardan sonra klasik Wilder
+    yumuşatmasıyla aynı değere yakınsar.
+    """
+
+    def __init__(self, period: int = 14):
+        self.period = period
+        self.gain = StreamingEMA(alpha=1.0 / period)
+        self.loss = StreamingEMA(alpha=1.0 / period)
+        self.prev_close: Optional[float] = None
+
+    def update(self, close: float) -> float:
+        if self.prev_close is not None:
+            delta = close - self.prev_close
+            self.gain.update(max(delta, 0.0))
+            self.loss.update(max(-delta, 0.0))
+        self.prev_close = close
+        return self.value
+
+    @property
+    def value(self) -> float:
+        gain, loss = self.gain.value, self.loss.value
+        if math.isnan(gain):
+            return NAN
+        if loss == 0:
+            return 100.0 if gain > 0 else NAN
+        return 100 - (100 / (1 + gain / loss))
+
+    def to_state(self) -> Dict:
+        return {'period': self.period, 'gain': self.gain.to_state(), 'loss': self.loss.to_state(),
+                'prev_close': self.prev_close}
+
+    @classmethod
+    def from_state(cls, state: Dict) -> 'StreamingRSI':
+        obj = cls(state['period'])
+        obj.gain = StreamingEMA.from_state(state['gain'])
+        obj.loss = StreamingEMA.from_state(state['loss'])
+        obj.prev_close = state['prev_close']
+        return obj
+
+
+class StreamingBollinger:
+    """Bollinger bantları - kayan pencerede Welford ortalama/varyans güncellemesi"""
+
+    def __init__(self, period: int = 20, std_multiplier: float = 2):
+        self.period = period
+        self.std_multiplier = std_multiplier
+        self.window = deque()
+        self.mean = 0.0
+        self.m2 = 0.0
+
+    def update(self, x: float) -> Dict[str, float]:
+        self.window.append(x)
+        if len(self.window) <= self.period:
+            # Pencere dolana kadar klasik Welford ekleme
+            n = len(self.window)
+            delta = x - self.mean
+            self.mean += delta / n
+            self.m2 += delta * (x - self.mean)
+        else:
+            # Pencere dolu: en eski gözlemi çıkar, yenisini ekle (n sabit)
+            old = self.window.popleft()
+            old_mean = self.mean
+            self.mean += (x - old) / self.period
+            self.m2 += (x - old) * (x - self.mean + old - old_mean)
+            self.m2 = max(self.m2, 0.0)
+        return self.value
+
+    @property
+    def std(self) -> float:
+        if len(self.window) < self.period:
+            return NAN
+        return math.sqrt(self.m2 / (self.period - 1))
+
+    @property
+    def value(self) -> Dict[str, float]:
+        if len(self.window) < self.period:
+            return {'BB_UPPER': NAN, 'BB_MIDDLE': NAN, 'BB_LOWER': NAN, 'BBWidth': NAN}
+        band = self.std_multiplier * self.std
+        upper, lower = self.mean + band, self.mean - band
+        width = (upper - lower) / self.mean if self.mean != 0 else NAN
+        return {'BB_UPPER': upper, 'BB_MIDDLE': self.mean, 'BB_LOWER': lower, 'BBWidth': width}
+
+    def to_state(self) -> Dict:
+        return {'period': self.period, 'std_multiplier': self.std_multiplier,
+                'window': list(self.window), 'mean': self.mean, 'm2': self.m2}
+
+    @classmethod
+    def from_state(cls, state: Dict) -> 'StreamingBollinger':
+        obj = cls(state['period'], state['std_multiplier'])
+        obj.window = deque(state['window'])
+        obj.mean = state['mean']
+        obj.m2 = state['m2']
+        return obj
+
+
+class StreamingATR:
+    """Ortalama gerçek aralık - finta gibi TR'nin basit ortalaması"""
+
+    def __init__(self, period: int = 14):
+        self.sma = StreamingSMA(period)
+        self.prev_close: Optional[float] = None
+
+    def update(self, high: float, low: float, close: float) -> float:
+        tr = high - low
+        if self.prev_close is not None:
+            tr = max(tr, abs(high - self.prev_close), abs(self.prev_close - low))
+        self.prev_close = close
+        return self.sma.update(tr)
+
+    @property
+    def value(self) -> float:
+        return self.sma.value
+
+    def to_state(self) -> Dict:
+        return {'sma': self.sma.to_state(), 'prev_close': self.prev_close}
+
+    @classmethod
+    def from_state(cls, state: Dict) -> 'StreamingATR':
+        obj = cls(state['sma']['period'])
+        obj.sma = StreamingSMA.from_state(state['sma'])
+        obj.prev_close = state['prev_close']
+        return obj
+
+
+class StreamingWilliams:
+    """Williams %R - en yüksek/en düşük için monoton kuyruklar (amortize O(1))"""
+
+    def __init__(self, period: int = 14):
+        self.period = period
+        self.count = 0
+        self.max_high = deque()  # (bar no, high) azalan sırada
+        self.min_low = deque()   # (bar no, low) artan sırada
+        self.last_close = NAN
+
+    def update(self, high: float, low: float, close: float) -> float:
+        i = self.count
+        self.count += 1
+
+        while self.max_high and self.max_high[-1][1] <= high:
+            self.max_high.pop()
+        self.max_high.append((i, high))
+        while self.min_low and self.min_low[-1][1] >= low:
+            self.min_low.pop()
+        self.min_low.append((i, low))
+
+        # Pencereden çıkanları at
+        while self.max_high[0][0] <= i - self.period:
+            self.max_high.popleft()
+        while self.min_low[0][0] <= i - self.period:
+            self.min_low.popleft()
+
+        self.last_close = close
+        return self.value
+
+    @property
+    def value(self) -> float:
+        if self.count < self.period:
+            return NAN
+        highest, lowest = self.max_high[0][1], self.min_low[0][1]
+        if highest == lowest:
+            return NAN
+        return (highest - self.last_close) / (highest - lowest) * -100
+
+    def to_state(self) -> Dict:
+        return {'period': self.period, 'count': self.count, 'max_high': list(self.max_high),
+                'min_low': list(self.min_low), 'last_close': self.last_close}
+
+    @classmethod
+    def from_state(cls, state: Dict) -> 'StreamingWilliams':
+        obj = cls(state['period'])
+        obj.count = state['count']
+        obj.max_high = deque(tuple(item) for item in state['max_high'])
+        obj.min_low = deque(tuple(item) for item in state['min_low'])
+        obj.last_close = state['last_close']
+        return obj
+
+
+class StreamingIndicatorSet:
+    """Bir sembolün tüm indikatörleri (indicators.INDICATOR_COLUMNS ile aynı adlar).
+
+    Tarihli güncellemelerde son bardan eski barlar yok sayılır; son barla aynı tarihli
+    bar (gün içi kısmi barın düzeltilmesi) önceki durumdan yeniden uygulanır.
+    """
+
+    def __init__(self, symbol: str):
+        self.symbol = symbol.upper()
+        self.last_date: Optional[str] = None
+        # Son bar uygulanmadan önceki durum (aynı tarihli düzeltme için)
+        self._previous: Optional[Dict] = None
+        self.sma20 = StreamingSMA(20)
+        self.sma50 = StreamingSMA(50)
+        self.sma200 = StreamingSMA(200)
+        self.rsi = StreamingRSI()
+        self.macd = StreamingMACD()
+        self.bbands = StreamingBollinger()
+        self.atr = StreamingATR()
+        self.williams = StreamingWilliams()
+        self.avgvol20 = StreamingSMA(20)
+
+    def _apply(self, bar: Dict) -> bool:
+        close = float(bar['close'])
+        if _is_nan(close):
+            return False
+        high, low = float(bar['high']), float(bar['low'])
+
+        self.sma20.update(close)
+        self.sma50.update(close)
+        self.sma200.update(close)
+        self.rsi.update(close)
+        self.macd.update(close)
+        self.bbands.update(close)
+        self.atr.update(high, low, close)
+        self.williams.update(high, low, close)
+        self.avgvol20.update(float(bar.get('volume', 0) or 0))
+        return True
+
+    def _restore_previous(self):
+        previous = self._previous
+        self.__dict__.update(StreamingIndicatorSet.from_state(previous).__dict__)
+        self._previous = previous
+
+    def update(self, bar: Dict, date=None) -> Dict[str, float]:
+        """Yeni bar (open/high/low/close/volume) ile tüm indikatörleri güncelle"""
+        if date is None:
+            self._apply(bar)
+            return self.value
+
+        stamp = pd.Timestamp(date)
+        last = pd.Timestamp(self.last_date) if self.last_date is not None else None
+        if last is not None and stamp < last:
+            # Tekrar oynatılan eski bar: durum değişmez
+            return self.value
+        if _is_nan(float(bar['close'])):
+            return self.value
+
+        if last is not None and stamp == last:
+            if self._previous is None:
+                return self.value
+            self._restore_previous()
+        else:
+            self._previous = self.to_state(include_previous=False)
+        self._apply(bar)
+        self.last_date = str(stamp)
+        return self.value
+
+    @property
+    def value(self) -> Dict[str, float]:
+        values = {
+            'SMA20': self.sma20.value,
+            'SMA50': self.sma50.value,
+            'SMA200': self.sma200.value,
+            'RSI': self.rsi.value
+        }
+        values.update(self.macd.value)
+        values.update(self.bbands.value)
+        values['ATR'] = self.atr.value
+        values['Williams'] = self.williams.value
+        values['AVGVOL20'] = self.avgvol20.value
+        return values
+
+    @classmethod
+    def from_history(cls, symbol: str, df: pd.DataFrame) -> 'StreamingIndicatorSet':
+        """Geçmiş barları bir kez oynatarak durumu ısıt (küçük harf OHLCV sütunları)"""
+        obj = cls(symbol)
+        if df.empty:
+            return obj
+        bars = df[['high', 'low', 'close', 'volume']].to_dict('records')
+        for bar in bars[:-1]:
+            obj._apply(bar)
+        if len(df) > 1:
+            obj.last_date = str(pd.Timestamp(df.index[-2]))
+        # Son bar düzeltilebilsin diye önceki durum saklanarak uygulanır
+        obj.update(bars[-1], df.index[-1])
+        return obj
+
+    def to_state(self, include_previous: bool = True) -> Dict:
+        state = {
+            'symbol': self.symbol,
+            'last_date': self.last_date,
+            'sma20': self.sma20.to_state(),
+            'sma50': self.sma50.to_state(),
+            'sma200': self.sma200.to_state(),
+            'rsi': self.rsi.to_state(),
+            'macd': self.macd.to_state(),
+            'bbands': self.bbands.to_state(),
+            'atr': self.atr.to_state(),
+            'williams': self.williams.to_state(),
+            'avgvol20': self.avgvol20.to_state()
+        }
+        if include_previous:
+            state['previous'] = self._previous
+        return state
+
+    @classmethod
+    def from_state(cls, state: Dict) -> 'StreamingIndicatorSet':
+        obj = cls(state['symbol'])
+        obj.last_date = state.get('last_date')
+        obj._previous = state.get('previous')
+        obj.sma20 = StreamingSMA.from_state(state['sma20'])
+        obj.sma50 = StreamingSMA.from_state(state['sma50'])
+        obj.sma200 = StreamingSMA.from_state(state['sma200'])
+        obj.rsi = StreamingRSI.from_state(state['rsi'])
+        obj.macd = StreamingMACD.from_state(state['macd'])
+        obj.bbands = StreamingBollinger.from_state(state['bbands'])
+        obj.atr = StreamingATR.from_state(state['atr'])
+        obj.williams = StreamingWilliams.from_state(state['williams'])
+        obj.avgvol20 = StreamingSMA.from_state(state['avgvol20'])
+        return obj
+
+
+def save_states(states: Dict[str, StreamingIndicatorSet], state_file: str = "indicator_state.json"):
+    """Tüm sembollerin indikatör durumunu JSON dosyasına kaydet"""
+    try:
+        with open(state_file, 'w', encoding='utf-8') as f:
+            json.dump({symbol: s.to_state() for symbol, s in states.items()}, f)
+    except Exception as e:
+        print(f"İndikatör durumu kaydedilemedi: {e}")
+
+
+def load_states(state_file: str = "indicator_state.json") -> Dict[str, StreamingIndicatorSet]:
+    """JSON dosyasındaki indikatör durumlarını geri yükle"""
+    try:
+        with open(state_file, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        return {symbol: StreamingIndicatorSet.from_state(state) for symbol, state in data.items()}
+    except FileNotFoundError:
+        return {}
+    except Exception as e:
+        print(f"İndikatör durumu yüklenemedi: {e}")
+        return {}
+
+
+if __name__ == "__main__":
+    import time
+    import numpy as np
+    from indicators import add_indicators
+
+    n_days, n_symbols = 300, 500
+    rng = np.random.default_rng(7)
+    index = pd.bdate_range('2024-01-01', periods=n_days)
+
+    frames = {}
+    for i in range(n_symbols):
+        close = 100 * np.exp(np.cumsum(rng.normal(0, 0.02, n_days)))
+        frames[f"SYM{i}.IS"] = pd.DataFrame({
+            'open': close, 'high': close * (1 + rng.uniform(0, 0.02, n_days)),
+            'low': close * (1 - rng.uniform(0, 0.02, n_days)), 'close': close,
+            'volume': rng.uniform(1e5, 1e7, n_days)
+        }, index=index)
+
+    # Son bar hariç geçmişle ısıt, kaydet/yükle, sonra son barı akıt
+    states = {s: StreamingIndicatorSet.from_history(s, df.iloc[:-1]) for s, df in frames.items()}
+    save_states(states, "/tmp/indicator_state_demo.json")
+    states = load_states("/tmp/indicator_state_demo.json")
+
+    t0 = time.perf_counter()
+    streamed = {s: states[s].update(df.iloc[-1], df.index[-1]) for s, df in frames.items()}
+    stream_time = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    batch = {s: add_indicators(df).iloc[-1] for s, df in frames.items()}
+    batch_time = time.perf_counter() - t0
+
+    max_diff = max(
+        abs(streamed[s][col] - batch[s][col])
+        for s in frames for col in streamed[s]
+        if not (math.isnan(streamed[s][col]) and math.isnan(batch[s][col]))
+    )
+    print(f"Akış güncellemesi ({n_symbols} sembol, 1 bar): {stream_time * 1000:.1f} ms")
+    print(f"Tüm pencereyi yeniden hesaplama: {batch_time * 1000:.1f} ms")
+    print(f"Maks. fark: {max_diff:.2e}")
@@ -1,9 +1,6 @@
 import streamlit as st
-import pickle
-import yfinance as yf
 import pandas as pd
 import numpy as np
-from finta import TA
 from datetime import datetime, timedelta
 import json
 import os
@@ -12,6 +9,17 @@ import google.generativeai as genai
 from document_rag_agent import DocumentRAGAgent
 from technical_analysis import TechnicalAnalysisEngine
 from financial_calendar import FinancialCalendar
+from price_store import load_ohlcv
+from indicators import get_indicators
+from screener import ScreenerError, screen
+from explanations import build_explanation, contributions_to_dict, explain_rows, format_drivers
+from model_registry import get_model_registry
+from prediction_backtest import ALL_SYMBOLS, ScorecardStore, bin_labels
+from batch_predictions import (
+    DEFAULT_MODEL_PATH, FEATURES, PREDICTION_SYMBOLS, PredictionStore, StoredPrediction,
+    is_current, latest_trading_day, next_trading_day
+)
+from single_flight import market_data_flight
 import uuid
 import requests
 from textblob import TextBlob
@@ -30,6 +38,10 @@ except ImportError:
     # Streamlit Cloud'da dotenv yoksa environment variables kullan
     pass
 
+# UPSTREAM_MODE=record/replay ise yfinance ve HTTP yanıtlarını kaydet/tekrar oynat
+from upstream_replay import install_from_env
+install_from_env()
+
 # Configure Gemini API
 GEMINI_API_KEY = os.getenv('GOOGLE_API_KEY') or os.getenv('GEMINI_API_KEY')
 if GEMINI_API_KEY:
@@ -81,6 +93,7 @@ except Exception as e:
 # Hisse simülasyon modülünü import et
 try:
     from hisse_simulasyon import hisse_simulasyon
+    from investment_simulator import entry_distribution
     print("Hisse Simülasyon modülü başarıyla yüklendi")
 except Exception as e:
     print(f"Hisse Simülasyon modülü yüklenemedi: {e}")
@@ -173,13 +186,67 @@ if 'portfolio_data' not in st.session_state:
 @st.cache_resource
 def load_model():
     try:
-        with open('model/kchol_xgb_model.pkl', 'rb') as f:
-            model = pickle.load(f)
-        return model
+        # Hisseye özel modeller ilk kullanımda yüklenir; yoksa genel model kullanılır
+        return get_model_registry()
     except Exception as e:
         st.error(f"Model yüklenirken hata: {e}")
         return None
 
+# Gece toplu işinin kaydettiği tahminler
+@st.cache_resource
+def get_prediction_store():
+    return PredictionStore()
+
+def get_stored_prediction(hisse_kodu):
+    """Son işlem gününe ait kayıtlı tahmini predict_price formatında döndür (yoksa None)"""
+    try:
+        stored = get_prediction_store().get_latest(hisse_kodu)
+        if not is_current(stored):
+            return None
+        # Hisse için yeni bir model kaydedildiyse eski modelin tahmini kullanılmaz
+        if stored.model_version != get_model_registry().entry(hisse_kodu).version:
+            return None
+        
+        X = np.array([[stored.features[f] for f in FEATURES]])
+        model = None if stored.contributions else get_model_registry().get(hisse_kodu)[0]
+        return {
+            'current_price': stored.current_price,
+            'predicted_price': stored.predicted_price,
+            'change': stored.change,
+            'change_percent': stored.change_percent,
+            'prediction_date': stored.prediction_date,
+            'model_explanation': create_model_explanation(model, X, FEATURES, stored.predicted_price, stored.current_price,
+                                                          stored.contributions),
+            'contributions': stored.contributions
+        }
+    except Exception as e:
+        print(f"Kayıtlı tahmin okunamadı: {e}")
+        return None
+
+def save_live_prediction(hisse_kodu, df, result, model_version=DEFAULT_MODEL_PATH):
+    """Canlı hesaplanan tahmini kaydet (sadece tamamlanmış seans barı için)"""
+    try:
+        trade_day = pd.Timestamp(df.index[-1]).date()
+        if trade_day > latest_trading_day():
+            return
+        
+        latest = df.iloc[-1]
+        get_prediction_store().save_many([StoredPrediction(
+            trade_date=trade_day.isoformat(),
+            symbol=hisse_kodu,
+            current_price=result['current_price'],
+            predicted_price=result['predicted_price'],
+            change=result['change'],
+            change_percent=result['change_percent'],
+            prediction_date=next_trading_day(trade_day).isoformat(),
+            features={f: float(latest[f]) for f in FEATURES},
+            model_version=model_version,
+            created_at=datetime.now().isoformat(),
+            contributions=result.get('contributions')
+        )])
+    except Exception as e:
+        print(f"Tahmin kaydedilemedi: {e}")
+
 # Gemini AI ile genel soruları yanıtlama
 def get_gemini_response(user_message, context=""):
     try:
@@ -237,25 +304,22 @@ Lütfen aşağıdaki kurallara uygun olarak yanıt ver:
 # Hisse verisi alma ve özellik çıkarma
 @st.cache_data(ttl=300)  # 5 dakika cache
 def get_stock_data(symbol='KCHOL.IS', days=300):
+    # Önbellek dolmadan gelen eşzamanlı aynı istekler tek hesaplamayı bekler
+    df = market_data_flight.do(('get_stock_data', symbol, days), _build_stock_data, symbol, days)
+    return None if df is None else df.copy()
+
+def _build_stock_data(symbol, days):
     try:
-        end_date = datetime.now()
-        start_date = end_date - timedelta(days=days)
+        # Yerel fiyat deposundan al (sadece eksik günler indirilir)
+        df = load_ohlcv(symbol, days=days)
         
-        df = yf.download(symbol, start_date, end_date, progress=False)
-        
-        if df.empty:
+        if df is None or df.empty:
             return None
-            
-        # Sütun isimlerini düzenleme
-        df.columns = ['_'.join(col).lower() for col in df.columns]
-        df.columns = [col.split('_')[0] for col in df.columns]
         
-        # Teknik indikatörler
-        df['SMA200'] = TA.SMA(df, 200)
-        df['RSI'] = TA.RSI(df)
-        df['ATR'] = TA.ATR(df)
-        df['BBWidth'] = TA.BBWIDTH(df)
-        df['Williams'] = TA.WILLIAMS(df)
+        # Teknik indikatörler (paylaşılan vektörel motor, yeni bar yoksa önbellekten)
+        df = get_indicators(symbol, days=days, df=df)[
+            ['open', 'high', 'low', 'close', 'volume', 'SMA200', 'RSI', 'ATR', 'BBWidth', 'Williams']
+        ]
         
         # NaN değerleri temizleme
         df = df.dropna()
@@ -573,87 +637,17 @@ def create_technical_chart(df, symbol):
         return None
 
 # Tahmin fonksiyonu
-def create_model_explanation(X, features, predicted_price, current_price):
-    """Model tahminini açıklayan basit analiz"""
+def create_model_explanation(model, X, features, predicted_price, current_price, contributions=None):
+    """Model tahminini XGBoost özellik katkılarıyla (pred_contribs) açıkla"""
     try:
         feature_values = X[0] if len(X.shape) > 1 else X
+        values = {name: float(value) for name, value in zip(features, feature_values)}
         
-        explanations = []
-        
-        # Fiyat verileri analizi
-        close_price = feature_values[features.index('close')]
-        high_price = feature_values[features.index('high')]
-        low_price = feature_values[features.index('low')]
-        open_price = feature_values[features.index('open')]
-        volume = feature_values[features.index('volume')]
-        
-        # Teknik göstergeler
-        sma200 = feature_values[features.index('SMA200')]
-        rsi = feature_values[features.index('RSI')]
-        atr = feature_values[features.index('ATR')]
-        bbwidth = feature_values[features.index('BBWidth')]
-        williams = feature_values[features.index('Williams')]
-        
-        # Fiyat pozisyonu analizi
-        if close_price > sma200:
-            explanations.append(f"Kapanış fiyatı ({close_price:.2f} TL) 200 günlük ortalamanın ({sma200:.2f} TL) üzerinde - Yükseliş trendi")
-        else:
-            explanations.append(f"Kapanış fiyatı ({close_price:.2f} TL) 200 günlük ortalamanın ({sma200:.2f} TL) altında - Düşüş trendi")
+        # Gece toplu işi katkıları tahminle birlikte saklar; yoksa tek satır için hesapla
+        if contributions is None:
+            contributions = contributions_to_dict(explain_rows(model, X)[0], features)
         
-        # RSI analizi
-        if rsi > 70:
-            explanations.append(f"RSI ({rsi:.1f}) aşırı alım bölgesinde - Düşüş riski")
-        elif rsi < 30:
-            explanations.append(f"RSI ({rsi:.1f}) aşırı satım bölgesinde - Yükseliş fırsatı")
-        else:
-            explanations.append(f"RSI ({rsi:.1f}) nötr bölgede - Trend devam edebilir")
-        
-        # Volatilite analizi
-        if atr > 5:
-            explanations.append(f"Yüksek volatilite (ATR: {atr:.2f}) - Fiyat hareketleri büyük olabilir")
-        else:
-            explanations.append(f"Düşük volatilite (ATR: {atr:.2f}) - Fiyat hareketleri sınırlı olabilir")
-        
-        # Bollinger Bant analizi
-        if bbwidth > 0.2:
-            explanations.append(f"Geniş Bollinger Bantları ({bbwidth:.3f}) - Volatilite artıyor")
-        else:
-            explanations.append(f"Dar Bollinger Bantları ({bbwidth:.3f}) - Volatilite azalıyor")
-        
-        # Williams %R analizi
-        if williams < -80:
-            explanations.append(f"Williams %R ({williams:.1f}) aşırı satım - Yükseliş sinyali")
-        elif williams > -20:
-            explanations.append(f"Williams %R ({williams:.1f}) aşırı alım - Düşüş sinyali")
-        else:
-            explanations.append(f"Williams %R ({williams:.1f}) nötr bölge")
-        
-        # Hacim analizi
-        avg_volume = volume / 1000000  # Milyon cinsinden
-        if avg_volume > 10:
-            explanations.append(f"Yüksek işlem hacmi ({avg_volume:.1f}M) - Güçlü trend")
-        else:
-            explanations.append(f"Düşük işlem hacmi ({avg_volume:.1f}M) - Zayıf trend")
-        
-        # Tahmin yönü analizi
-        if predicted_price > current_price:
-            trend_direction = "YÜKSELİŞ"
-            confidence = "Yüksek" if abs(predicted_price - current_price) > 5 else "Orta"
-        else:
-            trend_direction = "DÜŞÜŞ"
-            confidence = "Yüksek" if abs(predicted_price - current_price) > 5 else "Orta"
-        
-        return {
-            'trend_direction': trend_direction,
-            'confidence': confidence,
-            'explanations': explanations,
-            'key_factors': {
-                'price_vs_sma200': "Yukarı" if close_price > sma200 else "Aşağı",
-                'rsi_signal': "Aşırı alım" if rsi > 70 else "Aşırı satım" if rsi < 30 else "Nötr",
-                'volatility': "Yüksek" if atr > 5 else "Düşük",
-                'volume_strength': "Güçlü" if avg_volume > 10 else "Zayıf"
-            }
-        }
+        return build_explanation(contributions, values, predicted_price, current_price)
         
     except Exception as e:
         print(f"Model açıklama hatası: {e}")
@@ -699,8 +693,13 @@ def predict_price(model, df):
             while tomorrow.weekday() >= 5:
                 tomorrow = tomorrow + timedelta(days=1)
         
-        # Model açıklaması oluştur
-        model_explanation = create_model_explanation(X, features, prediction, current_price)
+        # Model açıklaması oluştur (özellik katkıları kayıtla birlikte saklanır)
+        try:
+            contributions = contributions_to_dict(explain_rows(model, X)[0], features)
+        except Exception as e:
+            print(f"Tahmin katkıları hesaplanamadı: {e}")
+            contributions = None
+        model_explanation = create_model_explanation(model, X, features, prediction, current_price, contributions)
         
         result = {
             'current_price': float(round(current_price, 2)),
@@ -708,7 +707,8 @@ def predict_price(model, df):
             'change': float(round(change, 2)),
             'change_percent': float(round(change_percent, 2)),
             'prediction_date': tomorrow.strftime('%Y-%m-%d'),
-            'model_explanation': model_explanation
+            'model_explanation': model_explanation,
+            'contributions': contributions
         }
         
         return result, None
@@ -849,6 +849,14 @@ def main_page():
         if st.button("🔔 Alarm Yönetimi", use_container_width=True, key="menu_alerts"):
             st.session_state.page = "Alarm Yönetimi"
             st.rerun()
+        
+        if st.button("🔍 Hisse Tarayıcı", use_container_width=True, key="menu_screener"):
+            st.session_state.page = "Hisse Tarayıcı"
+            st.rerun()
+        
+        if st.button("🎯 Tahmin Başarısı", use_container_width=True, key="menu_prediction_accuracy"):
+            st.session_state.page = "Tahmin Başarısı"
+            st.rerun()
     
     # Hisse seçici ve hızlı erişim
     st.markdown("### 🎯 Hızlı Analiz")
@@ -988,16 +996,16 @@ def process_message(message):
     """Mesajı işle ve yanıt döndür"""
     message_lower = message.lower()
     
-    # Model yükleme
-    model = load_model()
-    if model is None:
+    # Model kayıt defteri
+    registry = load_model()
+    if registry is None:
         return 'Üzgünüm, model şu anda kullanılamıyor. Lütfen daha sonra tekrar deneyin.'
     
     # Fiyat tahmini
     if any(word in message_lower for word in ['tahmin', 'fiyat', 'ne olacak', 'yükselir mi', 'düşer mi']):
         # Hisse kodunu mesajdan çıkar
         hisse_kodu = 'KCHOL'  # Varsayılan
-        for symbol in ['KCHOL', 'THYAO', 'GARAN', 'AKBNK', 'ASELS', 'EREGL', 'SASA', 'ISCTR', 'BIMAS', 'ALARK', 'TUPRS', 'PGSU', 'KRMD', 'TAVHL', 'DOAS', 'TOASO', 'FROTO', 'VESTL', 'YAPI', 'QNBFB', 'HALKB', 'VAKBN', 'SISE', 'KERVN']:
+        for symbol in PREDICTION_SYMBOLS:
             if symbol.lower() in message_lower:
                 hisse_kodu = symbol
                 break
@@ -1005,18 +1013,25 @@ def process_message(message):
         # Hisse verisini al
         symbol_with_suffix = f"{hisse_kodu}.IS"
         df = get_stock_data(symbol_with_suffix)
-        if df is None:
-            return f'{hisse_kodu} hisse verisi alınamadı. Lütfen daha sonra tekrar deneyin.'
         
-        result, error = predict_price(model, df)
-        if error:
-            return f'Tahmin yapılamadı: {error}'
+        # Gece toplu işinin kaydettiği güncel tahmin varsa model çalıştırılmaz
+        result = get_stored_prediction(hisse_kodu)
+        if result is None:
+            if df is None:
+                return f'{hisse_kodu} hisse verisi alınamadı. Lütfen daha sonra tekrar deneyin.'
+            
+            model, model_entry = registry.get(hisse_kodu)
+            result, error = predict_price(model, df)
+            if error:
+                return f'Tahmin yapılamadı: {error}'
+            save_live_prediction(hisse_kodu, df, result, model_version=model_entry.version)
         
         trend_text = "Yükseliş bekleniyor!" if result['change'] > 0 else "Düşüş bekleniyor!" if result['change'] < 0 else "Fiyat sabit kalabilir"
         
         # Grafik oluştur
-        fig = create_price_chart(df, hisse_kodu, result['current_price'], result['predicted_price'])
-        st.plotly_chart(fig, use_container_width=True)
+        if df is not None:
+            fig = create_price_chart(df, hisse_kodu, result['current_price'], result['predicted_price'])
+            st.plotly_chart(fig, use_container_width=True)
         
         response = f"""**{hisse_kodu} Hisse Senedi Fiyat Tahmini**
 
@@ -1026,6 +1041,8 @@ Teknik analiz sonuçlarına göre, hisse senedinin **{result['predicted_price']:
 
 **Tahmin Tarihi:** {result['prediction_date']}
 
+{format_drivers(result.get('model_explanation'))}
+
 ⚠️ **RİSK UYARISI:** Bu analiz sadece teknik göstergelere dayalıdır ve yatırım tavsiyesi değildir. Hisse senedi yatırımları risklidir ve kayıplara yol açabilir."""
         
         return response
@@ -1140,6 +1157,16 @@ Teknik analiz sonuçlarına göre, hisse senedinin **{result['predicted_price']:
 • **Getiri Oranı:** %{sim_result['getiri %']:.2f}
 
 {'🟢 **KARLILIK**' if sim_result['net kazanç'] > 0 else '🔴 **ZARAR**' if sim_result['net kazanç'] < 0 else '⚪ **BREAKEVEN**'}"""
+                    
+                    # Tek başlangıç tarihi yerine olası tüm girişlerin dağılımı
+                    dagilim = entry_distribution(hisse_kodu, horizon_months=6, years=5)
+                    if dagilim:
+                        response += f"""
+
+**Son 5 Yılda Her Olası 6 Aylık Yatırım ({dagilim['n']} senaryo):**
+• **Medyan Getiri:** %{dagilim['median_pct']:.2f}
+• **En Kötü %5 / En İyi %5:** %{dagilim['p5_pct']:.2f} / %{dagilim['p95_pct']:.2f}
+• **Zarar Etme Olasılığı:** %{dagilim['loss_prob_pct']:.1f}"""
                 else:
                     response = f"❌ Simülasyon hatası: {sim_result['hata']}"
                 
@@ -1259,6 +1286,10 @@ def portfolio_page():
     with col4:
         st.metric("Hisse Sayısı", portfolio_summary.get('stock_count', 0))
     
+    cache_stats = portfolio_manager.quote_cache.stats()
+    st.caption(f"Fiyat önbelleği: {cache_stats['hits']} isabet, {cache_stats['stale']} bayat (arka planda yenilendi), "
+               f"{cache_stats['misses']} ıska")
+    
     # Hisse ekleme formu
     st.markdown("### ➕ Hisse Ekle")
     
@@ -1296,7 +1327,7 @@ def portfolio_page():
         st.markdown("### ➖ Hisse Çıkar")
         
         with st.form("remove_stock_form"):
-            col1, col2 = st.columns(2)
+            col1, col2, col3 = st.columns(3)
             
             with col1:
                 remove_symbol = st.selectbox("Hisse Kodu", [stock['symbol'] for stock in portfolio_summary['stocks']])
@@ -1304,13 +1335,72 @@ def portfolio_page():
             with col2:
                 remove_quantity = st.number_input("Çıkarılacak Miktar", min_value=0.0, step=1.0, help="0 girerseniz tüm hisse çıkarılır")
             
+            with col3:
+                sell_price = st.number_input("Satış Fiyatı", min_value=0.0, step=0.01, help="0 girerseniz maliyetten çıkarılır (kâr/zarar yazılmaz)")
+            
             if st.form_submit_button("Hisse Çıkar", type="secondary", key="remove_stock_submit"):
-                result = portfolio_manager.remove_stock(user_id, remove_symbol, remove_quantity if remove_quantity > 0 else None)
+                result = portfolio_manager.remove_stock(user_id, remove_symbol, remove_quantity if remove_quantity > 0 else None,
+                                                        price=sell_price if sell_price > 0 else None)
                 if result['success']:
                     st.success(result['message'])
                     st.rerun()
                 else:
                     st.error(result['message'])
+
+        # İşlem geçmişi (FIFO lotlarla gerçekleşen kâr/zarar)
+        transactions = portfolio_manager.get_transactions(user_id, limit=50)
+        if transactions:
+            with st.expander("🧾 İşlem Geçmişi"):
+                st.dataframe(pd.DataFrame(transactions).drop(columns=['id']), use_container_width=True)
+
+        # Gün sonu toplu değerleme kayıtlarından değer geçmişi
+        value_history = portfolio_manager.get_value_history(user_id)
+        if len(value_history) > 1:
+            with st.expander("📈 Değer Geçmişi"):
+                history_df = pd.DataFrame(value_history)
+                fig = go.Figure()
+                fig.add_trace(go.Scatter(x=history_df['snapshot_date'], y=history_df['current_value'], name='Piyasa Değeri'))
+                fig.add_trace(go.Scatter(x=history_df['snapshot_date'], y=history_df['total_invested'], name='Yatırılan',
+                                         line=dict(dash='dash')))
+                fig.update_layout(xaxis_title="Tarih", yaxis_title="TL", height=350)
+                st.plotly_chart(fig, use_container_width=True)
+
+        # Monte Carlo risk simülasyonu
+        st.markdown("### 🎲 Risk Simülasyonu")
+
+        horizon_label = st.selectbox("Vade", ["1 ay", "3 ay", "6 ay", "1 yıl"], index=3)
+        horizon_days = {"1 ay": 21, "3 ay": 63, "6 ay": 126, "1 yıl": 252}[horizon_label]
+
+        if st.button("Simülasyonu Çalıştır", key="run_monte_carlo"):
+            with st.spinner("Olası portföy yolları hesaplanıyor..."):
+                risk = portfolio_manager.simulate_portfolio_risk(user_id, horizon_days=horizon_days)
+
+            if not risk:
+                st.error("Risk simülasyonu için yeterli veri bulunamadı.")
+            else:
+                summary = risk['summary']
+                col1, col2, col3, col4 = st.columns(4)
+                with col1:
+                    st.metric("Medyan Değer", f"{summary['median_value']:,.0f} TL")
+                with col2:
+                    st.metric("VaR (%95)", f"{summary['var_95']:,.0f} TL", f"%{summary['var_95_pct']:.1f}", delta_color="off")
+                with col3:
+                    st.metric("CVaR (%95)", f"{summary['cvar_95']:,.0f} TL", f"%{summary['cvar_95_pct']:.1f}", delta_color="off")
+                with col4:
+                    st.metric("Zarar Olasılığı", f"%{summary['loss_prob_pct']:.1f}")
+
+                bands = risk['bands']
+                fig = go.Figure()
+                fig.add_trace(go.Scatter(x=bands.index, y=bands['p95'], line=dict(width=0), showlegend=False))
+                fig.add_trace(go.Scatter(x=bands.index, y=bands['p5'], fill='tonexty', line=dict(width=0),
+                                         fillcolor='rgba(31,119,180,0.15)', name='%5 - %95'))
+                fig.add_trace(go.Scatter(x=bands.index, y=bands['p75'], line=dict(width=0), showlegend=False))
+                fig.add_trace(go.Scatter(x=bands.index, y=bands['p25'], fill='tonexty', line=dict(width=0),
+                                         fillcolor='rgba(31,119,180,0.35)', name='%25 - %75'))
+                fig.add_trace(go.Scatter(x=bands.index, y=bands['p50'], line=dict(color='#1f77b4'), name='Medyan'))
+                fig.update_layout(xaxis_title="İşlem günü", yaxis_title="Portföy değeri (TL)", height=400)
+                st.plotly_chart(fig, use_container_width=True)
+                st.caption(f"{summary['n_paths']:,} yol, {summary['history_days']} günlük geçmiş getiriden blok bootstrap ile üretildi.")
     else:
         st.info("Portföyünüzde henüz hisse bulunmuyor.")
 
@@ -1420,6 +1510,108 @@ def technical_analysis_page():
                     analysis_text = re.sub(img_pattern, '', analysis_text)
                     result['analysis'] = analysis_text
 
+# Hisse Tarayıcı Sayfası
+def screener_page():
+    st.markdown('<h1 class="main-header">🔍 Hisse Tarayıcı</h1>', unsafe_allow_html=True)
+    
+    st.markdown("""
+    BIST 100 evreni üzerinde koşul yazarak tarama yapın. Kullanılabilir alanlar:
+    `close`, `open`, `high`, `low`, `volume`, `change_pct`, `SMA20`, `SMA50`, `SMA200`, `RSI`,
+    `MACD`, `MACD_SIGNAL`, `BB_UPPER`, `BB_LOWER`, `BBWidth`, `ATR`, `Williams`, `avgvol20`
+    """)
+    
+    expression = st.text_input(
+        "Tarama Koşulu",
+        value="RSI > 70 and close > SMA200 and volume > 1.5 * avgvol20",
+        key="screener_expression"
+    )
+    
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        sort_by = st.selectbox("Sıralama", ["RSI", "change_pct", "volume", "Williams", "BBWidth", "ATR", "close"])
+    with col2:
+        ascending = st.checkbox("Artan sırala", value=False)
+    with col3:
+        top_k = st.number_input("Gösterilecek hisse", min_value=1, max_value=100, value=20)
+    
+    if st.button("Tara", type="primary", key="run_screener"):
+        try:
+            with st.spinner("Evren taranıyor..."):
+                start_time = time.perf_counter()
+                result = screen(expression, sort_by=sort_by, ascending=ascending, top_k=int(top_k))
+                elapsed_ms = (time.perf_counter() - start_time) * 1000
+        except ScreenerError as e:
+            st.error(f"Geçersiz koşul: {e}")
+            return
+        except Exception as e:
+            st.error(f"Tarama hatası: {str(e)}")
+            return
+        
+        st.caption(f"{len(result)} hisse bulundu ({elapsed_ms:.0f} ms)")
+        if result.empty:
+            st.info("Koşulu sağlayan hisse bulunamadı.")
+            return
+        
+        columns = ['close', 'change_pct', 'RSI', 'SMA50', 'SMA200', 'Williams', 'volume', 'AVGVOL20', 'date']
+        table = result[columns].rename(columns={
+            'close': 'Fiyat', 'change_pct': 'Değişim %', 'volume': 'Hacim',
+            'AVGVOL20': 'Ort. Hacim (20)', 'date': 'Tarih'
+        })
+        table.index = [symbol.replace('.IS', '') for symbol in table.index]
+        st.dataframe(table.round(2), use_container_width=True)
+
+# Tahmin Başarısı Sayfası
+def prediction_accuracy_page():
+    st.markdown('<h1 class="main-header">🎯 Tahmin Başarısı</h1>', unsafe_allow_html=True)
+    
+    st.markdown("""
+    Kayıtlı günlük tahminlerin gerçekleşen ertesi gün kapanışlarıyla karşılaştırması.
+    Skor kartları gece `python prediction_backtest.py` ile güncellenir.
+    """)
+    
+    try:
+        scorecards = ScorecardStore().load_all()
+    except Exception as e:
+        st.error(f"Skor kartları okunamadı: {str(e)}")
+        return
+    
+    if not scorecards:
+        st.info("Henüz değerlendirilmiş tahmin yok. Toplu tahmin ve backtest çalıştıktan sonra sonuçlar burada görünecek.")
+        return
+    
+    overall = next((card for card in scorecards if card.symbol == ALL_SYMBOLS), None)
+    if overall:
+        col1, col2, col3, col4 = st.columns(4)
+        with col1:
+            st.metric("Tahmin Sayısı", f"{overall.n_predictions:,}")
+        with col2:
+            st.metric("MAPE", f"{overall.mape:.2f}%", delta=f"{overall.mape - overall.naive_mape:+.2f} naif modele göre",
+                      delta_color="inverse")
+        with col3:
+            st.metric("Yön İsabeti", f"{overall.hit_rate:.1f}%")
+        with col4:
+            st.metric("Ortalama Sapma", f"{overall.bias:+.2f}%")
+        
+        fig = go.Figure(go.Bar(x=bin_labels(), y=overall.histogram, marker_color='#1f77b4'))
+        fig.update_layout(title="Tahmin Hatası Dağılımı (tahmin - gerçekleşen, %)", height=350,
+                          xaxis_title="Hata", yaxis_title="Tahmin sayısı")
+        st.plotly_chart(fig, use_container_width=True)
+        st.caption(f"Dönem: {overall.first_date} - {overall.last_date} · Hesaplandı: {overall.computed_at}")
+    
+    table = pd.DataFrame([{
+        'Hisse': card.symbol,
+        'Tahmin': card.n_predictions,
+        'MAPE %': card.mape,
+        'Naif MAPE %': card.naive_mape,
+        'Yön İsabeti %': card.hit_rate,
+        'Sapma %': card.bias,
+        'Hata p5 %': card.percentiles.get('p5'),
+        'Hata p95 %': card.percentiles.get('p95'),
+    } for card in scorecards if card.symbol != ALL_SYMBOLS])
+    if not table.empty:
+        st.markdown("### Hisse Bazında")
+        st.dataframe(table.set_index('Hisse').round(2), use_container_width=True)
+
 # Alarm Yönetimi Sayfası
 def alerts_page():
     st.markdown('<h1 class="main-header">🔔 Alarm Yönetimi</h1>', unsafe_allow_html=True)
@@ -1517,6 +1709,10 @@ def main():
         technical_analysis_page()
     elif st.session_state.page == "Alarm Yönetimi":
         alerts_page()
+    elif st.session_state.page == "Hisse Tarayıcı":
+        screener_page()
+    elif st.session_state.page == "Tahmin Başarısı":
+        prediction_accuracy_page()
 
 if __name__ == "__main__":
     main()
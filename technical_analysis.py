@@ -1,5 +1,4 @@
 import google.generativeai as genai
-import yfinance as yf
 import pandas as pd
 import numpy as np
 import plotly.graph_objects as go
@@ -15,6 +14,9 @@ import tempfile
 import os
 from datetime import datetime, timedelta
 from finta import TA
+from price_store import load_ohlcv
+from indicators import get_indicators
+from strategy_backtest import format_rule_stats, rule_stats
 import warnings
 warnings.filterwarnings('ignore')
 
@@ -39,49 +41,19 @@ class TechnicalAnalysisEngine:
     def get_stock_data(self, symbol='KCHOL.IS', days=300):
         """Hisse verisi al ve teknik indikatörleri hesapla"""
         try:
-            end_date = datetime.now()
-            start_date = end_date - timedelta(days=days)
+            # Yerel fiyat deposundan al (sütunlar küçük harf: open, high, low, close, volume)
+            df = load_ohlcv(symbol, days=days)
             
-            df = yf.download(symbol, start_date, end_date, progress=False)
-            
-            if df.empty:
+            if df is None or df.empty:
                 return None
             
-            # Sütun isimlerini düzenleme - MultiIndex kontrolü
-            if isinstance(df.columns, pd.MultiIndex):
-                df.columns = [col[0] for col in df.columns]
-            
-            # Teknik indikatörler - sütun isimlerini küçük harfe çevir
-            df.columns = [col.lower() for col in df.columns]
-            
-            # Teknik indikatörler
-            df['SMA20'] = TA.SMA(df, 20)
-            df['SMA50'] = TA.SMA(df, 50)
-            df['SMA200'] = TA.SMA(df, 200)
-            df['RSI'] = TA.RSI(df)
-            
-            # MACD hesaplama
-            try:
-                macd_data = TA.MACD(df)
-                df['MACD'] = macd_data['MACD']
-                # MACD signal hesapla (9 günlük EMA)
-                df['MACD_Signal'] = df['MACD'].rolling(window=9).mean()
-            except Exception as e:
-                print(f"MACD hesaplama hatası: {e}")
-                # Basit MACD hesaplama
-                ema12 = df['close'].ewm(span=12).mean()
-                ema26 = df['close'].ewm(span=26).mean()
-                df['MACD'] = ema12 - ema26
-                df['MACD_Signal'] = df['MACD'].ewm(span=9).mean()
-            
-            # Bollinger Bands hesaplama
-            bb_data = TA.BBANDS(df)
-            df['BB_Upper'] = bb_data['BB_UPPER']
-            df['BB_Lower'] = bb_data['BB_LOWER']
-            df['BB_Middle'] = bb_data['BB_MIDDLE']
-            
-            df['ATR'] = TA.ATR(df)
-            df['Williams'] = TA.WILLIAMS(df)
+            # Teknik indikatörler (paylaşılan vektörel motor, yeni bar yoksa önbellekten)
+            df = get_indicators(symbol, days=days, df=df).rename(columns={
+                'MACD_SIGNAL': 'MACD_Signal',
+                'BB_UPPER': 'BB_Upper',
+                'BB_LOWER': 'BB_Lower',
+                'BB_MIDDLE': 'BB_Middle'
+            })
             
             # NaN değerleri temizleme - sadece temel sütunlarda
             basic_columns = ['close', 'high', 'low', 'open', 'volume']
@@ -1067,7 +1039,7 @@ Kod:
         except Exception as e:
             return f"Analiz hatası: {e}"
     
-    def generate_investment_strategy(self, df, current_rsi, macd_signal, sma_signal, bb_signal, volatility_signal):
+    def generate_investment_strategy(self, df, current_rsi, macd_signal, sma_signal, bb_signal, volatility_signal, symbol='KCHOL.IS'):
         """Teknik analiz sonuçlarına göre yatırım stratejisi üret"""
         try:
             current_price = df['close'].iloc[-1]
@@ -1128,6 +1100,10 @@ Kod:
             else:
                 bb_strategy = "Bollinger bantları arasında - Normal fiyat hareketi."
             
+            # Aynı kuralların geçmişteki sonuçları (işlem maliyeti dahil)
+            backtest_text = format_rule_stats(rule_stats(symbol))
+            backtest_section = f"\n\n{backtest_text}" if backtest_text else ""
+            
             strategy = f"""
 **Kısa Vadeli Strateji (1-4 hafta):**
 {short_term_strategy}
@@ -1147,7 +1123,7 @@ Kod:
 • Uzun vadeli trend: {sma200:.2f} TL (SMA 200)
 
 **Bollinger Bands Stratejisi:**
-{bb_strategy}
+{bb_strategy}{backtest_section}
 
 **Genel Öneriler:**
 • Trend yönü: {trend_direction}
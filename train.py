@@ -0,0 +1,228 @@
+# train.py
+# arge-model.ipynb'deki eğitim/doğrulama akışının üretim hali: yerel fiyat deposundan
+# özellikleri kurar, walk-forward doğrulamayı süreç havuzunda paralel çalıştırır,
+# hisse başına modeli kayıt defterine yazar ve MAPE raporları üretir
+#
+# Kullanım (ör. gece tüm evren için):
+#   python train.py                                  -> sohbette desteklenen hisseler
+#   python train.py --universe --workers 8           -> BIST 100 evreni
+#   python train.py --symbols KCHOL THYAO --step 1   -> notebook'taki gibi her gün yeniden eğitim
+
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from multiprocessing import get_context
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+from xgboost import XGBRegressor
+
+from batch_predictions import FEATURES, PREDICTION_SYMBOLS
+from model_registry import MODEL_DIR, get_model_registry
+from universe import BIST_UNIVERSE, MATRIX_FIELDS, compute_panel, get_universe_engine, to_yahoo_symbol
+
+# Notebook'ta seçilen parametreler (seed tekrar üretilebilirlik için sabit)
+DEFAULT_PARAMS = {
+    'objective': 'reg:squarederror',
+    'n_estimators': 750,
+    'colsample_bytree': 0.7,
+    'learning_rate': 0.05,
+    'max_depth': 3,
+    'gamma': 1,
+    'random_state': 20,
+}
+
+DEFAULT_DAYS = 3 * 365       # Eğitim penceresi (takvim günü)
+DEFAULT_TEST_FRAC = 0.2      # Notebook'taki validate(df, 0.2)
+DEFAULT_STEP = 5             # Walk-forward adımı (iş günü); 1 notebook ile birebir aynıdır
+MIN_TRAIN_ROWS = 120
+REPORT_FILE = os.path.join(MODEL_DIR, 'training_report.csv')
+
+
+def build_datasets(symbols: List[str], days: int = DEFAULT_DAYS, refresh: bool = True) -> Dict[str, pd.DataFrame]:
+    """Semboller için özellik + hedef (ertesi işlem günü kapanışı) tabloları.
+
+    Özellikler gece toplu tahminiyle aynı yoldan (evren matrisleri, düzeltilmiş
+    fiyatlar, tek geçişte indikatörler) üretilir; böylece eğitim ve tahmin
+    arasında özellik kayması olmaz.
+    """
+    yahoo_symbols = [to_yahoo_symbol(s) for s in symbols]
+    matrices = get_universe_engine().load_matrices(yahoo_symbols, days=days, refresh=refresh)
+    panel = compute_panel(matrices)
+
+    datasets = {}
+    for i, symbol in enumerate(symbols):
+        valid = ~np.isnan(matrices['close'][:, i])
+        if not valid.any():
+            continue
+        frame = pd.DataFrame(
+            {name: (matrices[name] if name in MATRIX_FIELDS else panel[name])[valid, i] for name in FEATURES},
+            index=matrices['dates'][valid]
+        )
+        frame['target'] = frame['close'].shift(-1)
+        datasets[symbol.upper().replace('.IS', '')] = frame.dropna()
+    return datasets
+
+
+def make_folds(n_rows: int, test_frac: float = DEFAULT_TEST_FRAC, step: int = DEFAULT_STEP) -> List[Tuple[int, int]]:
+    """Walk-forward test aralıkları: her aralık kendinden önceki tüm satırlarla eğitilir"""
+    start = int(n_rows * (1 - test_frac))
+    return [(t, min(t + step, n_rows)) for t in range(start, n_rows, step)]
+
+
+def _fit(X: np.ndarray, y: np.ndarray, params: Dict) -> XGBRegressor:
+    # Paralellik süreç düzeyinde; her model tek thread ile eğitilir
+    model = XGBRegressor(**{**params, 'n_jobs': 1})
+    model.fit(X, y)
+    return model
+
+
+def _fold_task(symbol: str, fold: Tuple[int, int], X: np.ndarray, y: np.ndarray, params: Dict):
+    """Bir walk-forward adımı: [0, t) ile eğit, [t, t+step) tahmin et"""
+    start, end = fold
+    model = _fit(X[:start], y[:start], params)
+    return symbol, fold, model.predict(X[start:end])
+
+
+def _final_task(symbol: str, X: np.ndarray, y: np.ndarray, params: Dict):
+    """Tüm veriyle nihai model (ham UBJ baytları süreçler arası taşınır)"""
+    return symbol, bytes(_fit(X, y, params).get_booster().save_raw('ubj'))
+
+
+def mape(actual, pred) -> float:
+    actual, pred = np.asarray(actual), np.asarray(pred)
+    return float(np.mean(np.abs((actual - pred) / actual)) * 100)
+
+
+def score_predictions(frame: pd.DataFrame) -> Dict[str, float]:
+    """Walk-forward tahminlerinin hata ölçüleri (naif 'yarın = bugün' ile karşılaştırmalı)"""
+    actual, pred, close = frame['target'].to_numpy(), frame['pred'].to_numpy(), frame['close'].to_numpy()
+    hit = np.sign(pred - close) == np.sign(actual - close)
+    return {
+        'mape': round(mape(actual, pred), 4),
+        'rmse': round(float(np.sqrt(np.mean((actual - pred) ** 2))), 4),
+        'naive_mape': round(mape(actual, close), 4),
+        'hit_rate': round(float(hit.mean()) * 100, 2),
+        'n_test': int(len(frame)),
+    }
+
+
+def _run_tasks(tasks: List[Tuple], workers: int) -> List:
+    """Görevleri süreç havuzunda (workers=1 ise aynı süreçte) çalıştır"""
+    if workers <= 1:
+        return [func(*args) for func, *args in tasks]
+
+    # spawn: üst süreçteki OpenMP/XGBoost durumunu fork ile kopyalamaz
+    with ProcessPoolExecutor(max_workers=workers, mp_context=get_context('spawn')) as pool:
+        futures = [pool.submit(func, *args) for func, *args in tasks]
+        return [future.result() for future in futures]
+
+
+def train_datasets(datasets: Dict[str, pd.DataFrame], params: Optional[Dict] = None,
+                   test_frac: float = DEFAULT_TEST_FRAC, step: int = DEFAULT_STEP,
+                   workers: int = 1, register: bool = True, registry=None) -> pd.DataFrame:
+    """Tüm sembollerin walk-forward adımlarını ve nihai modellerini tek havuzda eğit.
+
+    Görevler sembol x adım düzeyinde dağıtıldığından uzun geçmişli tek bir hisse
+    diğer çekirdekleri boşta bırakmaz. Sonuç: sembol başına metrik tablosu.
+    """
+    params = {**DEFAULT_PARAMS, **(params or {})}
+    registry = registry or get_model_registry()
+
+    tasks, folds = [], {}
+    for symbol, frame in datasets.items():
+        if len(frame) < MIN_TRAIN_ROWS:
+            print(f"⚠️ {symbol}: yetersiz veri ({len(frame)} satır), atlandı")
+            continue
+        X, y = frame[FEATURES].to_numpy(float), frame['target'].to_numpy(float)
+        folds[symbol] = make_folds(len(frame), test_frac, step)
+        tasks += [(_fold_task, symbol, fold, X, y, params) for fold in folds[symbol]]
+        if register:
+            tasks.append((_final_task, symbol, X, y, params))
+
+    results = _run_tasks(tasks, workers)
+
+    predictions: Dict[str, np.ndarray] = {s: np.full(len(datasets[s]), np.nan) for s in folds}
+    final_models: Dict[str, bytes] = {}
+    for result in results:
+        if len(result) == 3:
+            symbol, (start, end), pred = result
+            predictions[symbol][start:end] = pred
+        else:
+            final_models[result[0]] = result[1]
+
+    rows = []
+    for symbol in folds:
+        frame = datasets[symbol].assign(pred=predictions[symbol]).dropna(subset=['pred'])
+        metrics = score_predictions(frame)
+        write_symbol_report(symbol, frame, metrics, params, step, model_dir=registry.model_dir)
+
+        if symbol in final_models:
+            model = XGBRegressor()
+            model.load_model(bytearray(final_models[symbol]))
+            registry.register(symbol, model, metrics=metrics, params=params, features=FEATURES)
+
+        rows.append({'symbol': symbol, **metrics,
+                     'train_start': datasets[symbol].index[0].date().isoformat(),
+                     'train_end': datasets[symbol].index[-1].date().isoformat()})
+
+    return pd.DataFrame(rows).set_index('symbol') if rows else pd.DataFrame()
+
+
+def write_symbol_report(symbol: str, frame: pd.DataFrame, metrics: Dict, params: Dict, step: int,
+                        model_dir: str = MODEL_DIR):
+    """model/<SEMBOL>/report.json ve walk_forward.csv"""
+    symbol_dir = os.path.join(model_dir, symbol)
+    os.makedirs(symbol_dir, exist_ok=True)
+
+    frame[['close', 'target', 'pred']].rename_axis('date').to_csv(os.path.join(symbol_dir, 'walk_forward.csv'))
+    with open(os.path.join(symbol_dir, 'report.json'), 'w', encoding='utf-8') as f:
+        json.dump({
+            'symbol': symbol,
+            'created_at': datetime.now().isoformat(timespec='seconds'),
+            'metrics': metrics,
+            'params': params,
+            'walk_forward_step': step,
+            'test_start': frame.index[0].date().isoformat() if len(frame) else None,
+            'test_end': frame.index[-1].date().isoformat() if len(frame) else None,
+        }, f, ensure_ascii=False, indent=2)
+
+
+def run_training(symbols: List[str], days: int = DEFAULT_DAYS, test_frac: float = DEFAULT_TEST_FRAC,
+                 step: int = DEFAULT_STEP, workers: int = 1, params: Optional[Dict] = None,
+                 register: bool = True, refresh: bool = True) -> pd.DataFrame:
+    """Depodan özellikleri kur, eğit, kaydet ve özet raporu yaz"""
+    datasets = build_datasets(symbols, days=days, refresh=refresh)
+    report = train_datasets(datasets, params=params, test_frac=test_frac, step=step,
+                            workers=workers, register=register)
+    if not report.empty:
+        os.makedirs(os.path.dirname(REPORT_FILE), exist_ok=True)
+        report.to_csv(REPORT_FILE)
+    return report
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Hisse başına XGBoost modelleri için walk-forward eğitim")
+    parser.add_argument('--symbols', nargs='*', default=None, help="Hisse kodları (varsayılan: sohbette desteklenenler)")
+    parser.add_argument('--universe', action='store_true', help="BIST 100 evreninin tamamını eğit")
+    parser.add_argument('--days', type=int, default=DEFAULT_DAYS)
+    parser.add_argument('--test-frac', type=float, default=DEFAULT_TEST_FRAC)
+    parser.add_argument('--step', type=int, default=DEFAULT_STEP, help="Walk-forward adımı (1 = her gün yeniden eğit)")
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+    parser.add_argument('--no-register', action='store_true', help="Sadece doğrula, modelleri kaydetme")
+    parser.add_argument('--no-refresh', action='store_true', help="Depodaki veriyi güncellemeden kullan")
+    args = parser.parse_args()
+
+    symbols = args.symbols or (BIST_UNIVERSE if args.universe else PREDICTION_SYMBOLS)
+
+    t0 = time.perf_counter()
+    report = run_training(symbols, days=args.days, test_frac=args.test_frac, step=args.step,
+                          workers=args.workers, register=not args.no_register, refresh=not args.no_refresh)
+    print(f"✅ {len(report)} hisse eğitildi ({time.perf_counter() - t0:.1f}s, {args.workers} süreç)")
+    if not report.empty:
+        print(report[['mape', 'naive_mape', 'hit_rate', 'n_test']].to_string())
@@ -0,0 +1,378 @@
+# transaction_ledger.py
+# Portföy işlemleri için salt eklenen (append-only) defter: alım, satım, temettü ve
+# bölünme. Satışlar FIFO ile açık lotlardan düşülür. Gerçekleşen kâr/zarar, maliyet
+# ve sembol bazlı toplamlar her işlemde artımlı güncellenir; değerleme işlem
+# geçmişinin uzunluğundan bağımsız olarak pozisyon sayısıyla orantılıdır.
+#
+# Defter, portföy deposuyla aynı SQLite dosyasını kullanır ve her işlemde
+# holdings satırını (miktar, ortalama maliyet) aynı veritabanı işlemi içinde eşitler.
+#
+# Kullanım:
+#   python transaction_ledger.py   -> 10.000 işlemlik geçmişte değerleme süresi
+
+import sqlite3
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from portfolio_store import PortfolioStore
+
+TRANSACTION_TYPES = ['buy', 'sell', 'dividend', 'split']
+
+POSITION_COLUMNS = ['symbol', 'quantity', 'cost_basis', 'realized_pnl', 'dividends', 'fees',
+                    'n_transactions', 'first_date', 'last_date']
+
+# Kayan nokta artıkları: bu miktarın altındaki lotlar kapanmış sayılır
+QUANTITY_EPSILON = 1e-9
+
+
+class TransactionLedger:
+    def __init__(self, db_file: str = "portfolios.db"):
+        self.db_file = db_file
+        # holdings tablosu portföy deposunda oluşturulur
+        self.store = PortfolioStore(db_file)
+        self.init_database()
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.db_file, timeout=30, isolation_level=None)
+        conn.execute('PRAGMA journal_mode=WAL')
+        return conn
+
+    def init_database(self):
+        """Veritabanını başlat ve tabloları oluştur"""
+        conn = self._connect()
+        cursor = conn.cursor()
+
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS transactions (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                user_id TEXT NOT NULL,
+                symbol TEXT NOT NULL,
+                type TEXT NOT NULL,
+                quantity REAL NOT NULL,
+                price REAL NOT NULL,
+                amount REAL NOT NULL,
+                fee REAL NOT NULL,
+                realized_pnl REAL NOT NULL,
+                trade_date TEXT NOT NULL,
+                note TEXT,
+                created_at TEXT NOT NULL
+            )
+        ''')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_transactions_user ON transactions (user_id, symbol, id)')
+        # Açık lotlar: FIFO sırası açılış tarihi, aynı gün içinde id ile
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS lots (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                user_id TEXT NOT NULL,
+                symbol TEXT NOT NULL,
+                transaction_id INTEGER NOT NULL,
+                open_date TEXT NOT NULL,
+                quantity REAL NOT NULL,
+                cost_per_share REAL NOT NULL
+            )
+        ''')
+        cursor.execute('DROP INDEX IF EXISTS idx_lots_user')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_lots_fifo ON lots (user_id, symbol, open_date, id)')
+        # Sembol bazlı artımlı toplamlar
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS positions (
+                user_id TEXT NOT NULL,
+                symbol TEXT NOT NULL,
+                quantity REAL NOT NULL,
+                cost_basis REAL NOT NULL,
+                realized_pnl REAL NOT NULL,
+                dividends REAL NOT NULL,
+                fees REAL NOT NULL,
+                n_transactions INTEGER NOT NULL,
+                first_date TEXT NOT NULL,
+                last_date TEXT NOT NULL,
+                PRIMARY KEY (user_id, symbol)
+            )
+        ''')
+
+        conn.close()
+        self._import_holdings()
+
+    def _import_holdings(self):
+        """Defteri olmayan mevcut pozisyonları (JSON'dan aktarılanlar) açılış alımı olarak deftere yaz"""
+        conn = self._connect()
+        try:
+            conn.execute('BEGIN IMMEDIATE')
+            rows = conn.execute(
+                '''SELECT h.user_id, h.symbol, h.quantity, h.avg_price, h.date_added FROM holdings h
+                   WHERE NOT EXISTS (SELECT 1 FROM positions p WHERE p.user_id = h.user_id AND p.symbol = h.symbol)
+                   ORDER BY h.rowid'''
+            ).fetchall()
+            for user_id, symbol, quantity, avg_price, date_added in rows:
+                self._apply_buy(conn, user_id, symbol, quantity, avg_price, 0.0, date_added, note='açılış bakiyesi',
+                                sync=False)
+            conn.execute('COMMIT')
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+        finally:
+            conn.close()
+
+    @staticmethod
+    def _today() -> str:
+        return datetime.now().strftime("%Y-%m-%d")
+
+    def _insert_transaction(self, conn, user_id: str, symbol: str, type_: str, quantity: float, price: float,
+                            amount: float, fee: float, realized_pnl: float, trade_date: str,
+                            note: Optional[str] = None) -> int:
+        cursor = conn.execute(
+            '''INSERT INTO transactions (user_id, symbol, type, quantity, price, amount, fee, realized_pnl,
+                                         trade_date, note, created_at)
+               VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)''',
+            (user_id, symbol, type_, quantity, price, amount, fee, realized_pnl, trade_date, note,
+             datetime.now().isoformat(timespec='seconds'))
+        )
+        return cursor.lastrowid
+
+    def _position(self, conn, user_id: str, symbol: str) -> Optional[Dict]:
+        row = conn.execute(
+            f'''SELECT {", ".join(POSITION_COLUMNS)} FROM positions WHERE user_id = ? AND symbol = ?''',
+            (user_id, symbol)
+        ).fetchone()
+        return dict(zip(POSITION_COLUMNS, row)) if row else None
+
+    def _update_position(self, conn, user_id: str, symbol: str, trade_date: str, quantity: float = 0.0,
+                         cost: float = 0.0, realized: float = 0.0, dividends: float = 0.0, fees: float = 0.0,
+                         quantity_factor: float = 1.0, sync: bool = True) -> Dict:
+        """Toplamlara farkları ekle (artımlı) ve holdings satırını eşitle"""
+        conn.execute(
+            '''INSERT INTO positions (user_id, symbol, quantity, cost_basis, realized_pnl, dividends, fees,
+                                      n_transactions, first_date, last_date)
+               VALUES (?, ?, ?, ?, ?, ?, ?, 1, ?, ?)
+               ON CONFLICT (user_id, symbol) DO UPDATE SET
+                   quantity = quantity * ? + excluded.quantity,
+                   cost_basis = cost_basis + excluded.cost_basis,
+                   realized_pnl = realized_pnl + excluded.realized_pnl,
+                   dividends = dividends + excluded.dividends,
+                   fees = fees + excluded.fees,
+                   n_transactions = n_transactions + 1,
+                   last_date = MAX(last_date, excluded.last_date)''',
+            (user_id, symbol, quantity, cost, realized, dividends, fees, trade_date, trade_date, quantity_factor)
+        )
+        position = self._position(conn, user_id, symbol)
+        if abs(position['quantity']) < QUANTITY_EPSILON:
+            position['quantity'] = 0.0
+            position['cost_basis'] = 0.0
+            conn.execute('UPDATE positions SET quantity = 0, cost_basis = 0 WHERE user_id = ? AND symbol = ?',
+                         (user_id, symbol))
+        if sync:
+            self._sync_holding(conn, user_id, symbol, position, trade_date)
+        return position
+
+    @staticmethod
+    def _sync_holding(conn, user_id: str, symbol: str, position: Dict, trade_date: str):
+        """holdings satırını defterdeki pozisyonla eşitle (aynı veritabanı işleminde)"""
+        if position['quantity'] <= 0:
+            conn.execute('DELETE FROM holdings WHERE user_id = ? AND symbol = ?', (user_id, symbol))
+            return
+        today = datetime.now().strftime("%Y-%m-%d")
+        conn.execute(
+            '''INSERT INTO holdings (user_id, symbol, quantity, avg_price, date_added, last_updated)
+               VALUES (?, ?, ?, ?, ?, ?)
+               ON CONFLICT (user_id, symbol) DO UPDATE SET
+                   quantity = excluded.quantity,
+                   avg_price = excluded.avg_price,
+                   last_updated = excluded.last_updated''',
+            (user_id, symbol, position['quantity'], position['cost_basis'] / position['quantity'],
+             min(trade_date, today), today)
+        )
+
+    def _apply_buy(self, conn, user_id: str, symbol: str, quantity: float, price: float, fee: float,
+                   trade_date: str, note: Optional[str] = None, sync: bool = True) -> Dict:
+        # Yapılmış bir satıştan önceye tarihlenen alım o satışın FIFO maliyetini değiştirirdi
+        last_sell = conn.execute(
+            "SELECT MAX(trade_date) FROM transactions WHERE user_id = ? AND symbol = ? AND type = 'sell'",
+            (user_id, symbol)
+        ).fetchone()[0]
+        if last_sell is not None and trade_date < last_sell:
+            raise ValueError(f"{symbol} için {last_sell} tarihli satıştan önceye alım eklenemez")
+
+        cost = quantity * price + fee
+        transaction_id = self._insert_transaction(conn, user_id, symbol, 'buy', quantity, price, -cost, fee, 0.0,
+                                                  trade_date, note)
+        conn.execute(
+            '''INSERT INTO lots (user_id, symbol, transaction_id, open_date, quantity, cost_per_share)
+               VALUES (?, ?, ?, ?, ?, ?)''',
+            (user_id, symbol, transaction_id, trade_date, quantity, cost / quantity)
+        )
+        return self._update_position(conn, user_id, symbol, trade_date, quantity=quantity, cost=cost, fees=fee,
+                                     sync=sync)
+
+    def _run(self, operation, *args):
+        """İşlemi tek veritabanı işleminde (BEGIN IMMEDIATE) çalıştır"""
+        conn = self._connect()
+        try:
+            conn.execute('BEGIN IMMEDIATE')
+            result = operation(conn, *args)
+            conn.execute('COMMIT')
+            return result
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+        finally:
+            conn.close()
+
+    def buy(self, user_id: str, symbol: str, quantity: float, price: float, fee: float = 0.0,
+            trade_date: Optional[str] = None) -> Dict:
+        """Alım: yeni lot açılır, maliyet ve miktar artırılır"""
+        if quantity <= 0 or price < 0 or fee < 0:
+            raise ValueError("Miktar pozitif, fiyat ve komisyon negatif olmayan bir değer olmalı")
+        return self._run(self._apply_buy, user_id, symbol, quantity, price, fee, trade_date or self._today())
+
+    def sell(self, user_id: str, symbol: str, quantity: Optional[float] = None, price: Optional[float] = None,
+             fee: float = 0.0, trade_date: Optional[str] = None) -> Dict:
+        """Satış: FIFO ile en eski lotlardan düşülür, gerçekleşen kâr/zarar yazılır.
+
+        quantity None ise tüm pozisyon; price None ise pozisyon maliyetinden çıkarılır
+        (portföyden çıkarma/transfer, kâr/zarar oluşmaz).
+        """
+        if (quantity is not None and quantity <= 0) or (price is not None and price < 0) or fee < 0:
+            raise ValueError("Miktar pozitif, fiyat ve komisyon negatif olmayan bir değer olmalı")
+        return self._run(self._apply_sell, user_id, symbol, quantity, price, fee, trade_date or self._today())
+
+    def _apply_sell(self, conn, user_id: str, symbol: str, quantity: Optional[float], price: Optional[float],
+                    fee: float, trade_date: str) -> Dict:
+        position = self._position(conn, user_id, symbol)
+        if position is None or position['quantity'] <= 0:
+            raise ValueError(f"{symbol} pozisyonu yok")
+        if quantity is None or quantity > position['quantity']:
+            quantity = position['quantity']
+
+        remaining, consumed_cost = quantity, 0.0
+        lots = conn.execute('''SELECT id, quantity, cost_per_share FROM lots WHERE user_id = ? AND symbol = ?
+                               ORDER BY open_date, id''',
+                            (user_id, symbol))
+        closed, partial = [], None
+        for lot_id, lot_quantity, cost_per_share in lots:
+            take = min(lot_quantity, remaining)
+            consumed_cost += take * cost_per_share
+            remaining -= take
+            if lot_quantity - take < QUANTITY_EPSILON:
+                closed.append((lot_id,))
+            else:
+                partial = (lot_quantity - take, lot_id)
+            if remaining < QUANTITY_EPSILON:
+                break
+        conn.executemany('DELETE FROM lots WHERE id = ?', closed)
+        if partial:
+            conn.execute('UPDATE lots SET quantity = ? WHERE id = ?', partial)
+
+        sell_price = consumed_cost / quantity if price is None else price
+        proceeds = quantity * sell_price - fee
+        realized = proceeds - consumed_cost
+        self._insert_transaction(conn, user_id, symbol, 'sell', quantity, sell_price, proceeds, fee, realized,
+                                 trade_date, None if price is not None else 'maliyetten çıkarıldı')
+        return self._update_position(conn, user_id, symbol, trade_date, quantity=-quantity, cost=-consumed_cost,
+                                     realized=realized, fees=fee)
+
+    def dividend(self, user_id: str, symbol: str, amount: Optional[float] = None, per_share: Optional[float] = None,
+                 trade_date: Optional[str] = None) -> Dict:
+        """Nakit temettü: toplam tutar ya da hisse başına tutar x mevcut miktar"""
+        def apply(conn):
+            position = self._position(conn, user_id, symbol)
+            if position is None:
+                raise ValueError(f"{symbol} pozisyonu yok")
+            total = amount if amount is not None else (per_share or 0.0) * position['quantity']
+            date = trade_date or self._today()
+            self._insert_transaction(conn, user_id, symbol, 'dividend', position['quantity'],
+                                     total / position['quantity'] if position['quantity'] else 0.0, total, 0.0,
+                                     0.0, date)
+            return self._update_position(conn, user_id, symbol, date, dividends=total)
+        return self._run(apply)
+
+    def split(self, user_id: str, symbol: str, ratio: float, trade_date: Optional[str] = None) -> Dict:
+        """Bölünme/bedelsiz: açık lotların miktarı ratio ile çarpılır, toplam maliyet değişmez"""
+        if ratio <= 0:
+            raise ValueError("Bölünme oranı pozitif olmalı")
+
+        def apply(conn):
+            if self._position(conn, user_id, symbol) is None:
+                raise ValueError(f"{symbol} pozisyonu yok")
+            date = trade_date or self._today()
+            conn.execute('''UPDATE lots SET quantity = quantity * ?, cost_per_share = cost_per_share / ?
+                            WHERE user_id = ? AND symbol = ?''', (ratio, ratio, user_id, symbol))
+            self._insert_transaction(conn, user_id, symbol, 'split', ratio, 0.0, 0.0, 0.0, 0.0, date)
+            return self._update_position(conn, user_id, symbol, date, quantity_factor=ratio)
+        return self._run(apply)
+
+    def positions(self, user_id: str, include_closed: bool = False) -> List[Dict]:
+        """Kullanıcının sembol bazlı toplamları (işlem geçmişi okunmaz)"""
+        conn = self._connect()
+        query = f'SELECT {", ".join(POSITION_COLUMNS)} FROM positions WHERE user_id = ?'
+        if not include_closed:
+            query += ' AND quantity > 0'
+        rows = conn.execute(query + ' ORDER BY first_date, symbol', (user_id,)).fetchall()
+        conn.close()
+        return [dict(zip(POSITION_COLUMNS, row)) for row in rows]
+
+    def all_positions(self) -> List[Dict]:
+        """Tüm kullanıcıların toplamları tek sorguda (toplu değerleme için; kapanmış pozisyonlar dahil)"""
+        conn = self._connect()
+        rows = conn.execute(f'SELECT user_id, {", ".join(POSITION_COLUMNS)} FROM positions ORDER BY user_id').fetchall()
+        conn.close()
+        return [{'user_id': row[0], **dict(zip(POSITION_COLUMNS, row[1:]))} for row in rows]
+
+    def transactions(self, user_id: str, symbol: Optional[str] = None, limit: int = 100) -> List[Dict]:
+        """Son işlemler (en yeni önce)"""
+        columns = ['id', 'symbol', 'type', 'quantity', 'price', 'amount', 'fee', 'realized_pnl', 'trade_date', 'note']
+        query = f'SELECT {", ".join(columns)} FROM transactions WHERE user_id = ?'
+        params: List = [user_id]
+        if symbol is not None:
+            query += ' AND symbol = ?'
+            params.append(symbol)
+        conn = self._connect()
+        rows = conn.execute(query + ' ORDER BY id DESC LIMIT ?', params + [limit]).fetchall()
+        conn.close()
+        return [dict(zip(columns, row)) for row in rows]
+
+    def open_lots(self, user_id: str, symbol: str) -> List[Dict]:
+        """Sembolün açık lotları (FIFO sırasıyla)"""
+        conn = self._connect()
+        rows = conn.execute(
+            '''SELECT open_date, quantity, cost_per_share FROM lots
+               WHERE user_id = ? AND symbol = ? ORDER BY open_date, id''',
+            (user_id, symbol)
+        ).fetchall()
+        conn.close()
+        return [{'open_date': d, 'quantity': q, 'cost_per_share': c} for d, q, c in rows]
+
+
+if __name__ == "__main__":
+    import os
+    import random
+    import tempfile
+    import time
+
+    with tempfile.TemporaryDirectory() as tmp:
+        ledger = TransactionLedger(os.path.join(tmp, "portfolios.db"))
+        random.seed(0)
+        symbols = [f"SYM{i}" for i in range(20)]
+
+        t0 = time.perf_counter()
+        for i in range(10000):
+            symbol = random.choice(symbols)
+            if i % 3 == 2:
+                try:
+                    ledger.sell('demo', symbol, random.randint(1, 5), random.uniform(10, 30))
+                except ValueError:
+                    pass  # pozisyon henüz yok
+            else:
+                ledger.buy('demo', symbol, random.randint(1, 10), random.uniform(10, 30), fee=1.0)
+        insert_ms = (time.perf_counter() - t0) / 10000 * 1000
+
+        t0 = time.perf_counter()
+        for _ in range(100):
+            positions = ledger.positions('demo')
+        value_ms = (time.perf_counter() - t0) / 100 * 1000
+
+        # Kontrol: pozisyon maliyeti = açık lotların toplam maliyeti
+        position = next(p for p in positions if p['symbol'] == 'SYM0')
+        lots_cost = sum(lot['quantity'] * lot['cost_per_share'] for lot in ledger.open_lots('demo', 'SYM0'))
+        print(f"10.000 işlem: işlem başına {insert_ms:.2f} ms | değerleme ({len(positions)} pozisyon): {value_ms:.2f} ms")
+        print(f"SYM0 maliyet: {position['cost_basis']:.4f} / lot toplamı {lots_cost:.4f} | "
+              f"gerçekleşen K/Z {position['realized_pnl']:,.2f} TL")
@@ -0,0 +1,257 @@
+# tree_inference.py
+# Eğitilmiş XGBoost ağaçlarını NumPy dizilerine (eşik, özellik indeksi, yaprak değeri)
+# düzleştirip tek satırlık tahminleri DMatrix / thread açılışı olmadan vektörel hesaplama
+#
+# Kullanım:
+#   python tree_inference.py   -> XGBRegressor.predict ile karşılaştırma ve gecikme ölçümü
+
+import json
+from typing import List, Optional
+
+import numpy as np
+import xgboost as xgb
+
+from model_artifacts import load_model_artifact
+
+# Yalnızca kimlik (identity) bağlantılı regresyon hedefleri desteklenir
+SUPPORTED_OBJECTIVES = ('reg:squarederror', 'reg:absoluteerror', 'reg:pseudohubererror', 'reg:quantileerror')
+
+# Heap düzeni ağaç başına 2^D düğüm tutar; daha derin modeller XGBoost ile tahmin edilir
+MAX_DEPTH = 12
+
+# Bu satır sayısına kadar derlenmiş yol, üstünde XGBoost kullanılır
+COMPILED_MAX_ROWS = 16
+
+
+def _parse_float(value) -> float:
+    """XGBoost 2.x '1.6E2', 3.x '[1.6E2]' biçimindeki base_score"""
+    return float(str(value).strip('[]').split(',')[0])
+
+
+class CompiledForest:
+    """XGBoost ağaç topluluğunun NumPy ile değerlendirilen düzleştirilmiş hali.
+
+    Her ağaç, en derin ağacın derinliği D'ye kadar tam ikili ağaç (heap) düzenine
+    açılır: i. iç düğümün çocukları 2i+1 / 2i+2'dir, erken biten yapraklar alt
+    seviyelere kopyalanır. Böylece her derinlik adımında tüm satırlar ve tüm
+    ağaçlar birlikte tek aritmetik adımla ilerler ve tahmin D vektörel adımda
+    biter. XGBoost ile aynı kuralları izler: girdi float32'ye çevrilir, x < eşik
+    ise sola gidilir, eksik (NaN) değer default_left yönüne gider.
+    """
+
+    def __init__(self, feature: np.ndarray, threshold: np.ndarray, default_left: np.ndarray,
+                 leaf_value: np.ndarray, base_score: float, n_features: int,
+                 node_mean: Optional[np.ndarray] = None):
+        # feature / threshold / default_left: (ağaç, 2^D - 1) iç düğümler; leaf_value: (ağaç, 2^D)
+        self.n_trees, n_leaves = leaf_value.shape
+        self.depth = int(np.log2(n_leaves))
+        self.n_features = n_features
+        self.base_score = np.float32(base_score)
+
+        self._feature = feature.astype(np.intp).ravel()
+        self._threshold = threshold.astype(np.float32).ravel()
+        self._default_left = default_left.astype(bool).ravel()
+        self._leaf_value = leaf_value.astype(np.float32).ravel()
+        self._node_offset = np.arange(self.n_trees) * (n_leaves - 1)
+        self._leaf_offset = np.arange(self.n_trees) * n_leaves - (n_leaves - 1)
+        # node_mean: (ağaç, 2^(D+1) - 1) düğümün örtü (cover) ağırlıklı ortalama çıktısı (katkılar için)
+        self._node_mean = node_mean.astype(np.float64).ravel() if node_mean is not None else None
+        self._mean_offset = np.arange(self.n_trees) * (2 * n_leaves - 1)
+
+    @classmethod
+    def from_booster(cls, booster: xgb.Booster) -> "CompiledForest":
+        """Booster'ın JSON dökümünden dizileri kur"""
+        learner = json.loads(booster.save_raw('json'))['learner']
+
+        objective = learner['objective']['name']
+        if objective not in SUPPORTED_OBJECTIVES:
+            raise ValueError(f"Desteklenmeyen hedef fonksiyonu: {objective}")
+        params = learner['learner_model_param']
+        if int(params.get('num_target', 1)) > 1 or int(params.get('num_class', 0)) > 1:
+            raise ValueError("Çok hedefli / sınıflandırma modelleri desteklenmiyor")
+        if learner['gradient_booster']['name'] != 'gbtree':
+            raise ValueError(f"Desteklenmeyen booster: {learner['gradient_booster']['name']}")
+
+        trees = learner['gradient_booster']['model']['trees']
+        if any(any(t['split_type']) for t in trees):
+            raise ValueError("Kategorik bölmeler desteklenmiyor")
+
+        def node_depth(tree, node=0):
+            left = tree['left_children'][node]
+            if left == -1:
+                return 0
+            return 1 + max(node_depth(tree, left), node_depth(tree, tree['right_children'][node]))
+
+        def node_means(tree) -> List[float]:
+            # XGBoost'un yaklaşık katkılarındaki gibi: yaprak değeri ya da çocukların örtü ağırlıklı ortalaması
+            left_children, right_children = tree['left_children'], tree['right_children']
+            hessian, values = tree['sum_hessian'], tree['split_conditions']
+            means = [0.0] * len(left_children)
+
+            def fill(node):
+                left, right = left_children[node], right_children[node]
+                if left == -1:
+                    means[node] = values[node]
+                else:
+                    fill(left)
+                    fill(right)
+                    means[node] = (means[left] * hessian[left] + means[right] * hessian[right]) / hessian[node]
+
+            fill(0)
+            return means
+
+        depth = max(node_depth(tree) for tree in trees)
+        if depth > MAX_DEPTH:
+            raise ValueError(f"Ağaç derinliği {depth} > {MAX_DEPTH}, heap düzeni çok büyür")
+
+        n_trees, n_internal = len(trees), 2 ** depth - 1
+        feature = np.zeros((n_trees, n_internal), dtype=np.intp)
+        # Erken biten yapraklarda eşik +inf: her satır sola (yaprağın kopyasına) gider
+        threshold = np.full((n_trees, n_internal), np.inf, dtype=np.float32)
+        default_left = np.ones((n_trees, n_internal), dtype=bool)
+        leaf_value = np.zeros((n_trees, n_internal + 1), dtype=np.float32)
+        node_mean = np.zeros((n_trees, 2 * n_internal + 1))
+
+        for i, tree in enumerate(trees):
+            means = node_means(tree)
+            node_mean[i, 0] = means[0]
+            # (heap konumu, orijinal düğüm) çiftleriyle genişlik öncelikli açılım
+            level = [(0, 0)]
+            for _ in range(depth):
+                next_level = []
+                for pos, node in level:
+                    left, right = tree['left_children'][node], tree['right_children'][node]
+                    # Erken biten yaprağın kopyaları aynı ortalamayı taşır (katkısı 0)
+                    node_mean[i, 2 * pos + 1] = means[node if left == -1 else left]
+                    node_mean[i, 2 * pos + 2] = means[node if left == -1 else right]
+                    if left == -1:
+                        next_level += [(2 * pos + 1, node), (2 * pos + 2, node)]
+                        continue
+                    feature[i, pos] = tree['split_indices'][node]
+                    threshold[i, pos] = tree['split_conditions'][node]
+                    default_left[i, pos] = bool(tree['default_left'][node])
+                    next_level += [(2 * pos + 1, left), (2 * pos + 2, right)]
+                level = next_level
+            for pos, node in level:
+                # Yapraklarda split_conditions yaprak değerini (eta ile ölçeklenmiş) tutar
+                leaf_value[i, pos - n_internal] = tree['split_conditions'][node]
+
+        return cls(feature, threshold, default_left, leaf_value,
+                   _parse_float(params['base_score']), int(params['num_feature']), node_mean)
+
+    @classmethod
+    def from_model(cls, model) -> "CompiledForest":
+        """XGBRegressor ya da Booster'dan"""
+        booster = model.get_booster() if hasattr(model, 'get_booster') else model
+        return cls.from_booster(booster)
+
+    def _prepare(self, X) -> np.ndarray:
+        X = np.asarray(X, dtype=np.float32)
+        if X.ndim == 1:
+            X = X[None, :]
+        if X.shape[1] != self.n_features:
+            raise ValueError(f"{self.n_features} özellik bekleniyordu, {X.shape[1]} geldi")
+        return X
+
+    def _descend(self, X: np.ndarray):
+        """Her derinlik adımında (iç düğüm indeksi, çocuğun heap konumu): (satır, ağaç)"""
+        flat_x = X.ravel()
+        row_offset = (np.arange(len(X)) * self.n_features)[:, None]
+        pos = np.zeros((len(X), self.n_trees), dtype=np.intp)
+
+        for _ in range(self.depth):
+            node = pos + self._node_offset
+            x = flat_x[row_offset + self._feature[node]]
+            go_right = ~(x < self._threshold[node])
+            missing = np.isnan(x)
+            if missing.any():
+                go_right = np.where(missing, ~self._default_left[node], go_right)
+            pos = 2 * pos + 1 + go_right
+            yield node, pos
+
+    def predict(self, X) -> np.ndarray:
+        """XGBRegressor.predict ile aynı sonuç (float32)"""
+        X = self._prepare(X)
+        pos = np.zeros((len(X), self.n_trees), dtype=np.intp)
+        for _, pos in self._descend(X):
+            pass
+
+        # XGBoost ile aynı toplama sırası: base_score'dan başlayıp ağaç sırasıyla float32
+        leaves = np.empty((len(X), self.n_trees + 1), dtype=np.float32)
+        leaves[:, 0] = self.base_score
+        leaves[:, 1:] = self._leaf_value[pos + self._leaf_offset]
+        return np.cumsum(leaves, axis=1, dtype=np.float32)[:, -1]
+
+    def contributions(self, X) -> np.ndarray:
+        """Özellik katkıları (Saabas; XGBoost pred_contribs + approx_contribs ile aynı):
+        (satır, özellik + 1), son sütun sabit terim; satır toplamı tahmine eşittir"""
+        if self._node_mean is None:
+            raise ValueError("Düğüm ortalamaları yok, katkılar hesaplanamaz")
+        X = self._prepare(X)
+        n_rows, width = len(X), self.n_features + 1
+        contribs = np.zeros(n_rows * width)
+        cell = (np.arange(n_rows) * width)[:, None]
+
+        # Her bölmede yol üzerindeki ortalama değişimi bölen özelliğe yazılır
+        previous = np.broadcast_to(self._node_mean[self._mean_offset], (n_rows, self.n_trees))
+        for node, pos in self._descend(X):
+            current = self._node_mean[pos + self._mean_offset]
+            contribs += np.bincount((cell + self._feature[node]).ravel(), weights=(current - previous).ravel(),
+                                    minlength=n_rows * width)
+            previous = current
+
+        contribs = contribs.reshape(n_rows, width)
+        contribs[:, -1] = float(self.base_score) + self._node_mean[self._mean_offset].sum()
+        return contribs
+
+
+class FastPredictor:
+    """Küçük girdilerde derlenmiş ormanı, büyük toplu girdilerde XGBoost'u kullanır.
+
+    NumPy yolu satır başına sabit maliyetlidir; XGBoost'un çok çekirdekli C++
+    yolu ise yaklaşık 16 satırdan sonra öne geçer.
+    """
+
+    def __init__(self, forest: Optional[CompiledForest], fallback, max_rows: int = COMPILED_MAX_ROWS):
+        self.forest = forest
+        self.fallback = fallback
+        self.max_rows = max_rows
+
+    def predict(self, X) -> np.ndarray:
+        X = np.asarray(X, dtype=float)
+        if self.forest is not None and (X.ndim == 1 or len(X) <= self.max_rows):
+            return self.forest.predict(X)
+        return self.fallback.predict(X)
+
+
+if __name__ == "__main__":
+    import time
+    import warnings
+    warnings.filterwarnings('ignore')
+
+    model = load_model_artifact()
+    t0 = time.perf_counter()
+    forest = CompiledForest.from_model(model)
+    print(f"Derleme: {forest.n_trees} ağaç, derinlik {forest.depth}, {(time.perf_counter() - t0) * 1000:.0f} ms")
+
+    rng = np.random.default_rng(0)
+    X = rng.uniform(1, 300, (500, forest.n_features))
+    X[rng.random(X.shape) < 0.02] = np.nan
+    diff = np.abs(forest.predict(X) - model.predict(X))
+    print(f"500 satır maks. fark: {diff.max():.2e} (göreli {(diff / np.abs(model.predict(X))).max():.2e})")
+
+    def bench(fn, rows, repeat):
+        fn(rows)
+        t0 = time.perf_counter()
+        for _ in range(repeat):
+            fn(rows)
+        return (time.perf_counter() - t0) / repeat * 1000
+
+    fast = FastPredictor(forest, model)
+    for n_rows, repeat in [(1, 500), (16, 200), (500, 50)]:
+        rows = X[:n_rows]
+        stock = bench(model.predict, rows, repeat)
+        compiled = bench(forest.predict, rows, repeat)
+        dispatched = bench(fast.predict, rows, repeat)
+        print(f"{n_rows:4d} satır: XGBRegressor.predict {stock:7.3f} ms | derlenmiş {compiled:7.3f} ms "
+              f"| FastPredictor {dispatched:7.3f} ms")
@@ -0,0 +1,237 @@
+# tuning.py
+# Notebook'taki GridSearchCV'nin yerine: zaman serisine uygun bölmeler, doğrulama
+# katında erken durdurma, süreç havuzunda paralel denemeler ve (sembol, parametre,
+# veri özeti) anahtarlı deneme önbelleği. En iyi parametreler walk-forward ile
+# doğrulanıp doğrudan model kayıt defterine yazılır.
+#
+# Kullanım:
+#   python tuning.py --symbols KCHOL THYAO --workers 8
+#   python tuning.py --universe --no-register
+
+import hashlib
+import itertools
+import json
+import os
+import sqlite3
+import time
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+from xgboost import XGBRegressor
+
+from batch_predictions import FEATURES, PREDICTION_SYMBOLS
+from train import (
+    DEFAULT_DAYS, DEFAULT_PARAMS, DEFAULT_STEP, MIN_TRAIN_ROWS, _run_tasks, build_datasets, mape, train_datasets
+)
+from universe import BIST_UNIVERSE
+
+# Notebook'taki ızgara; n_estimators artık erken durdurmayla belirlenir
+PARAM_GRID = {
+    'max_depth': [3, 6],
+    'learning_rate': [0.05],
+    'colsample_bytree': [0.3, 0.7],
+    'gamma': [1, 5],
+}
+
+MAX_ESTIMATORS = 1000
+EARLY_STOPPING_ROUNDS = 50
+N_SPLITS = 3
+# Doğrulama bloğunun erken durdurmaya ayrılan baş kısmı; skor kalan kısımda hesaplanır
+STOPPING_FRACTION = 0.5
+
+
+def param_grid(grid: Dict[str, List]) -> List[Dict]:
+    """Izgaradaki tüm parametre kombinasyonları"""
+    keys = sorted(grid)
+    return [dict(zip(keys, values)) for values in itertools.product(*(grid[k] for k in keys))]
+
+
+def params_key(params: Dict) -> str:
+    return json.dumps(params, sort_keys=True)
+
+
+def time_series_splits(n_rows: int, n_splits: int = N_SPLITS) -> List[Tuple[int, int]]:
+    """Genişleyen pencereli bölmeler (TimeSeriesSplit gibi): [0, t) eğitim, [t, t+blok) doğrulama"""
+    block = n_rows // (n_splits + 1)
+    return [(block * (k + 1), n_rows if k == n_splits - 1 else block * (k + 2)) for k in range(n_splits)]
+
+
+def data_hash(X: np.ndarray, y: np.ndarray, n_splits: int = N_SPLITS) -> str:
+    """Veri ve deney kurgusunun özeti; veri değişince önbellekteki denemeler geçersizleşir"""
+    setup = json.dumps({'n_splits': n_splits, 'max_estimators': MAX_ESTIMATORS,
+                        'early_stopping': EARLY_STOPPING_ROUNDS, 'stopping_fraction': STOPPING_FRACTION,
+                        'base': DEFAULT_PARAMS,
+                        'features': FEATURES}, sort_keys=True)
+    digest = hashlib.sha1()
+    digest.update(np.ascontiguousarray(X, dtype=np.float64).tobytes())
+    digest.update(np.ascontiguousarray(y, dtype=np.float64).tobytes())
+    digest.update(setup.encode())
+    return digest.hexdigest()
+
+
+def _trial_task(symbol: str, params: Dict, X: np.ndarray, y: np.ndarray, splits: List[Tuple[int, int]]):
+    """Bir parametre setini tüm bölmelerde erken durdurmayla değerlendir.
+
+    Doğrulama bloğunun baş kısmı erken durdurmada, sonraki kısmı skorlamada kullanılır;
+    böylece durdurma noktasına aşırı uyan parametreler seçimde avantaj kazanmaz.
+    """
+    rmse, mapes, iterations = [], [], []
+    for train_end, val_end in splits:
+        stop_end = min(train_end + max(1, int((val_end - train_end) * STOPPING_FRACTION)), val_end - 1)
+        model = XGBRegressor(**{**DEFAULT_PARAMS, **params, 'n_estimators': MAX_ESTIMATORS,
+                                'early_stopping_rounds': EARLY_STOPPING_ROUNDS, 'n_jobs': 1})
+        model.fit(X[:train_end], y[:train_end], eval_set=[(X[train_end:stop_end], y[train_end:stop_end])],
+                  verbose=False)
+        X_val, y_val = X[stop_end:val_end], y[stop_end:val_end]
+        pred = model.predict(X_val)  # en iyi iterasyona kadar
+        rmse.append(float(np.sqrt(np.mean((pred - y_val) ** 2))))
+        mapes.append(mape(y_val, pred))
+        iterations.append(model.best_iteration + 1)
+    return {
+        'symbol': symbol,
+        'params': params,
+        'cv_rmse': float(np.mean(rmse)),
+        'cv_mape': float(np.mean(mapes)),
+        'n_estimators': int(round(np.mean(iterations))),
+        'fold_rmse': rmse,
+    }
+
+
+class TrialCache:
+    """Tamamlanmış denemeler (sembol, parametre, veri özeti) anahtarıyla SQLite'ta"""
+
+    def __init__(self, db_file: str = "tuning_cache.db"):
+        self.db_file = db_file
+        self.init_database()
+
+    def init_database(self):
+        """Veritabanını başlat ve tabloları oluştur"""
+        conn = sqlite3.connect(self.db_file)
+        cursor = conn.cursor()
+
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS trials (
+                symbol TEXT NOT NULL,
+                params TEXT NOT NULL,
+                data_hash TEXT NOT NULL,
+                cv_rmse REAL NOT NULL,
+                cv_mape REAL NOT NULL,
+                n_estimators INTEGER NOT NULL,
+                fold_rmse TEXT NOT NULL,
+                created_at TEXT NOT NULL,
+                PRIMARY KEY (symbol, data_hash, params)
+            )
+        ''')
+
+        conn.commit()
+        conn.close()
+
+    def get(self, symbol: str, digest: str) -> Dict[str, Dict]:
+        """Sembolün bu veriyle tamamlanmış denemeleri (anahtar: params_key)"""
+        conn = sqlite3.connect(self.db_file)
+        rows = conn.execute(
+            '''SELECT params, cv_rmse, cv_mape, n_estimators, fold_rmse
+               FROM trials WHERE symbol = ? AND data_hash = ?''',
+            (symbol, digest)
+        ).fetchall()
+        conn.close()
+        return {
+            params: {'symbol': symbol, 'params': json.loads(params), 'cv_rmse': cv_rmse, 'cv_mape': cv_mape,
+                     'n_estimators': n_estimators, 'fold_rmse': json.loads(fold_rmse)}
+            for params, cv_rmse, cv_mape, n_estimators, fold_rmse in rows
+        }
+
+    def save_many(self, trials: List[Dict], digests: Dict[str, str]):
+        """Denemeleri tek işlemde kaydet"""
+        created_at = datetime.now().isoformat()
+        conn = sqlite3.connect(self.db_file)
+        with conn:
+            conn.executemany(
+                '''INSERT OR REPLACE INTO trials
+                   (symbol, params, data_hash, cv_rmse, cv_mape, n_estimators, fold_rmse, created_at)
+                   VALUES (?, ?, ?, ?, ?, ?, ?, ?)''',
+                [(t['symbol'], params_key(t['params']), digests[t['symbol']], t['cv_rmse'], t['cv_mape'],
+                  t['n_estimators'], json.dumps(t['fold_rmse']), created_at) for t in trials]
+            )
+        conn.close()
+
+
+def tune_datasets(datasets: Dict[str, pd.DataFrame], grid: Optional[Dict[str, List]] = None,
+                  n_splits: int = N_SPLITS, workers: int = 1, cache: Optional[TrialCache] = None,
+                  register: bool = True, registry=None, step: int = DEFAULT_STEP) -> pd.DataFrame:
+    """Tüm semboller x parametre setlerini tek havuzda dene, en iyisini seç ve kaydet.
+
+    Önbellekte aynı veriyle tamamlanmış denemeler tekrar çalıştırılmaz. register=True
+    ise en iyi parametreler train.py'nin walk-forward doğrulamasından geçirilip
+    model kayıt defterine yazılır.
+    """
+    candidates = param_grid(grid or PARAM_GRID)
+    cache = cache or TrialCache()
+
+    tasks, digests, trials, cached_counts = [], {}, {}, {}
+    for symbol, frame in datasets.items():
+        if len(frame) < MIN_TRAIN_ROWS:
+            print(f"⚠️ {symbol}: yetersiz veri ({len(frame)} satır), atlandı")
+            continue
+        X, y = frame[FEATURES].to_numpy(float), frame['target'].to_numpy(float)
+        digests[symbol] = data_hash(X, y, n_splits)
+        cached = cache.get(symbol, digests[symbol])
+        splits = time_series_splits(len(frame), n_splits)
+
+        trials[symbol] = [cached[params_key(p)] for p in candidates if params_key(p) in cached]
+        cached_counts[symbol] = len(trials[symbol])
+        tasks += [(_trial_task, symbol, p, X, y, splits) for p in candidates if params_key(p) not in cached]
+
+    new_trials = _run_tasks(tasks, workers)
+    if new_trials:
+        cache.save_many(new_trials, digests)
+    for trial in new_trials:
+        trials[trial['symbol']].append(trial)
+
+    rows, best_params = [], {}
+    for symbol, symbol_trials in trials.items():
+        best = min(symbol_trials, key=lambda t: t['cv_rmse'])
+        best_params[symbol] = {**DEFAULT_PARAMS, **best['params'], 'n_estimators': best['n_estimators']}
+        rows.append({'symbol': symbol, 'cv_rmse': round(best['cv_rmse'], 4), 'cv_mape': round(best['cv_mape'], 4),
+                     'trials': len(symbol_trials), 'cached': cached_counts[symbol], **best_params[symbol]})
+
+    report = pd.DataFrame(rows).set_index('symbol') if rows else pd.DataFrame()
+
+    if register and best_params:
+        # Aynı parametreleri seçen semboller tek walk-forward çağrısında
+        groups: Dict[str, List[str]] = {}
+        for symbol, params in best_params.items():
+            groups.setdefault(params_key(params), []).append(symbol)
+        for key, symbols in groups.items():
+            validated = train_datasets({s: datasets[s] for s in symbols}, params=json.loads(key), step=step,
+                                       workers=workers, register=True, registry=registry)
+            for column in ['mape', 'naive_mape', 'hit_rate']:
+                report.loc[validated.index, column] = validated[column]
+
+    return report
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Hisse başına XGBoost hiperparametre araması")
+    parser.add_argument('--symbols', nargs='*', default=None, help="Hisse kodları (varsayılan: sohbette desteklenenler)")
+    parser.add_argument('--universe', action='store_true', help="BIST 100 evreninin tamamı")
+    parser.add_argument('--days', type=int, default=DEFAULT_DAYS)
+    parser.add_argument('--splits', type=int, default=N_SPLITS)
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+    parser.add_argument('--no-register', action='store_true', help="Sadece ara, modelleri kaydetme")
+    parser.add_argument('--db', default="tuning_cache.db")
+    args = parser.parse_args()
+
+    symbols = args.symbols or (BIST_UNIVERSE if args.universe else PREDICTION_SYMBOLS)
+
+    t0 = time.perf_counter()
+    datasets = build_datasets(symbols, days=args.days)
+    report = tune_datasets(datasets, n_splits=args.splits, workers=args.workers,
+                           cache=TrialCache(args.db), register=not args.no_register)
+    print(f"✅ {len(report)} hisse için arama tamamlandı ({time.perf_counter() - t0:.1f}s)")
+    if not report.empty:
+        print(report.to_string())
@@ -0,0 +1,203 @@
+# turkish_dates.py
+# Simülasyon girdilerindeki yaygın Türkçe tarih ifadeleri için hızlı ayrıştırıcı:
+# "6 ay önce", "2023 başı", "geçen yıl", "5 Ocak 2023", ISO tarihler...
+# Sonuçlar (ifade, gün) anahtarıyla önbelleğe alınır; tanınmayan ifadeler için
+# dateparser yalnızca ilk ihtiyaçta içe aktarılır.
+
+import re
+from datetime import date, datetime, timedelta
+from functools import lru_cache
+from typing import Optional
+
+MONTHS = {
+    'ocak': 1, 'şubat': 2, 'subat': 2, 'mart': 3, 'nisan': 4, 'mayıs': 5, 'mayis': 5, 'haziran': 6,
+    'temmuz': 7, 'ağustos': 8, 'agustos': 8, 'eylül': 9, 'eylul': 9, 'ekim': 10, 'kasım': 11,
+    'kasim': 11, 'aralık': 12, 'aralik': 12,
+}
+
+UNITS = {
+    'gün': 'days', 'gun': 'days',
+    'hafta': 'weeks',
+    'ay': 'months',
+    'yıl': 'years', 'yil': 'years', 'sene': 'years',
+}
+
+NUMBER_WORDS = {
+    'bir': 1, 'iki': 2, 'üç': 3, 'uc': 3, 'dört': 4, 'dort': 4, 'beş': 5, 'bes': 5, 'altı': 6, 'alti': 6,
+    'yedi': 7, 'sekiz': 8, 'dokuz': 9, 'on': 10, 'yarım': 0.5, 'yarim': 0.5,
+}
+
+_UNIT_PATTERN = '|'.join(sorted(UNITS, key=len, reverse=True))
+_MONTH_PATTERN = '|'.join(sorted(MONTHS, key=len, reverse=True))
+_NUMBER_PATTERN = r'\d+|' + '|'.join(sorted(NUMBER_WORDS, key=len, reverse=True))
+
+_RELATIVE = re.compile(rf'^({_NUMBER_PATTERN})\s*({_UNIT_PATTERN})\s*(önce|once|evvel)$')
+_LAST = re.compile(rf'^(geçen|gecen|önceki|onceki)\s*({_UNIT_PATTERN})(?:ın|in|un|ün|nın|nin)?(\s*(başı|basi|sonu))?$')
+_THIS = re.compile(rf'^(bu)\s*({_UNIT_PATTERN})(?:ın|in|un|ün|nın|nin)?(\s*(başı|basi|sonu))?$')
+_YEAR_PART = re.compile(r'^(\d{4})\s*(yılı|yili)?\s*(başı|basi|başında|basinda|ortası|ortasi|sonu|sonunda)?$')
+_ISO = re.compile(r'^(\d{4})[-/.](\d{1,2})[-/.](\d{1,2})$')
+_DMY = re.compile(r'^(\d{1,2})[-/.](\d{1,2})[-/.](\d{4})$')
+_DAY_MONTH_YEAR = re.compile(rf'^(\d{{1,2}})\s+({_MONTH_PATTERN})\s+(\d{{4}})$')
+_MONTH_YEAR = re.compile(rf'^({_MONTH_PATTERN})\s+(\d{{4}})(\s*(başı|basi|sonu))?$')
+
+
+def _shift_months(day: date, months: int) -> date:
+    """Ay ekle/çıkar (ay sonu taşmasında ayın son günü)"""
+    month_index = day.year * 12 + day.month - 1 + months
+    year, month = divmod(month_index, 12)
+    month += 1
+    next_month = date(year + (month == 12), month % 12 + 1, 1)
+    return date(year, month, min(day.day, (next_month - timedelta(days=1)).day))
+
+
+def _shift(day: date, amount: float, unit: str) -> date:
+    if unit == 'days':
+        return day - timedelta(days=int(amount))
+    if unit == 'weeks':
+        return day - timedelta(weeks=amount)
+    months = amount * 12 if unit == 'years' else amount
+    if months != int(months):
+        # "yarım ay" gibi kesirli aylar gün olarak
+        return day - timedelta(days=round(months * 30.4))
+    return _shift_months(day, -int(months))
+
+
+def _period_edge(day: date, unit: str, edge: Optional[str]) -> date:
+    """Dönemin başı/sonu (edge None ise günün kendisi)"""
+    if not edge:
+        return day
+    start = edge.startswith('ba')
+    if unit == 'years':
+        return date(day.year, 1, 1) if start else date(day.year, 12, 31)
+    if unit == 'months':
+        first = day.replace(day=1)
+        return first if start else _shift_months(first, 1) - timedelta(days=1)
+    if unit == 'weeks':
+        monday = day - timedelta(days=day.weekday())
+        return monday if start else monday + timedelta(days=6)
+    return day
+
+
+def _normalize(text: str) -> str:
+    text = text.replace('I', 'ı').replace('İ', 'i').lower().strip()
+    text = re.sub(r"['’]", '', text)
+    return re.sub(r'\s+', ' ', text)
+
+
+def parse_fast(text: str, today: date) -> Optional[date]:
+    """Tanınan Türkçe/ISO ifadeler için tarih, tanınmıyorsa None"""
+    text = _normalize(text)
+
+    if text in ('bugün', 'bugun', 'şimdi', 'simdi'):
+        return today
+    if text == 'dün' or text == 'dun':
+        return today - timedelta(days=1)
+    if text in ('yılbaşı', 'yilbasi', 'yıl başı', 'yil basi'):
+        return date(today.year, 1, 1)
+
+    match = _RELATIVE.match(text)
+    if match:
+        number = match.group(1)
+        amount = float(number) if number.isdigit() else NUMBER_WORDS[number]
+        return _shift(today, amount, UNITS[match.group(2)])
+
+    match = _LAST.match(text)
+    if match:
+        unit = UNITS[match.group(2)]
+        return _period_edge(_shift(today, 1, unit), unit, match.group(4))
+
+    match = _THIS.match(text)
+    if match:
+        unit = UNITS[match.group(2)]
+        return _period_edge(today, unit, match.group(4) or 'başı')
+
+    match = _YEAR_PART.match(text)
+    if match:
+        year, part = int(match.group(1)), match.group(3) or 'başı'
+        if part.startswith('ba'):
+            return date(year, 1, 1)
+        if part.startswith('orta'):
+            return date(year, 7, 1)
+        return date(year, 12, 31)
+
+    try:
+        match = _ISO.match(text)
+        if match:
+            return date(int(match.group(1)), int(match.group(2)), int(match.group(3)))
+
+        match = _DMY.match(text)
+        if match:
+            return date(int(match.group(3)), int(match.group(2)), int(match.group(1)))
+
+        match = _DAY_MONTH_YEAR.match(text)
+        if match:
+            return date(int(match.group(3)), MONTHS[match.group(2)], int(match.group(1)))
+    except ValueError:
+        return None
+
+    match = _MONTH_YEAR.match(text)
+    if match:
+        first = date(int(match.group(2)), MONTHS[match.group(1)], 1)
+        return _period_edge(first, 'months', match.group(4) or 'başı')
+
+    return None
+
+
+def _parse_with_dateparser(text: str) -> Optional[date]:
+    # dateparser yavaş içe aktarılır; yalnızca hızlı yol tanımadığında yüklenir
+    import dateparser
+    parsed = dateparser.parse(text, languages=['tr', 'en'])
+    return parsed.date() if parsed else None
+
+
+@lru_cache(maxsize=512)
+def _parse_cached(text: str, today: date) -> Optional[date]:
+    parsed = parse_fast(text, today)
+    if parsed is None:
+        try:
+            parsed = _parse_with_dateparser(text)
+        except Exception as e:
+            print(f"Tarih ayrıştırma hatası ({text}): {e}")
+    return parsed
+
+
+def parse_turkish_date(text: str, today: Optional[date] = None) -> Optional[datetime]:
+    """Türkçe tarih ifadesini datetime'a çevir (tanınmazsa None).
+
+    Göreli ifadeler gün değişince farklı sonuç verdiğinden önbellek anahtarı
+    (ifade, bugün) çiftidir.
+    """
+    if not text or not text.strip():
+        return None
+    parsed = _parse_cached(text.strip(), today or date.today())
+    return datetime.combine(parsed, datetime.min.time()) if parsed else None
+
+
+if __name__ == "__main__":
+    import time
+
+    examples = ['6 ay önce', '2023 başı', 'geçen yıl', 'geçen ay başı', 'bu yıl', '2022-01-05', '05.01.2022',
+                '5 Ocak 2023', 'Mart 2024', 'üç hafta önce', '2021 ortası', 'dün', 'iki yıl önce']
+    for example in examples:
+        print(f"{example:15s} -> {parse_turkish_date(example):%Y-%m-%d}")
+
+    n = 10000
+    t0 = time.perf_counter()
+    for _ in range(n):
+        parse_turkish_date('6 ay önce')
+    cached_us = (time.perf_counter() - t0) / n * 1e6
+
+    t0 = time.perf_counter()
+    for i in range(1000):
+        parse_fast(examples[i % len(examples)], date.today())
+    fast_us = (time.perf_counter() - t0) / 1000 * 1e6
+    print(f"Önbellekten: {cached_us:.2f} µs | hızlı yol: {fast_us:.1f} µs")
+
+    t0 = time.perf_counter()
+    import dateparser
+    import_ms = (time.perf_counter() - t0) * 1000
+    t0 = time.perf_counter()
+    for _ in range(20):
+        dateparser.parse('6 ay önce')
+    dateparser_ms = (time.perf_counter() - t0) / 20 * 1000
+    print(f"dateparser içe aktarma: {import_ms:.0f} ms | dateparser.parse: {dateparser_ms:.2f} ms")
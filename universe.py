@@ -0,0 +1,241 @@
+# universe.py
+# Tüm hisse evreni için hizalanmış (tarih x sembol) fiyat matrisleri ve
+# tek geçişte hesaplanan kesitsel (cross-sectional) indikatör anlık görüntüsü
+
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from indicators import INDICATOR_COLUMNS, compute_indicators
+from price_store import PriceStore, get_price_store
+
+# BIST 100 bileşenleri (endeks değişikliklerinde güncellenmeli)
+BIST_UNIVERSE = [
+    'AEFES', 'AGHOL', 'AKBNK', 'AKCNS', 'AKFGY', 'AKSA', 'AKSEN', 'ALARK', 'ALBRK', 'ALFAS',
+    'ARCLK', 'ASELS', 'ASTOR', 'BERA', 'BIENY', 'BIMAS', 'BIOEN', 'BOBET', 'BRSAN', 'BRYAT',
+    'BUCIM', 'CANTE', 'CCOLA', 'CIMSA', 'CWENE', 'DOAS', 'DOHOL', 'ECILC', 'EGEEN', 'EKGYO',
+    'ENJSA', 'ENKAI', 'EREGL', 'EUPWR', 'EUREN', 'FROTO', 'GARAN', 'GENIL', 'GESAN', 'GUBRF',
+    'GWIND', 'HALKB', 'HEKTS', 'IPEKE', 'ISCTR', 'ISDMR', 'ISGYO', 'ISMEN', 'IZMDC', 'KARSN',
+    'KAYSE', 'KCAER', 'KCHOL', 'KONTR', 'KONYA', 'KORDS', 'KOZAA', 'KOZAL', 'KRDMD', 'MAVI',
+    'MGROS', 'MIATK', 'ODAS', 'OTKAR', 'OYAKC', 'PETKM', 'PGSUS', 'QUAGR', 'SAHOL', 'SASA',
+    'SISE', 'SKBNK', 'SMRTG', 'SOKM', 'TAVHL', 'TCELL', 'THYAO', 'TKFEN', 'TOASO', 'TSKB',
+    'TTKOM', 'TTRAK', 'TUKAS', 'TUPRS', 'ULKER', 'VAKBN', 'VESBE', 'VESTL', 'YEOTK', 'YKBNK',
+    'YYLGD', 'ZOREN'
+]
+
+MATRIX_FIELDS = ['open', 'high', 'low', 'close', 'volume']
+
+
+def to_yahoo_symbol(symbol: str) -> str:
+    """KCHOL -> KCHOL.IS"""
+    symbol = symbol.upper()
+    return symbol if '.' in symbol else f"{symbol}.IS"
+
+
+def build_matrices(long_df: pd.DataFrame, symbols: List[str], fields: List[str] = MATRIX_FIELDS) -> Dict:
+    """Uzun formatlı barları (symbol, Date, ...) hizalanmış tarih x sembol matrislerine çevir.
+
+    İşlem görmediği günler (halka arz öncesi, işlem durdurma) NaN kalır.
+    """
+    symbols = [s.upper() for s in symbols]
+    dates = pd.DatetimeIndex(sorted(long_df['Date'].unique())) if not long_df.empty else pd.DatetimeIndex([])
+
+    row = dates.get_indexer(pd.DatetimeIndex(long_df['Date']))
+    col = pd.Index(symbols).get_indexer(long_df['symbol'].str.upper())
+    keep = col >= 0
+
+    matrices = {'symbols': symbols, 'dates': dates}
+    for field in fields:
+        matrix = np.full((len(dates), len(symbols)), np.nan)
+        matrix[row[keep], col[keep]] = long_df[field].to_numpy(float)[keep]
+        matrices[field] = matrix
+    return matrices
+
+
+def forward_fill(matrix: np.ndarray) -> np.ndarray:
+    """Sütun bazında ileri doldurma (işlem durdurma günlerinde son fiyat geçerli)"""
+    valid = ~np.isnan(matrix)
+    index = np.where(valid, np.arange(len(matrix))[:, None], 0)
+    np.maximum.accumulate(index, axis=0, out=index)
+    filled = matrix[index, np.arange(matrix.shape[1])]
+    # İlk geçerli bardan önceki satırlar (halka arz öncesi) NaN kalır
+    filled[~np.maximum.accumulate(valid, axis=0)] = np.nan
+    return filled
+
+
+def adjust_matrices(long_df: pd.DataFrame) -> pd.DataFrame:
+    """Düzeltilmiş fiyatlar (PriceStore.apply_adjustment ile aynı, uzun formatta)"""
+    df = long_df.copy()
+    ratio = (df['adj_close'] / df['close']).fillna(1.0)
+    for col in ['open', 'high', 'low', 'close']:
+        df[col] = df[col] * ratio
+    return df
+
+
+def compute_panel(matrices: Dict) -> Dict[str, np.ndarray]:
+    """Tüm semboller için tüm indikatörleri tek vektörel geçişte hesapla.
+
+    Boşluklar ve işlem durdurmaları için her sembolün geçerli barları sütun
+    başına öne toplanır (kararlı sıralama), indikatörler bu sıkıştırılmış seride
+    hesaplanır ve sonuç orijinal tarih konumlarına geri yazılır. Böylece bir
+    günlük durdurma SMA200'ü 200 gün boyunca NaN yapmaz ve sonuçlar sembol başına
+    ayrı hesaplamayla birebir aynıdır.
+    """
+    close = matrices['close']
+    valid = ~np.isnan(close)
+    order = np.argsort(~valid, axis=0, kind='stable')
+
+    def pack(x):
+        return np.take_along_axis(np.where(valid, x, np.nan), order, axis=0)
+
+    high = np.where(np.isnan(matrices['high']), close, matrices['high'])
+    low = np.where(np.isnan(matrices['low']), close, matrices['low'])
+    volume = np.where(np.isnan(matrices['volume']), 0.0, matrices['volume'])
+
+    packed = compute_indicators(pack(close), high=pack(high), low=pack(low), volume=pack(volume))
+
+    # Ters permütasyon bir kez hesaplanır; her indikatör tek take ile yerine döner
+    inverse = np.empty_like(order)
+    np.put_along_axis(inverse, order, np.broadcast_to(np.arange(len(close))[:, None], order.shape), axis=0)
+
+    panel = {}
+    for name, values in packed.items():
+        out = np.take_along_axis(values, inverse, axis=0)
+        out[~valid] = np.nan
+        panel[name] = out
+    return panel
+
+
+def latest_snapshot(matrices: Dict, panel: Dict[str, np.ndarray]) -> pd.DataFrame:
+    """Her sembolün son geçerli barındaki fiyat ve indikatör değerleri (sembol başına bir satır)"""
+    close = matrices['close']
+    dates = matrices['dates']
+    n_dates, n_symbols = close.shape
+    if n_dates == 0:
+        return pd.DataFrame(columns=['date', 'stale'] + MATRIX_FIELDS + ['change_pct'] + INDICATOR_COLUMNS)
+
+    valid = ~np.isnan(close)
+    has_data = valid.any(axis=0)
+    last = n_dates - 1 - np.argmax(valid[::-1], axis=0)
+    cols = np.arange(n_symbols)
+
+    # Bir önceki geçerli bar (günlük değişim için)
+    prev_valid = valid.copy()
+    prev_valid[last, cols] = False
+    prev_valid &= np.arange(n_dates)[:, None] < last
+    has_prev = prev_valid.any(axis=0)
+    prev = n_dates - 1 - np.argmax(prev_valid[::-1], axis=0)
+
+    data = {'date': np.where(has_data, dates.values[last], np.datetime64('NaT'))}
+    for field in MATRIX_FIELDS:
+        data[field] = np.where(has_data, matrices[field][last, cols], np.nan)
+    prev_close = np.where(has_prev, close[prev, cols], np.nan)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        data['change_pct'] = (data['close'] / prev_close - 1) * 100
+    for name in INDICATOR_COLUMNS:
+        if name in panel:
+            data[name] = np.where(has_data, panel[name][last, cols], np.nan)
+
+    snapshot = pd.DataFrame(data, index=pd.Index(matrices['symbols'], name='symbol'))
+    # Son işlem günü evrenin son gününden eskiyse (durdurma/kotasyon dışı) bayrakla
+    snapshot['stale'] = snapshot['date'] < dates[-1]
+    return snapshot[has_data]
+
+
+class UniverseEngine:
+    """Evren matrislerini depodan yükler ve kesitsel indikatör anlık görüntüsü üretir"""
+
+    def __init__(self, store: Optional[PriceStore] = None, max_age_seconds: int = 60):
+        self.store = store
+        self.max_age_seconds = max_age_seconds
+        self._lock = threading.Lock()
+        self._snapshots: Dict = {}
+
+    def load_matrices(self, symbols: List[str], days: int = 400, refresh: bool = True,
+                      adjusted: bool = True) -> Dict:
+        """Sembollerin son `days` günlük barlarını hizalanmış matrisler olarak döndür"""
+        store = self.store or get_price_store()
+        start = (datetime.now() - timedelta(days=days)).date()
+        if refresh:
+            try:
+                store.ensure_many(symbols, start)
+            except Exception as e:
+                print(f"Evren güncelleme hatası: {e}")
+
+        long_df = store.read_many(symbols, start)
+        if adjusted and not long_df.empty:
+            long_df = adjust_matrices(long_df)
+        return build_matrices(long_df, symbols)
+
+    def snapshot(self, symbols: Optional[List[str]] = None, days: int = 400, refresh: bool = True) -> pd.DataFrame:
+        """Evrenin güncel indikatör anlık görüntüsü (index: sembol, örn. KCHOL.IS)"""
+        symbols = [to_yahoo_symbol(s) for s in (symbols or BIST_UNIVERSE)]
+        key = (tuple(symbols), days)
+
+        with self._lock:
+            cached = self._snapshots.get(key)
+            if cached is not None and time.time() - cached[0] < self.max_age_seconds:
+                return cached[1].copy()
+
+        matrices = self.load_matrices(symbols, days=days, refresh=refresh)
+        snapshot = latest_snapshot(matrices, compute_panel(matrices))
+
+        with self._lock:
+            self._snapshots[key] = (time.time(), snapshot)
+        return snapshot.copy()
+
+    def clear(self):
+        with self._lock:
+            self._snapshots.clear()
+
+
+_engine: Optional[UniverseEngine] = None
+_engine_lock = threading.Lock()
+
+
+def get_universe_engine() -> UniverseEngine:
+    """Süreç genelinde paylaşılan evren motoru"""
+    global _engine
+    with _engine_lock:
+        if _engine is None:
+            _engine = UniverseEngine()
+        return _engine
+
+
+def get_universe_snapshot(symbols: Optional[List[str]] = None, days: int = 400) -> pd.DataFrame:
+    """BIST evreninin (veya verilen sembollerin) güncel indikatör anlık görüntüsü"""
+    return get_universe_engine().snapshot(symbols, days=days)
+
+
+if __name__ == "__main__":
+    from indicators import add_indicators
+
+    # Sentetik evren: halka arz tarihleri farklı ve arada işlem durdurmaları olan 500 sembol
+    # (varsayılan 400 takvim günü ~ 280 işlem günü)
+    n_days, n_symbols = 280, 500
+    rng = np.random.default_rng(3)
+    dates = pd.bdate_range('2020-01-01', periods=n_days)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.02, (n_days, n_symbols)), axis=0))
+    listing = rng.integers(0, 60, n_symbols)
+    close[np.arange(n_days)[:, None] < listing] = np.nan
+    close[rng.random(close.shape) < 0.01] = np.nan
+    matrices = {
+        'symbols': [f"SYM{i}.IS" for i in range(n_symbols)], 'dates': dates,
+        'open': close, 'high': close * 1.01, 'low': close * 0.99, 'close': close,
+        'volume': np.where(np.isnan(close), np.nan, 1e6)
+    }
+
+    t0 = time.perf_counter()
+    snapshot = latest_snapshot(matrices, compute_panel(matrices))
+    print(f"{n_symbols} sembol x {n_days} gün anlık görüntü: {(time.perf_counter() - t0) * 1000:.0f} ms")
+
+    # Tek sembolün kendi barlarıyla hesaplanan değerlerle karşılaştır
+    i = 7
+    df = pd.DataFrame({f: matrices[f][:, i] for f in MATRIX_FIELDS}, index=dates).dropna(subset=['close'])
+    expected = add_indicators(df).iloc[-1]
+    print(f"SYM{i}.IS RSI: {snapshot.loc[f'SYM{i}.IS', 'RSI']:.4f} / tek sembol: {expected['RSI']:.4f}")
+    print(f"SYM{i}.IS SMA200: {snapshot.loc[f'SYM{i}.IS', 'SMA200']:.4f} / tek sembol: {expected['SMA200']:.4f}")
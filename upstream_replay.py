@@ -0,0 +1,391 @@
+# upstream_replay.py
+# yfinance ve HTTP (requests) upstream yanıtları için kayıt/tekrar oynatma katmanı
+#
+# Kullanım:
+#   UPSTREAM_MODE=record python price_store.py          -> yanıtları fixtures/upstream altına kaydet
+#   UPSTREAM_MODE=replay python price_store.py          -> ağa çıkmadan kayıtlardan oynat
+#   python upstream_replay.py replay --latency-ms 50 price_store.py
+#
+# Ortam değişkeni, price_store'u içe aktaran her betikte (price_store, batch_predictions,
+# portfolio_valuation, streamlit_app ...) içe aktarma anında uygulanır; diğer betikler
+# upstream_replay.py üzerinden çalıştırılır.
+#
+# Ortam değişkenleri:
+#   UPSTREAM_MODE         live | record | replay (varsayılan: live)
+#   UPSTREAM_FIXTURE_DIR  kayıt dizini (varsayılan: fixtures/upstream)
+#   UPSTREAM_LATENCY_MS   replay modunda her çağrıya eklenecek gecikme (ms)
+
+import base64
+import hashlib
+import inspect
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+import numpy as np
+import pandas as pd
+import requests
+import yfinance as yf
+
+MODES = ('live', 'record', 'replay')
+
+# Anahtara dahil edilmeyen, sonucu etkilemeyen parametreler
+_IGNORED_PARAMS = {'progress', 'threads', 'timeout', 'session', 'proxy'}
+# Kayıtlara açık metin yazılmaması gereken gizli sorgu/gövde parametreleri
+_SECRET_PARAMS = {'api_key', 'apikey', 'key', 'token'}
+_REDACTED = '<redacted>'
+
+
+class ReplayMissError(LookupError):
+    """Replay modunda istenen çağrı için kayıt bulunamadı"""
+
+
+class UpstreamRecorder:
+    def __init__(self, mode: str = 'live', fixture_dir: str = 'fixtures/upstream', latency_ms: float = 0.0):
+        if mode not in MODES:
+            raise ValueError(f"Geçersiz mod: {mode} ({', '.join(MODES)})")
+        self.mode = mode
+        self.fixture_dir = Path(fixture_dir)
+        self.latency = latency_ms / 1000.0
+        self._lock = threading.Lock()
+        self._index: List[Dict] = []
+        self._originals = {}
+
+        if self.mode != 'live':
+            self.fixture_dir.mkdir(parents=True, exist_ok=True)
+            self._index = self._load_index()
+
+    # ------------------------------------------------------------------
+    # Fixture dizini
+    # ------------------------------------------------------------------
+    @property
+    def index_file(self) -> Path:
+        return self.fixture_dir / 'index.json'
+
+    def _load_index(self) -> List[Dict]:
+        if self.index_file.exists():
+            try:
+                with open(self.index_file, 'r', encoding='utf-8') as f:
+                    return json.load(f)
+            except Exception as e:
+                print(f"Fixture indeksi okunamadı: {e}")
+        return []
+
+    def _save(self, kind: str, key: Dict, payload, suffix: str):
+        """Bir yanıtı kaydet ve indekse ekle"""
+        key_json = json.dumps(key, sort_keys=True, default=str)
+        digest = hashlib.sha1(f"{kind}|{key_json}".encode('utf-8')).hexdigest()[:16]
+        file_name = f"{kind}-{digest}{suffix}"
+        path = self.fixture_dir / file_name
+
+        with self._lock:
+            if suffix == '.pkl':
+                pd.to_pickle(payload, path)
+            else:
+                with open(path, 'w', encoding='utf-8') as f:
+                    json.dump(payload, f, ensure_ascii=False, default=str)
+
+            self._index = [e for e in self._index if not (e['kind'] == kind and e['key'] == json.loads(key_json))]
+            self._index.append({'kind': kind, 'key': json.loads(key_json), 'file': file_name})
+            with open(self.index_file, 'w', encoding='utf-8') as f:
+                json.dump(self._index, f, ensure_ascii=False, indent=1)
+
+    def _find(self, kind: str, key: Dict, relaxed: Optional[List[str]] = None) -> Optional[Dict]:
+        """Tam eşleşen kaydı, yoksa `relaxed` alanları hariç eşleşen ilk kaydı bul"""
+        key = json.loads(json.dumps(key, sort_keys=True, default=str))
+        candidates = [e for e in self._index if e['kind'] == kind]
+        for entry in candidates:
+            if entry['key'] == key:
+                return entry
+        if relaxed:
+            strip = lambda k: {name: value for name, value in k.items() if name not in relaxed}
+            matches = [entry for entry in candidates if strip(entry['key']) == strip(key)]
+            if matches:
+                # En geniş aralığı kapsayan (en erken başlangıçlı) kaydı tercih et
+                return min(matches, key=lambda e: str(e['key'].get('start') or ''))
+        return None
+
+    def _load(self, entry: Dict):
+        path = self.fixture_dir / entry['file']
+        if path.suffix == '.pkl':
+            return pd.read_pickle(path)
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    def _replay_delay(self):
+        if self.latency > 0:
+            time.sleep(self.latency)
+
+    # ------------------------------------------------------------------
+    # yfinance
+    # ------------------------------------------------------------------
+    @staticmethod
+    def _call_key(func, args, kwargs) -> Dict:
+        signature = inspect.signature(func)
+        bound = signature.bind_partial(*args, **kwargs).arguments
+        flat = {}
+        for name, value in bound.items():
+            kind = signature.parameters[name].kind
+            if kind == inspect.Parameter.VAR_KEYWORD:
+                flat.update(value)
+            elif kind == inspect.Parameter.VAR_POSITIONAL:
+                if value:
+                    flat['args'] = list(value)
+            elif name != 'self':
+                flat[name] = value
+
+        key = {}
+        for name, value in flat.items():
+            if name in _IGNORED_PARAMS:
+                continue
+            if name == 'tickers' and isinstance(value, str):
+                value = value.split()
+            if isinstance(value, (list, tuple)):
+                value = [str(v).upper() for v in value]
+            key[name] = str(value) if not isinstance(value, (list, bool, int, float, type(None))) else value
+        return key
+
+    @staticmethod
+    def _slice(df: pd.DataFrame, key: Dict) -> pd.DataFrame:
+        """Daha geniş bir kayıttan istenen [start, end) aralığını kes"""
+        if df is None or df.empty:
+            return df
+        index = df.index.tz_localize(None) if getattr(df.index, 'tz', None) is not None else df.index
+        mask = np.ones(len(df), dtype=bool)
+        if key.get('start') not in (None, 'None'):
+            mask &= np.asarray(index >= pd.Timestamp(key['start']))
+        if key.get('end') not in (None, 'None'):
+            mask &= np.asarray(index < pd.Timestamp(key['end']))
+        return df[mask]
+
+    def _assemble(self, key: Dict) -> Optional[pd.DataFrame]:
+        """group_by='ticker' toplu indirmeyi farklı gruplarla yapılmış kayıtlardan birleştir"""
+        if key.get('group_by') != 'ticker':
+            return None
+
+        same_options = lambda k: all(k.get(name) == key.get(name) for name in ('auto_adjust', 'actions', 'interval', 'group_by'))
+        entries = sorted(
+            (e for e in self._index if e['kind'] == 'yf_download' and same_options(e['key'])),
+            key=lambda e: str(e['key'].get('start') or '')
+        )
+
+        parts = {}
+        for ticker in key.get('tickers', []):
+            for entry in entries:
+                if ticker not in entry['key'].get('tickers', []):
+                    continue
+                df = self._load(entry)
+                if isinstance(df.columns, pd.MultiIndex) and ticker in df.columns.get_level_values(0):
+                    parts[ticker] = self._slice(df[ticker], key)
+                    break
+
+        if not parts:
+            return None
+        return pd.concat(parts, axis=1)
+
+    def _download(self, *args, **kwargs):
+        original = self._originals['download']
+        key = self._call_key(original, args, kwargs)
+
+        if self.mode == 'record':
+            df = original(*args, **kwargs)
+            self._save('yf_download', key, df, '.pkl')
+            return df
+
+        entry = self._find('yf_download', key, relaxed=['start', 'end', 'period'])
+        df = self._slice(self._load(entry), key) if entry is not None else self._assemble(key)
+        if df is None:
+            raise ReplayMissError(f"yf.download kaydı yok: {key}")
+        self._replay_delay()
+        return df
+
+    def _ticker_class(self):
+        recorder = self
+        base = self._originals['Ticker']
+
+        class ReplayTicker(base):
+            def history(self, *args, **kwargs):
+                original = base.history
+                key = {'ticker': str(self.ticker).upper(), **recorder._call_key(original, (self,) + args, kwargs)}
+                key.pop('self', None)
+
+                if recorder.mode == 'record':
+                    df = original(self, *args, **kwargs)
+                    recorder._save('yf_history', key, df, '.pkl')
+                    return df
+
+                entry = recorder._find('yf_history', key, relaxed=['start', 'end', 'period'])
+                if entry is None:
+                    raise ReplayMissError(f"Ticker.history kaydı yok: {key}")
+                recorder._replay_delay()
+                return recorder._slice(recorder._load(entry), key)
+
+            @property
+            def info(self):
+                key = {'ticker': str(self.ticker).upper()}
+
+                if recorder.mode == 'record':
+                    info = base.info.fget(self)
+                    recorder._save('yf_info', key, info, '.json')
+                    return info
+
+                entry = recorder._find('yf_info', key)
+                if entry is None:
+                    raise ReplayMissError(f"Ticker.info kaydı yok: {key}")
+                recorder._replay_delay()
+                return recorder._load(entry)
+
+        return ReplayTicker
+
+    # ------------------------------------------------------------------
+    # requests
+    # ------------------------------------------------------------------
+    @staticmethod
+    def _redact_pairs(pairs) -> List:
+        return sorted((str(k), _REDACTED if str(k).lower() in _SECRET_PARAMS else str(v)) for k, v in pairs)
+
+    @classmethod
+    def _redact_url(cls, url: str) -> str:
+        parts = urlsplit(str(url))
+        if not parts.query:
+            return str(url)
+        query = urlencode(cls._redact_pairs(parse_qsl(parts.query, keep_blank_values=True)))
+        return urlunsplit(parts._replace(query=query))
+
+    @classmethod
+    def _request_key(cls, method, url, kwargs) -> Dict:
+        """İstek anahtarı (gizli parametreler maskelenir; anahtar hem eşleşmede hem kayıtta kullanılır)"""
+        params = kwargs.get('params')
+        data = kwargs.get('data')
+        body = kwargs.get('json')
+        key = {
+            'method': str(method).upper(),
+            'url': cls._redact_url(url),
+            'params': cls._redact_pairs(dict(params).items()) if params else None,
+            'data': cls._redact_pairs(data.items()) if isinstance(data, dict) else data
+        }
+        if body is not None:
+            key['json'] = cls._redact_pairs(body.items()) if isinstance(body, dict) else body
+        return key
+
+    @classmethod
+    def _serialize_response(cls, response: requests.Response) -> Dict:
+        return {
+            'status_code': response.status_code,
+            'reason': response.reason,
+            'url': cls._redact_url(response.url) if response.url else response.url,
+            'encoding': response.encoding,
+            'headers': dict(response.headers),
+            'content': base64.b64encode(response.content or b'').decode('ascii')
+        }
+
+    @staticmethod
+    def _build_response(payload: Dict) -> requests.Response:
+        response = requests.Response()
+        response.status_code = payload['status_code']
+        response.reason = payload.get('reason')
+        response.url = payload.get('url')
+        response.encoding = payload.get('encoding')
+        response.headers.update(payload.get('headers') or {})
+        response._content = base64.b64decode(payload.get('content') or '')
+        return response
+
+    def _session_request(self, session, method, url, *args, **kwargs):
+        original = self._originals['Session.request']
+        key = self._request_key(method, url, kwargs)
+
+        if self.mode == 'record':
+            response = original(session, method, url, *args, **kwargs)
+            self._save('http', key, self._serialize_response(response), '.json')
+            return response
+
+        # Sorgu ve gövde anahtarın parçası: farklı sembol/sorgu için kayıt paylaşılmaz
+        entry = self._find('http', key)
+        if entry is None:
+            raise ReplayMissError(f"HTTP kaydı yok: {key['method']} {key['url']} "
+                                  f"params={key['params']} data={key['data']}")
+        self._replay_delay()
+        return self._build_response(self._load(entry))
+
+    # ------------------------------------------------------------------
+    # Kurulum
+    # ------------------------------------------------------------------
+    def install(self):
+        """yfinance ve requests fonksiyonlarını kayıt/tekrar oynatma sarmalayıcılarıyla değiştir"""
+        if self.mode == 'live' or self._originals:
+            return
+
+        self._originals = {
+            'download': yf.download,
+            'Ticker': yf.Ticker,
+            'Session.request': requests.Session.request
+        }
+
+        recorder = self
+
+        def download(*args, **kwargs):
+            return recorder._download(*args, **kwargs)
+
+        def session_request(session, method, url, *args, **kwargs):
+            return recorder._session_request(session, method, url, *args, **kwargs)
+
+        yf.download = download
+        yf.Ticker = self._ticker_class()
+        requests.Session.request = session_request
+        print(f"🎞️ Upstream {self.mode} modu aktif: {self.fixture_dir}")
+
+    def uninstall(self):
+        """Orijinal fonksiyonları geri yükle"""
+        if not self._originals:
+            return
+        yf.download = self._originals['download']
+        yf.Ticker = self._originals['Ticker']
+        requests.Session.request = self._originals['Session.request']
+        self._originals = {}
+
+
+_active_recorder: Optional[UpstreamRecorder] = None
+
+
+def install_from_env() -> Optional[UpstreamRecorder]:
+    """UPSTREAM_MODE ortam değişkenine göre kayıt/tekrar oynatmayı etkinleştir"""
+    global _active_recorder
+    mode = os.getenv('UPSTREAM_MODE', 'live').lower()
+    if mode == 'live' or _active_recorder is not None:
+        return _active_recorder
+
+    _active_recorder = UpstreamRecorder(
+        mode=mode,
+        fixture_dir=os.getenv('UPSTREAM_FIXTURE_DIR', 'fixtures/upstream'),
+        latency_ms=float(os.getenv('UPSTREAM_LATENCY_MS', '0') or 0)
+    )
+    _active_recorder.install()
+    return _active_recorder
+
+
+if __name__ == "__main__":
+    import argparse
+    import runpy
+    import sys
+
+    parser = argparse.ArgumentParser(description="Bir betiği upstream kayıt/tekrar oynatma modunda çalıştır")
+    parser.add_argument('mode', choices=MODES)
+    parser.add_argument('script', help="Çalıştırılacak Python betiği")
+    parser.add_argument('script_args', nargs=argparse.REMAINDER)
+    parser.add_argument('--fixture-dir', default=os.getenv('UPSTREAM_FIXTURE_DIR', 'fixtures/upstream'))
+    parser.add_argument('--latency-ms', type=float, default=float(os.getenv('UPSTREAM_LATENCY_MS', '0') or 0))
+    args = parser.parse_args()
+
+    os.environ['UPSTREAM_MODE'] = args.mode
+    os.environ['UPSTREAM_FIXTURE_DIR'] = args.fixture_dir
+    os.environ['UPSTREAM_LATENCY_MS'] = str(args.latency_ms)
+    # __main__ yerine içe aktarılan modül: price_store'un içe aktarma anındaki çağrısı aynı kaydediciyi görür
+    import upstream_replay
+    upstream_replay.install_from_env()
+
+    sys.argv = [args.script] + args.script_args
+    runpy.run_path(args.script, run_name='__main__')